@@ -0,0 +1,52 @@
+"""
+Hatch 构建钩子
+
+构建 wheel 时将 src/elecspeckit_init/templates 打包为单个不压缩的归档
+elecspeckit_init/templates.zip (内含模板清单 manifest.json) 随包分发，
+取代上千个零散的模板文件 (见 pyproject.toml 中的 exclude)。
+运行时由 template_bundle 内存映射读取归档成员。
+"""
+
+import importlib.util
+import tempfile
+from pathlib import Path
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+PACKAGE_DIR = Path(__file__).parent / "src" / "elecspeckit_init"
+
+
+def _load_manifest_module():
+    """直接按文件路径加载 template_manifest（包此时尚未安装）"""
+    spec = importlib.util.spec_from_file_location(
+        "_elecspeckit_template_manifest", PACKAGE_DIR / "template_manifest.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TemplateManifestBuildHook(BuildHookInterface):
+    """在 wheel 中写入模板归档"""
+
+    PLUGIN_NAME = "custom"
+
+    def initialize(self, version: str, build_data: dict) -> None:
+        # 可编辑安装直接使用源码树，运行时会现场扫描模板目录
+        if version == "editable":
+            return
+
+        manifest_module = _load_manifest_module()
+        self._temp_dir = tempfile.TemporaryDirectory()
+        output_path = Path(self._temp_dir.name) / manifest_module.BUNDLE_FILENAME
+
+        manifest_module.write_template_bundle(PACKAGE_DIR / "templates", output_path)
+
+        build_data["force_include"][str(output_path)] = (
+            f"elecspeckit_init/{manifest_module.BUNDLE_FILENAME}"
+        )
+
+    def finalize(self, version: str, build_data: dict, artifact_path: str) -> None:
+        temp_dir = getattr(self, "_temp_dir", None)
+        if temp_dir is not None:
+            temp_dir.cleanup()
@@ -0,0 +1,662 @@
+"""
+内容寻址备份存储
+
+升级时被覆盖的文件统一存入 .elecspecify/backup/objects/（按 SHA-256 命名，
+相同内容只存一份），每次升级只生成一个很小的快照清单
+.elecspecify/backup/snapshots/<快照ID>.json，记录该次备份的文件路径与哈希。
+
+目录结构:
+    .elecspecify/backup/
+    ├── objects/ab/abcdef...      # 文件内容，按哈希去重
+    └── snapshots/20251214-153045.json
+
+备份中可能包含 skill_config.json 等保存 API 密钥的文件，因此备份目录权限为 0700，
+内容对象权限为 0600，恢复时再还原快照中记录的原始权限位。
+
+gc_backups() 按保留策略清理快照、旧版本遗留的 *.bak.<时间戳> 文件和
+<名称>.bak.<时间戳> 备份目录，并删除不再被任何快照引用的内容对象。
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .deploy_state import DeployState
+from .template_manifest import compute_sha256
+
+# 备份根目录（相对项目根目录）
+BACKUP_DIR = Path(".elecspecify") / "backup"
+
+OBJECTS_DIRNAME = "objects"
+SNAPSHOTS_DIRNAME = "snapshots"
+
+# 快照清单格式版本
+SNAPSHOT_FORMAT_VERSION = 1
+
+# 备份时间戳格式 (YYYYMMDD-HHMMSS)
+BACKUP_TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+# 旧版本 write_or_update_file 写入的单文件备份使用下划线 (YYYYMMDD_HHMMSS)
+LEGACY_BACKUP_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# 快照 ID: <时间戳>[.<序号>]
+SNAPSHOT_ID_PATTERN = re.compile(r"^(?P<timestamp>\d{8}-\d{6})(?:\.(?P<sequence>\d+))?$")
+
+# 旧式备份文件/目录名: <原名称>.bak.<时间戳>[.<序号>]
+BACKUP_NAME_PATTERN = re.compile(
+    r"^(?P<name>.+)\.bak\.(?P<timestamp>\d{8}[-_]\d{6})(?:\.(?P<sequence>\d+))?$"
+)
+
+# 扫描备份的目录（相对项目根目录）
+BACKUP_SCAN_DIRS = (".elecspecify", ".claude", ".qwen")
+
+# 新写入的对象在此时间内不被回收，避免与正在进行、尚未提交快照的升级冲突
+OBJECT_GRACE_SECONDS = 3600
+
+# 备份目录和内容对象的权限（仅所有者可访问）
+BACKUP_DIR_MODE = 0o700
+BACKUP_OBJECT_MODE = 0o600
+
+# 保留时长单位
+_DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+@dataclass
+class SnapshotEntry:
+    """快照中的单个文件"""
+
+    path: str  # 相对项目根目录的 POSIX 路径
+    sha256: str
+    size: int
+    mode: int
+
+
+class BackupStore:
+    """
+    项目级内容寻址备份存储
+
+    Examples:
+        >>> store = BackupStore(Path.cwd())
+        >>> snapshot = store.begin_snapshot("upgrade")
+        >>> snapshot.add(Path(".claude/skills/docs-seeker/SKILL.md"))
+        >>> snapshot.commit()
+    """
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.root = base_dir / BACKUP_DIR
+        self.objects_dir = self.root / OBJECTS_DIRNAME
+        self.snapshots_dir = self.root / SNAPSHOTS_DIRNAME
+
+    def object_path(self, sha256: str) -> Path:
+        """内容对象的存储路径"""
+        return self.objects_dir / sha256[:2] / sha256
+
+    def ensure_private_dir(self, path: Path) -> None:
+        """
+        创建备份根目录下的目录，并确保从备份根目录到 path 的每一级权限为 0700
+
+        Args:
+            path: 备份根目录或其下的目录
+        """
+        path.mkdir(mode=BACKUP_DIR_MODE, parents=True, exist_ok=True)
+        for directory in (path, *path.parents):
+            if not directory.is_relative_to(self.root):
+                break
+            os.chmod(directory, BACKUP_DIR_MODE)
+
+    def _write_object(self, sha256: str, write) -> None:
+        """
+        将内容写入仅所有者可读的临时文件，再原子替换为内容对象
+
+        Args:
+            sha256: 内容的 SHA-256
+            write: 向打开的临时文件写入内容的函数
+        """
+        object_path = self.object_path(sha256)
+        self.ensure_private_dir(object_path.parent)
+        temp_path = object_path.with_name(f".{sha256}.{os.getpid()}.{threading.get_ident()}.tmp")
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, BACKUP_OBJECT_MODE)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.chmod(temp_path, BACKUP_OBJECT_MODE)
+            os.replace(temp_path, object_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def has_object(self, sha256: str) -> bool:
+        """检查内容对象是否已存在"""
+        return self.object_path(sha256).exists()
+
+    def put_file(self, path: Path) -> tuple[str, int, bool]:
+        """
+        将文件内容存入对象库
+
+        Args:
+            path: 待存储的文件
+
+        Returns:
+            (SHA-256, 文件大小, 是否新写入对象) 元组；内容已存在时不重复写入
+        """
+        sha256 = compute_sha256(path)
+        size = path.stat().st_size
+
+        object_path = self.object_path(sha256)
+        if object_path.exists():
+            return sha256, size, False
+
+        def write(dst) -> None:
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+
+        self._write_object(sha256, write)
+        return sha256, size, True
+
+    def put_bytes(self, data: bytes) -> str:
+        """
+        将字节内容存入对象库
+
+        Returns:
+            内容的 SHA-256
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        object_path = self.object_path(sha256)
+
+        if not object_path.exists():
+            self._write_object(sha256, lambda f: f.write(data))
+
+        return sha256
+
+    def read_bytes(self, sha256: str) -> bytes:
+        """读取内容对象"""
+        return self.object_path(sha256).read_bytes()
+
+    def begin_snapshot(self, label: str = "upgrade") -> "BackupSnapshot":
+        """
+        开始一次新的备份快照
+
+        Args:
+            label: 快照标签（如 "upgrade"）
+
+        Returns:
+            BackupSnapshot 对象，文件备份完成后需调用 commit()
+        """
+        snapshot_id = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
+
+        # 处理同一秒内的多次快照
+        sequence = 1
+        candidate = snapshot_id
+        while (self.snapshots_dir / f"{candidate}.json").exists():
+            candidate = f"{snapshot_id}.{sequence}"
+            sequence += 1
+
+        return BackupSnapshot(store=self, snapshot_id=candidate, label=label)
+
+    def list_snapshots(self) -> List[str]:
+        """按时间顺序列出所有快照 ID"""
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted(
+            entry.name[: -len(".json")]
+            for entry in os.scandir(self.snapshots_dir)
+            if entry.name.endswith(".json")
+        )
+
+    def load_snapshot(self, snapshot_id: str) -> dict:
+        """读取快照清单"""
+        snapshot_file = self.snapshots_dir / f"{snapshot_id}.json"
+        return json.loads(snapshot_file.read_text(encoding="utf-8"))
+
+    def restore_snapshot(self, snapshot_id: str) -> List[Path]:
+        """
+        将快照中的文件恢复到项目中的原位置
+
+        文件以 0600 创建，写入完成后再设置为快照中记录的权限位。
+
+        Args:
+            snapshot_id: 快照 ID
+
+        Returns:
+            已恢复的文件路径列表
+        """
+        data = self.load_snapshot(snapshot_id)
+        restored = []
+
+        for relative_path, info in data.get("files", {}).items():
+            target = self.base_dir / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                target.unlink()
+            except FileNotFoundError:
+                pass
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, BACKUP_OBJECT_MODE)
+            with os.fdopen(fd, "wb") as dst, open(self.object_path(info["sha256"]), "rb") as src:
+                shutil.copyfileobj(src, dst)
+            os.chmod(target, info.get("mode", 0o644))
+            restored.append(target)
+
+        return restored
+
+
+class BackupSnapshot:
+    """
+    一次升级的备份快照
+
+    add() 可在多个线程中并发调用；commit() 只在有文件被备份时写入快照清单。
+    """
+
+    def __init__(self, store: BackupStore, snapshot_id: str, label: str):
+        self.store = store
+        self.snapshot_id = snapshot_id
+        self.label = label
+        self.entries: Dict[str, SnapshotEntry] = {}
+        self.bytes_stored = 0  # 新写入对象库的字节数（去重后）
+        self._lock = threading.Lock()
+
+    def add(self, path: Path) -> Path:
+        """
+        备份文件到对象库并记录到快照
+
+        Args:
+            path: 项目内待备份的文件
+
+        Returns:
+            内容对象的存储路径
+        """
+        sha256, size, stored = self.store.put_file(path)
+        relative_path = path.relative_to(self.store.base_dir).as_posix()
+        mode = path.stat().st_mode & 0o777
+
+        with self._lock:
+            self.entries[relative_path] = SnapshotEntry(
+                path=relative_path, sha256=sha256, size=size, mode=mode
+            )
+            if stored:
+                self.bytes_stored += size
+
+        return self.store.object_path(sha256)
+
+    @property
+    def path(self) -> Path:
+        """快照清单文件路径"""
+        return self.store.snapshots_dir / f"{self.snapshot_id}.json"
+
+    def commit(self) -> Optional[Path]:
+        """
+        写入快照清单
+
+        Returns:
+            快照清单路径；没有任何文件被备份时返回 None
+        """
+        if not self.entries:
+            return None
+
+        data = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "id": self.snapshot_id,
+            "label": self.label,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "files": {
+                relative_path: {"sha256": entry.sha256, "size": entry.size, "mode": entry.mode}
+                for relative_path, entry in sorted(self.entries.items())
+            },
+        }
+
+        self.store.ensure_private_dir(self.store.snapshots_dir)
+        self.path.write_text(json.dumps(data, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+        return self.path
+
+
+@dataclass
+class BackupItem:
+    """一份可被回收的备份（快照、旧式备份文件或备份目录）"""
+
+    kind: str  # "snapshot" / "file" / "directory"
+    series: str  # 备份系列，保留策略在每个系列内分别应用
+    path: Path
+    created: datetime
+    sequence: int = 0
+    size: int = 0  # 快照为清单文件大小，目录为其中所有文件大小之和
+    objects: Optional[Set[str]] = None  # 快照引用的对象哈希（清单无法解析时为 None）
+
+
+@dataclass
+class BackupInventory:
+    """一次扫描得到的项目备份清单"""
+
+    items: List[BackupItem] = field(default_factory=list)
+    objects: Dict[str, Tuple[Path, int, float]] = field(default_factory=dict)  # 哈希 -> (路径, 大小, mtime)
+
+
+@dataclass
+class GcReport:
+    """备份回收结果"""
+
+    deleted: List[BackupItem] = field(default_factory=list)
+    kept: int = 0
+    objects_deleted: int = 0
+    reclaimed_bytes: int = 0
+    dry_run: bool = False
+
+    def to_dict(self, base_dir: Path) -> dict:
+        """转换为可序列化的字典（路径相对项目根目录）"""
+        return {
+            "deleted": [item.path.relative_to(base_dir).as_posix() for item in self.deleted],
+            "backups_deleted": len(self.deleted),
+            "backups_kept": self.kept,
+            "objects_deleted": self.objects_deleted,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "dry_run": self.dry_run,
+        }
+
+
+def parse_retention_duration(text: str) -> timedelta:
+    """
+    解析保留时长
+
+    Args:
+        text: 时长字符串，如 "90m"、"12h"、"30d"、"2w"
+
+    Returns:
+        timedelta 对象
+
+    Raises:
+        ValueError: 格式无效
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([mhdw])\s*", text.lower())
+    if not match:
+        raise ValueError(f"无效的保留时长: {text} (示例: 90m, 12h, 30d, 2w)")
+    return timedelta(**{_DURATION_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def scan_backups(base_dir: Path) -> BackupInventory:
+    """
+    一次遍历发现项目中的所有备份
+
+    每个扫描目录只遍历一次，遍历过程中同时识别快照清单、内容对象、
+    旧式 *.bak.<时间戳> 文件以及 .elecspecify/backup/ 下的旧式备份目录。
+
+    Args:
+        base_dir: 项目根目录
+
+    Returns:
+        BackupInventory 对象
+    """
+    store = BackupStore(base_dir)
+    inventory = BackupInventory()
+
+    # 栈元素: (目录, 归属)；归属为 None、"objects" 或所在的旧式备份目录
+    stack: List[Tuple[Path, object]] = [
+        (base_dir / name, None) for name in BACKUP_SCAN_DIRS if (base_dir / name).is_dir()
+    ]
+
+    while stack:
+        directory, owner = stack.pop()
+        try:
+            iterator = os.scandir(directory)
+        except OSError:
+            continue
+
+        with iterator:
+            for entry in iterator:
+                path = Path(entry.path)
+
+                if entry.is_dir(follow_symlinks=False):
+                    if owner is not None:
+                        stack.append((path, owner))
+                    elif path == store.objects_dir:
+                        stack.append((path, "objects"))
+                    elif directory == store.root and BACKUP_NAME_PATTERN.match(entry.name):
+                        item = _backup_item("directory", entry.name, path, base_dir)
+                        if item is not None:
+                            inventory.items.append(item)
+                            stack.append((path, item))
+                    else:
+                        stack.append((path, None))
+                    continue
+
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                if isinstance(owner, BackupItem):
+                    owner.size += entry.stat(follow_symlinks=False).st_size
+                elif owner == "objects":
+                    if not entry.name.startswith("."):
+                        stat_result = entry.stat(follow_symlinks=False)
+                        inventory.objects[entry.name] = (
+                            path,
+                            stat_result.st_size,
+                            stat_result.st_mtime,
+                        )
+                elif directory == store.snapshots_dir and entry.name.endswith(".json"):
+                    item = _snapshot_item(path, entry)
+                    if item is not None:
+                        inventory.items.append(item)
+                elif BACKUP_NAME_PATTERN.match(entry.name):
+                    item = _backup_item("file", entry.name, path, base_dir)
+                    if item is not None:
+                        item.size = entry.stat(follow_symlinks=False).st_size
+                        inventory.items.append(item)
+
+    return inventory
+
+
+def parse_backup_timestamp(timestamp: str) -> datetime:
+    """
+    解析备份时间戳（YYYYMMDD-HHMMSS 或旧版本的 YYYYMMDD_HHMMSS）
+
+    Raises:
+        ValueError: 不是有效的时间戳
+    """
+    timestamp_format = LEGACY_BACKUP_TIMESTAMP_FORMAT if "_" in timestamp else BACKUP_TIMESTAMP_FORMAT
+    return datetime.strptime(timestamp, timestamp_format)
+
+
+def _backup_item(kind: str, name: str, path: Path, base_dir: Path) -> Optional[BackupItem]:
+    """根据 <原名称>.bak.<时间戳> 命名创建备份条目"""
+    match = BACKUP_NAME_PATTERN.match(name)
+    try:
+        created = parse_backup_timestamp(match.group("timestamp"))
+    except ValueError:
+        return None
+
+    # 同一原文件（或同一前缀的备份目录）的备份属于同一系列
+    series = (path.parent / match.group("name")).relative_to(base_dir).as_posix()
+    return BackupItem(
+        kind=kind,
+        series=series,
+        path=path,
+        created=created,
+        sequence=int(match.group("sequence") or 0),
+    )
+
+
+def _snapshot_item(path: Path, entry: os.DirEntry) -> Optional[BackupItem]:
+    """读取快照清单并创建备份条目"""
+    match = SNAPSHOT_ID_PATTERN.match(entry.name[: -len(".json")])
+    if not match:
+        return None
+    try:
+        created = parse_backup_timestamp(match.group("timestamp"))
+    except ValueError:
+        return None
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        objects = {info["sha256"] for info in data.get("files", {}).values()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        # 清单无法解析时不知道其引用了哪些对象
+        objects = None
+
+    return BackupItem(
+        kind="snapshot",
+        series=SNAPSHOTS_DIRNAME,
+        path=path,
+        created=created,
+        sequence=int(match.group("sequence") or 0),
+        size=entry.stat(follow_symlinks=False).st_size,
+        objects=objects,
+    )
+
+
+def select_expired_backups(
+    items: List[BackupItem],
+    keep_last: Optional[int] = None,
+    keep_within: Optional[timedelta] = None,
+    now: Optional[datetime] = None,
+) -> List[BackupItem]:
+    """
+    按保留策略选出可删除的备份
+
+    每个备份系列内分别应用策略；满足任一策略的备份都会被保留。
+    未指定任何策略时不删除任何备份。
+
+    Args:
+        items: 备份条目列表
+        keep_last: 每个系列保留最近的 N 份
+        keep_within: 保留创建时间在此时长内的备份
+        now: 当前时间（默认 datetime.now()）
+
+    Returns:
+        可删除的备份条目列表
+    """
+    if keep_last is None and keep_within is None:
+        return []
+
+    now = now or datetime.now()
+    cutoff = now - keep_within if keep_within is not None else None
+
+    series_items: Dict[str, List[BackupItem]] = defaultdict(list)
+    for item in items:
+        series_items[item.series].append(item)
+
+    expired = []
+    for group in series_items.values():
+        group.sort(key=lambda item: (item.created, item.sequence), reverse=True)
+        for index, item in enumerate(group):
+            if keep_last is not None and index < keep_last:
+                continue
+            if cutoff is not None and item.created >= cutoff:
+                continue
+            expired.append(item)
+
+    return expired
+
+
+def gc_backups(
+    base_dir: Path,
+    keep_last: Optional[int] = None,
+    keep_within: Optional[timedelta] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> GcReport:
+    """
+    按保留策略回收项目备份
+
+    删除过期的快照、旧式备份文件和备份目录，并删除不再被保留快照或部署状态
+    引用的内容对象。所有待删除路径在一次扫描后确定，然后按目录批量删除。
+
+    Args:
+        base_dir: 项目根目录
+        keep_last: 每个备份系列保留最近的 N 份
+        keep_within: 保留创建时间在此时长内的备份
+        dry_run: 只计算将被删除的内容，不实际删除
+        now: 当前时间（默认 datetime.now()）
+
+    Returns:
+        GcReport 对象
+    """
+    now = now or datetime.now()
+    inventory = scan_backups(base_dir)
+    expired = select_expired_backups(inventory.items, keep_last, keep_within, now)
+    expired_ids = {id(item) for item in expired}
+    kept = [item for item in inventory.items if id(item) not in expired_ids]
+
+    report = GcReport(deleted=expired, kept=len(kept), dry_run=dry_run)
+
+    files: List[Path] = []
+    directories: List[Path] = []
+    for item in expired:
+        report.reclaimed_bytes += item.size
+        if item.kind == "directory":
+            directories.append(item.path)
+        else:
+            files.append(item.path)
+
+    # 保留的快照中有无法解析的清单时，无法确定哪些对象仍被引用，跳过对象回收
+    snapshots = [item for item in kept if item.kind == "snapshot"]
+    if all(item.objects is not None for item in snapshots):
+        # 部署状态引用的对象是下次升级三方合并的基准
+        live_objects: Set[str] = {
+            record.sha256 for record in DeployState.load(base_dir).files.values()
+        }
+        for item in snapshots:
+            live_objects |= item.objects
+
+        grace_cutoff = now.timestamp() - OBJECT_GRACE_SECONDS
+        for sha256, (path, size, mtime) in inventory.objects.items():
+            if sha256 not in live_objects and mtime < grace_cutoff:
+                files.append(path)
+                report.objects_deleted += 1
+                report.reclaimed_bytes += size
+
+    if not dry_run:
+        _bulk_delete(files, directories)
+
+    return report
+
+
+def _bulk_delete(files: List[Path], directories: List[Path]) -> None:
+    """
+    批量删除文件和目录
+
+    文件按所在目录分组，支持 dir_fd 的平台上每个目录只打开一次，
+    之后按文件名删除；删除后移除变空的对象分组目录。
+    """
+    by_parent: Dict[Path, List[str]] = defaultdict(list)
+    for path in files:
+        by_parent[path.parent].append(path.name)
+
+    use_dir_fd = os.unlink in os.supports_dir_fd
+
+    for parent, names in by_parent.items():
+        if use_dir_fd:
+            try:
+                dir_fd = os.open(parent, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                for name in names:
+                    try:
+                        os.unlink(name, dir_fd=dir_fd)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                os.close(dir_fd)
+        else:
+            for name in names:
+                try:
+                    (parent / name).unlink()
+                except FileNotFoundError:
+                    pass
+
+    for directory in directories:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # 移除变空的 objects/<xx>/ 目录（非空时 rmdir 失败，忽略即可）
+    for parent in by_parent:
+        if parent.parent.name == OBJECTS_DIRNAME:
+            try:
+                parent.rmdir()
+            except OSError:
+                pass
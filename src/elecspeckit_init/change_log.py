@@ -0,0 +1,308 @@
+"""
+紧凑的文件变更日志
+
+ChangeSummary 不再为每个变更保存一个 FileChange 对象 (完整 Path + 消息字符串)，
+而是按列存储:
+
+- 目录路径和文件名分开保存，目录表中每个目录只保存一次，文件名字符串驻留 (sys.intern)
+- 变更类型保存为 1 字节的 ChangeType 代码
+- 复制策略和消息保存在驻留字符串表中，每条记录只保存表索引
+- 备份路径很少出现，单独以稀疏字典保存
+
+记录数超过阈值时，已有的记录块整体写入临时文件 (进程退出或关闭时自动删除)，
+内存中只保留目录表和字符串表。遍历时按需还原为 FileChange 对象。
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path, PurePath
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 内存中最多保留的记录数，超过后写入临时文件
+DEFAULT_SPILL_THRESHOLD = 100_000
+
+
+@dataclass
+class FileChange:
+    """文件变更记录"""
+
+    path: Path
+    change_type: str  # "created", "updated", "backed_up", "skipped"
+    backup_path: Optional[Path] = None
+    message: str = ""
+    strategy: str = ""  # 复制策略 (见 fast_copy)，仅复制文件时记录
+    reported: bool = field(default=False, repr=False, compare=False)  # 是否已发送事件
+    conflict: bool = field(default=False, repr=False, compare=False)  # 三方合并是否留下冲突标记
+
+
+class ChangeType(IntEnum):
+    """变更类型代码"""
+
+    CREATED = 0
+    UPDATED = 1
+    BACKED_UP = 2
+    SKIPPED = 3
+
+    @property
+    def label(self) -> str:
+        """变更类型名称（FileChange.change_type 的取值）"""
+        return _CHANGE_TYPE_LABELS[self]
+
+
+_CHANGE_TYPE_LABELS = ("created", "updated", "backed_up", "skipped")
+_CHANGE_TYPE_CODES = {label: ChangeType(code) for code, label in enumerate(_CHANGE_TYPE_LABELS)}
+
+# 一个记录块: (变更类型, 已发送事件, 目录索引, 文件名, 策略索引, 消息索引, 备份路径)
+_Block = Tuple[array, array, array, List[str], array, array, Dict[int, str]]
+
+
+class ChangeLog:
+    """
+    按列存储的文件变更日志
+
+    Examples:
+        >>> log = ChangeLog()
+        >>> log.append(FileChange(path=target, change_type="created"))
+        >>> list(log.relative_paths(base_dir))
+        ['.claude/skills/docs-seeker/SKILL.md']
+    """
+
+    def __init__(self, spill_threshold: int = DEFAULT_SPILL_THRESHOLD):
+        self.spill_threshold = spill_threshold
+
+        self._dirs: List[str] = []
+        self._dir_index: Dict[str, int] = {}
+        self._strings: List[str] = [""]
+        self._string_index: Dict[str, int] = {"": 0}
+
+        self._spill_file: Optional[IO[bytes]] = None
+        self._spilled_offsets: List[int] = []
+        self._spilled_count = 0
+        self._reset_block()
+
+    def _reset_block(self) -> None:
+        """开始新的内存记录块"""
+        self._codes = array("B")
+        self._reported = array("B")
+        self._dir_refs = array("I")
+        self._names: List[str] = []
+        self._strategy_refs = array("I")
+        self._message_refs = array("I")
+        self._backups: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._spilled_count + len(self._codes)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[FileChange]:
+        """按记录顺序还原为 FileChange 对象"""
+        for code, reported, directory, name, strategy, message, backup in self._iter_rows():
+            yield FileChange(
+                path=Path(os.path.join(self._dirs[directory], name)),
+                change_type=_CHANGE_TYPE_LABELS[code],
+                backup_path=Path(backup) if backup is not None else None,
+                message=self._strings[message],
+                strategy=self._strings[strategy],
+                reported=bool(reported),
+            )
+
+    def append(self, change: FileChange) -> None:
+        """
+        追加一条变更记录
+
+        Raises:
+            ValueError: 未知的变更类型
+        """
+        code = _CHANGE_TYPE_CODES.get(change.change_type)
+        if code is None:
+            raise ValueError(f"未知的变更类型: {change.change_type}")
+
+        directory, name = os.path.split(os.fspath(change.path))
+        backup = os.fspath(change.backup_path) if change.backup_path is not None else None
+        self._append_row(
+            code,
+            change.reported,
+            self._intern_dir(directory),
+            name,
+            self._intern_string(change.strategy),
+            self._intern_string(change.message),
+            backup,
+        )
+
+    def extend(
+        self, other: "ChangeLog", on_unreported: Optional[Callable[[FileChange], None]] = None
+    ) -> None:
+        """
+        追加另一个日志中的全部记录（不还原为 FileChange 对象）
+
+        Args:
+            other: 来源日志
+            on_unreported: 可选回调，对尚未发送事件的记录调用一次，之后记录视为已发送
+        """
+        dir_map: Dict[int, int] = {}
+        string_map: Dict[int, int] = {}
+
+        def map_dir(index: int) -> int:
+            mapped = dir_map.get(index)
+            if mapped is None:
+                mapped = dir_map[index] = self._intern_dir(other._dirs[index])
+            return mapped
+
+        def map_string(index: int) -> int:
+            mapped = string_map.get(index)
+            if mapped is None:
+                mapped = string_map[index] = self._intern_string(other._strings[index])
+            return mapped
+
+        for code, reported, directory, name, strategy, message, backup in other._iter_rows():
+            if not reported and on_unreported is not None:
+                on_unreported(
+                    FileChange(
+                        path=Path(os.path.join(other._dirs[directory], name)),
+                        change_type=_CHANGE_TYPE_LABELS[code],
+                        backup_path=Path(backup) if backup is not None else None,
+                        message=other._strings[message],
+                        strategy=other._strings[strategy],
+                    )
+                )
+                reported = 1
+            self._append_row(
+                code, reported, map_dir(directory), name, map_string(strategy), map_string(message), backup
+            )
+
+    def relative_paths(self, base_dir: Path) -> Iterator[str]:
+        """
+        按记录顺序生成相对 base_dir 的路径字符串（与 str(path.relative_to(base_dir)) 相同）
+
+        每个目录只计算一次相对路径。
+
+        Raises:
+            ValueError: 记录的路径不在 base_dir 下
+        """
+        prefixes: Dict[int, str] = {}
+        for _code, _reported, directory, name, _strategy, _message, _backup in self._iter_rows():
+            prefix = prefixes.get(directory)
+            if prefix is None:
+                relative_dir = str(PurePath(self._dirs[directory]).relative_to(base_dir))
+                prefix = prefixes[directory] = "" if relative_dir == "." else relative_dir + os.sep
+            yield prefix + name
+
+    def paths(self, *change_types: str) -> Iterator[Path]:
+        """按记录顺序生成指定变更类型（未指定时为全部）的文件路径"""
+        codes = {_CHANGE_TYPE_CODES[change_type] for change_type in change_types}
+        for code, _reported, directory, name, _strategy, _message, _backup in self._iter_rows():
+            if not codes or code in codes:
+                yield Path(os.path.join(self._dirs[directory], name))
+
+    def retarget(self, old_dir: Path, new_dir: Path) -> None:
+        """
+        将 old_dir 下记录的路径改写到 new_dir 下
+
+        只改写目录表，记录本身（包括已写入临时文件的记录）不变。
+        """
+        old_prefix = os.fspath(old_dir)
+        new_prefix = os.fspath(new_dir)
+        for index, directory in enumerate(self._dirs):
+            if directory == old_prefix:
+                retargeted = new_prefix
+            elif directory.startswith(old_prefix + os.sep):
+                retargeted = new_prefix + directory[len(old_prefix) :]
+            else:
+                continue
+            if self._dir_index.get(directory) == index:
+                del self._dir_index[directory]
+            self._dirs[index] = retargeted
+            self._dir_index.setdefault(retargeted, index)
+
+    def close(self) -> None:
+        """删除临时文件并清空记录"""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._spilled_offsets = []
+        self._spilled_count = 0
+        self._reset_block()
+
+    def _intern_dir(self, directory: str) -> int:
+        index = self._dir_index.get(directory)
+        if index is None:
+            index = self._dir_index[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        return index
+
+    def _intern_string(self, value: str) -> int:
+        index = self._string_index.get(value)
+        if index is None:
+            index = self._string_index[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def _append_row(
+        self,
+        code: int,
+        reported: bool,
+        directory: int,
+        name: str,
+        strategy: int,
+        message: int,
+        backup: Optional[str],
+    ) -> None:
+        if backup is not None:
+            self._backups[len(self._codes)] = backup
+        self._codes.append(code)
+        self._reported.append(1 if reported else 0)
+        self._dir_refs.append(directory)
+        self._names.append(sys.intern(name))
+        self._strategy_refs.append(strategy)
+        self._message_refs.append(message)
+
+        if len(self._codes) >= self.spill_threshold:
+            self._spill()
+
+    def _current_block(self) -> _Block:
+        return (
+            self._codes,
+            self._reported,
+            self._dir_refs,
+            self._names,
+            self._strategy_refs,
+            self._message_refs,
+            self._backups,
+        )
+
+    def _spill(self) -> None:
+        """将当前内存记录块写入临时文件"""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="elecspeckit-changes-")
+        self._spilled_offsets.append(self._spill_file.seek(0, os.SEEK_END))
+        pickle.dump(self._current_block(), self._spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spilled_count += len(self._codes)
+        self._reset_block()
+
+    def _iter_blocks(self) -> Iterator[_Block]:
+        """依次读取临时文件中的记录块（每次只加载一块），最后是内存中的记录块"""
+        for offset in list(self._spilled_offsets):
+            # 遍历期间可能追加写入，每块读取前重新定位
+            self._spill_file.seek(offset)
+            yield pickle.load(self._spill_file)
+        yield self._current_block()
+
+    def _iter_rows(self) -> Iterator[Tuple[int, int, int, str, int, int, Optional[str]]]:
+        for codes, reported, dir_refs, names, strategy_refs, message_refs, backups in self._iter_blocks():
+            for row in range(len(codes)):
+                yield (
+                    codes[row],
+                    reported[row],
+                    dir_refs[row],
+                    names[row],
+                    strategy_refs[row],
+                    message_refs[row],
+                    backups.get(row),
+                )
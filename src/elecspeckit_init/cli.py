@@ -3,12 +3,16 @@ ElecSpeckit CLI 入口点
 
 提供 elecspeckit 命令,支持以下子命令:
 - init: 初始化 ElecSpeckit 项目结构
+- apply: 执行 init --plan 生成的部署计划
 - check: 检查工具可用性
+- backup gc: 按保留策略回收升级备份
 """
 
 import json as json_module
+import math
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
 
@@ -28,8 +32,11 @@ from rich import box
 from rich.console import Console
 from rich.panel import Panel
 
+from .events import NdjsonEventWriter, emit_event, event_stream, events_enabled
+from .fast_copy import DEPLOY_MODE_COPY, DEPLOY_MODE_LINK, DEPLOY_MODES
 from .fs_utils import is_elecspeckit_project, is_empty_directory
 from .git_utils import initialize_git_repo, is_git_available, is_git_repo
+from .migrations import get_schema_version, run_migrations, write_schema_version
 from .platform_utils import check_disk_space, setup_utf8_output
 from .template_manager import (
     check_multi_platform_conflict,
@@ -38,13 +45,21 @@ from .template_manager import (
 )
 from .ui import InteractiveSelector
 
+if TYPE_CHECKING:
+    from .deploy_plan import DeployPlan
+
 app = typer.Typer(
     name="elecspeckit",
     help="ElecSpeckit CLI - 硬件/电子项目规范驱动工作流工具",
     add_completion=False,
 )
+backup_app = typer.Typer(name="backup", help="管理项目升级备份")
+app.add_typer(backup_app, name="backup")
 console = Console()
 
+# 无法计算部署计划时要求的最小剩余空间（MB）
+FALLBACK_REQUIRED_DISK_MB = 100
+
 
 @app.command(name="init")
 def init_command(
@@ -54,6 +69,35 @@ def init_command(
     no_git: bool = typer.Option(False, "--no-git", help="跳过 git 仓库初始化"),
     reset: bool = typer.Option(False, "--reset", help="重置 constitution.md 到官方模板初始状态"),
     json_output: bool = typer.Option(False, "--json", help="以 JSON 格式输出结果"),
+    json_stream: bool = typer.Option(
+        False,
+        "--json-stream",
+        help="以 NDJSON 事件流输出: 每个文件变更、部署阶段和 git 步骤发生时立即输出一行",
+    ),
+    deploy_mode: str = typer.Option(
+        DEPLOY_MODE_COPY,
+        "--deploy-mode",
+        help=(
+            "文件部署模式: copy (逐字节复制)、auto (依次尝试 reflink/copy_file_range/硬链接缓存) "
+            "或 link (Skills 链接到按版本解包一次的用户级共享缓存)"
+        ),
+    ),
+    staged: bool = typer.Option(
+        False,
+        "--staged",
+        help="在临时目录中构建 Skills/脚本目录树后原子替换, 旧目录树保留为回滚点",
+    ),
+    plan: bool = typer.Option(
+        False, "--plan", help="只计算部署计划并以 JSON 输出, 不写入磁盘 (配合 elecspeckit apply)"
+    ),
+    projects_from: Optional[str] = typer.Option(
+        None,
+        "--projects-from",
+        help="批量处理多个项目: 项目目录列表文件 (每行一个) 或 glob 模式, 每个项目输出一行 NDJSON",
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", min=1, help="--projects-from 的并行工作进程数 (默认 CPU 核数)"
+    ),
 ) -> None:
     """
     初始化 ElecSpeckit 项目结构
@@ -61,7 +105,55 @@ def init_command(
     在空目录中首次执行时,会显示交互式平台选择界面;
     在已有 ElecSpeckit 项目中执行时,会自动检测平台并更新模板。
     使用 --platform 参数可跳过交互式选择 (用于自动化/测试场景)。
+    使用 --plan 时只输出将执行的操作列表, 可保存后通过 elecspeckit apply 执行。
+    使用 --projects-from 时在进程池中并行处理多个项目目录。
+    使用 --json-stream 时以 NDJSON 事件流输出进度, 最后一行为 "result" 事件。
     """
+    if projects_from is not None and json_stream:
+        typer.echo(
+            json_module.dumps(
+                {"status": "error", "message": "--json-stream 不能与 --projects-from 同时使用"},
+                ensure_ascii=False,
+            )
+        )
+        raise typer.Exit(code=1)
+
+    if json_stream and not plan:
+        exit_code = _init_project_streaming(
+            base_dir=Path.cwd(),
+            platform=platform,
+            no_git=no_git,
+            reset=reset,
+            deploy_mode=deploy_mode,
+            staged=staged,
+        )
+        if exit_code:
+            raise typer.Exit(code=exit_code)
+        return
+
+    if projects_from is not None:
+        exit_code = _init_fleet(
+            projects_from=projects_from,
+            workers=workers,
+            platform=platform,
+            no_git=no_git,
+            reset=reset,
+            deploy_mode=deploy_mode,
+            staged=staged,
+            plan=plan,
+        )
+        if exit_code:
+            raise typer.Exit(code=exit_code)
+        return
+
+    if plan:
+        result = _plan_project(base_dir=Path.cwd(), platform=platform, reset=reset)
+        # 计划可能包含 rich 标记字符, 直接输出原始 JSON
+        typer.echo(json_module.dumps(result, indent=2, ensure_ascii=False))
+        if result.get("status") == "error":
+            raise typer.Exit(code=1)
+        return
+
     try:
         result = _init_project(
             base_dir=Path.cwd(),
@@ -69,6 +161,8 @@ def init_command(
             no_git=no_git,
             reset=reset,
             json_output=json_output,
+            deploy_mode=deploy_mode,
+            staged=staged,
         )
 
         if json_output:
@@ -91,7 +185,13 @@ def init_command(
 
 
 def _init_project(
-    base_dir: Path, platform: str, no_git: bool, reset: bool, json_output: bool
+    base_dir: Path,
+    platform: str,
+    no_git: bool,
+    reset: bool,
+    json_output: bool,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    staged: bool = False,
 ) -> dict:
     """
     初始化项目的核心逻辑
@@ -102,10 +202,18 @@ def _init_project(
         no_git: 是否跳过 git 初始化
         reset: 是否重置 constitution.md
         json_output: 是否输出 JSON 格式
+        deploy_mode: 文件部署模式 (copy/auto/link)
+        staged: 是否分阶段部署目录树 (构建完成后原子替换)
 
     Returns:
         包含初始化结果的字典
     """
+    if deploy_mode not in DEPLOY_MODES:
+        return {
+            "status": "error",
+            "message": f"无效的部署模式: {deploy_mode}, 仅支持 {' 或 '.join(DEPLOY_MODES)}",
+        }
+
     # 检查目录状态
     is_empty = False
     is_existing_project = False
@@ -123,14 +231,279 @@ def _init_project(
     # 场景 1: 空目录 - 首次初始化
     if is_empty or (not is_existing_project):
         # 首次初始化时，静默忽略 --reset 标志 (per spec.md US2 AC5)
-        return _init_new_project(base_dir, platform, no_git, reset, json_output)
+        return _init_new_project(
+            base_dir, platform, no_git, reset, json_output, deploy_mode, staged
+        )
 
     # 场景 2: 已有项目 - 升级模式
-    return _upgrade_existing_project(base_dir, platform, no_git, reset, json_output)
+    return _upgrade_existing_project(
+        base_dir, platform, no_git, reset, json_output, deploy_mode, staged
+    )
+
+
+def _init_project_streaming(
+    base_dir: Path,
+    platform: Optional[str],
+    no_git: bool,
+    reset: bool,
+    deploy_mode: str,
+    staged: bool,
+) -> int:
+    """
+    以 NDJSON 事件流方式初始化/升级项目
+
+    每个事件写入标准输出后立即 flush; 最终结果作为 "result" 事件输出,
+    不再包含完整文件列表 (每个文件已作为 "file" 事件输出)。
+
+    Returns:
+        退出码: 成功为 0, 否则为 1
+    """
+    writer = NdjsonEventWriter(sys.stdout, base_dir)
+
+    with event_stream(writer):
+        emit_event("start", base_dir=str(base_dir))
+        try:
+            result = _init_project(
+                base_dir=base_dir,
+                platform=platform,
+                no_git=no_git,
+                reset=reset,
+                json_output=True,
+                deploy_mode=deploy_mode,
+                staged=staged,
+            )
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+
+        result.pop("files", None)
+        emit_event("result", **result)
+
+    return 0 if result.get("status") == "success" else 1
+
+
+def _init_fleet(
+    projects_from: str,
+    workers: Optional[int],
+    platform: Optional[str],
+    no_git: bool,
+    reset: bool,
+    deploy_mode: str,
+    staged: bool,
+    plan: bool,
+) -> int:
+    """
+    并行初始化/升级多个项目, 每完成一个项目输出一行 NDJSON
+
+    Args:
+        projects_from: 项目目录列表文件或 glob 模式
+        workers: 工作进程数 (None 表示 CPU 核数)
+        platform: 新项目使用的 AI 平台 (已有项目自动检测)
+        no_git: 是否跳过 git 初始化
+        reset: 是否重置 constitution.md (批量模式不支持)
+        deploy_mode: 文件部署模式 (copy/auto/link)
+        staged: 是否分阶段部署目录树
+        plan: 是否只输出每个项目的部署计划
+
+    Returns:
+        退出码: 全部成功为 0, 否则为 1
+    """
+    from .fleet import default_worker_count, resolve_project_dirs, run_projects
+    from .template_manager import get_template_manifest
+
+    def emit(record: dict) -> None:
+        typer.echo(json_module.dumps(record, ensure_ascii=False))
+
+    if reset:
+        emit({"status": "error", "message": "--projects-from 不支持与 --reset 同时使用"})
+        return 1
+
+    if deploy_mode not in DEPLOY_MODES:
+        emit(
+            {
+                "status": "error",
+                "message": f"无效的部署模式: {deploy_mode}, 仅支持 {' 或 '.join(DEPLOY_MODES)}",
+            }
+        )
+        return 1
+
+    try:
+        project_dirs = resolve_project_dirs(projects_from)
+    except (OSError, ValueError) as e:
+        emit({"status": "error", "message": str(e)})
+        return 1
+
+    exit_code = 0
+    for result in run_projects(
+        project_dirs,
+        _init_fleet_project,
+        get_template_manifest(),
+        workers or default_worker_count(),
+        platform=platform,
+        no_git=no_git,
+        deploy_mode=deploy_mode,
+        staged=staged,
+        plan=plan,
+    ):
+        if result.get("status") != "success":
+            exit_code = 1
+        emit(result)
+
+    return exit_code
+
+
+def _init_fleet_project(
+    base_dir: Path,
+    platform: Optional[str],
+    no_git: bool,
+    deploy_mode: str,
+    staged: bool,
+    plan: bool,
+) -> dict:
+    """
+    批量模式下处理单个项目 (在工作进程中执行, 不输出任何人类可读信息)
+
+    Args:
+        base_dir: 项目目录
+        platform: 新项目使用的 AI 平台
+        no_git: 是否跳过 git 初始化
+        deploy_mode: 文件部署模式
+        staged: 是否分阶段部署目录树
+        plan: 是否只计算部署计划
+
+    Returns:
+        结果字典
+    """
+    if plan:
+        return _plan_project(base_dir, platform, reset=False)
+
+    if platform is None and not is_elecspeckit_project(base_dir):
+        return {"status": "error", "message": "新项目需要通过 --platform 指定 claude 或 qwen"}
+
+    return _init_project(
+        base_dir,
+        platform,
+        no_git,
+        reset=False,
+        json_output=True,
+        deploy_mode=deploy_mode,
+        staged=staged,
+    )
+
+
+def _plan_project(base_dir: Path, platform: Optional[str], reset: bool) -> dict:
+    """
+    计算部署计划 (不写入磁盘)
+
+    Args:
+        base_dir: 项目根目录
+        platform: 指定的 AI 平台 (新项目必需; 已有项目自动检测)
+        reset: 是否重置 constitution.md (计划模式不支持)
+
+    Returns:
+        部署计划字典 (可直接保存为 elecspeckit apply 的输入), 失败时为错误结果字典
+    """
+    from elecspeckit_init import __version__
+
+    from .deploy_plan import build_deploy_plan
+
+    if reset:
+        return {"status": "error", "message": "--plan 不支持与 --reset 同时使用"}
+
+    try:
+        is_existing_project = is_elecspeckit_project(base_dir)
+    except FileNotFoundError:
+        return {"status": "error", "message": f"目录不存在: {base_dir}"}
+
+    if is_existing_project:
+        has_conflict, detected_platforms = check_multi_platform_conflict(base_dir)
+        if has_conflict:
+            return {
+                "status": "error",
+                "error_type": "multi_platform_conflict",
+                "detected_platforms": detected_platforms,
+                "message": "检测到多个 AI 平台配置，请手工删除其中一个后重试",
+            }
+
+        mode = "upgrade"
+        platform = detect_platform(base_dir)
+        if platform is None:
+            return {
+                "status": "error",
+                "message": "无法检测到现有 Agent 平台 (.claude/ 或 .qwen/ 目录不存在)",
+            }
+    else:
+        mode = "new"
+        if platform not in ["claude", "qwen"]:
+            return {
+                "status": "error",
+                "message": "新项目使用 --plan 时需通过 --platform 指定 claude 或 qwen",
+            }
+
+    deploy_plan = build_deploy_plan(base_dir, platform, mode)
+    deploy_plan.version = __version__
+    return {"status": "success", **deploy_plan.to_dict()}
+
+
+def _check_deploy_disk_space(
+    base_dir: Path,
+    platform: str,
+    mode: str,
+    plan: Optional["DeployPlan"] = None,
+    staged: bool = False,
+) -> Optional[dict]:
+    """
+    FR-047: 检查磁盘空间是否足够执行本次部署
+
+    需要的空间由部署计划精确计算 (写入字节数 + 去重后的备份字节数 + 元数据，
+    分阶段部署时再加上与回滚点分离而复制的文件，见 deploy_plan.estimate_disk_usage)；
+    无法计算计划时退回固定的 100MB 要求。
+
+    Args:
+        base_dir: 项目根目录
+        platform: AI 平台
+        mode: "new" 或 "upgrade"
+        plan: 已有的部署计划 (可选，未提供时现场计算)
+        staged: 是否分阶段部署目录树
+
+    Returns:
+        空间足够时返回 None，否则返回错误结果字典
+    """
+    from .deploy_plan import build_deploy_plan, estimate_disk_usage
+
+    estimate = None
+    try:
+        if plan is None:
+            plan = build_deploy_plan(base_dir, platform, mode)
+        estimate = estimate_disk_usage(base_dir, plan, staged=staged)
+        required_bytes = estimate.required_bytes
+    except (OSError, ValueError):
+        required_bytes = FALLBACK_REQUIRED_DISK_MB * 1024 * 1024
+
+    enough, free_mb = check_disk_space(base_dir, required_bytes=required_bytes)
+    if enough:
+        return None
+
+    required_mb = required_bytes / (1024 * 1024)
+    result = {
+        "status": "error",
+        "message": f"磁盘空间不足（剩余 {free_mb}MB），本次部署需要 {required_mb:.1f}MB",
+        "disk_free_mb": free_mb,
+        "disk_required_mb": math.ceil(required_mb),
+        "disk_required_bytes": required_bytes,
+    }
+    if estimate is not None:
+        result["disk_estimate"] = estimate.to_dict()
+    return result
 
 
 def _init_new_project(
-    base_dir: Path, platform: str, no_git: bool, reset: bool, json_output: bool
+    base_dir: Path,
+    platform: str,
+    no_git: bool,
+    reset: bool,
+    json_output: bool,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    staged: bool = False,
 ) -> dict:
     """
     在空目录中初始化新项目
@@ -141,6 +514,8 @@ def _init_new_project(
         no_git: 是否跳过 git 初始化
         reset: 是否重置 constitution.md (首次初始化时静默忽略)
         json_output: 是否输出 JSON 格式
+        deploy_mode: 文件部署模式 (copy/auto/link)
+        staged: 是否分阶段部署目录树 (构建完成后原子替换)
 
     Returns:
         初始化结果字典
@@ -172,22 +547,23 @@ def _init_new_project(
             "部分高级特性（如知识库自动查询、文档发现）将不可用\n"
         )
 
-    # FR-047: 检查磁盘空间（部署前需 ≥ 100MB）
-    enough, free_mb = check_disk_space(base_dir, required_mb=100)
-    if not enough:
-        error_msg = f"磁盘空间不足（剩余 {free_mb}MB），需要至少 100MB"
-        if json_output:
-            return {"status": "error", "message": error_msg, "disk_free_mb": free_mb, "disk_required_mb": 100}
-        else:
-            console.print(f"[red]错误:[/red] {error_msg}")
-            return {"status": "error", "message": error_msg}
+    # FR-047: 按部署计划检查磁盘空间
+    disk_error = _check_deploy_disk_space(base_dir, platform, "new", staged=staged)
+    if disk_error is not None:
+        if not json_output:
+            console.print(f"[red]错误:[/red] {disk_error['message']}")
+        return disk_error
 
     # 初始化项目结构
     try:
-        summary = initialize_project_structure(base_dir, platform, create_backup=False)
+        summary = initialize_project_structure(
+            base_dir, platform, create_backup=False, deploy_mode=deploy_mode, staged=staged
+        )
+        write_schema_version(base_dir, get_schema_version())
 
         # 提取文件列表
-        files = [str(change.path.relative_to(base_dir)) for change in summary.changes]
+        # --json-stream 模式下每个文件已作为事件输出, 不再汇总文件列表
+        files = None if events_enabled() else summary.relative_paths(base_dir)
 
         # Git 初始化 (处理所有场景)
         git_result = _handle_git_initialization(base_dir, platform, no_git, json_output)
@@ -198,6 +574,9 @@ def _init_new_project(
             "mode": "new",
             "files": files,
             "files_created": summary.total_created,
+            "deploy_mode": deploy_mode,
+            "deploy_strategies": summary.strategies,
+            "staged": staged,
             **git_result,  # 合并 git 相关结果
             "message": f"成功初始化 ElecSpeckit 项目 (平台: {platform})",
         }
@@ -213,55 +592,14 @@ def _init_new_project(
         return {"status": "error", "message": f"初始化失败: {e}"}
 
 
-def detect_version_upgrade(base_dir: Path) -> dict:
-    """
-    检测项目是否需要版本升级 (T010)
-
-    检测 v0.1.0 项目通过以下特征文件（按优先级顺序, per A8澄清）：
-    1. .claude/commands/elecspeckit.kbconfig.md
-    2. .qwen/commands/elecspeckit.kbconfig.toml
-    3. .elecspecify/memory/knowledge-sources.json
-
-    Args:
-        base_dir: 项目根目录
-
-    Returns:
-        dict: {
-            "is_upgrade": bool,          # 是否为升级路径
-            "from_version": str | None,  # 源版本（如 "v0.1.0"）
-            "trigger_file": str | None,  # 触发升级的特征文件（相对路径）
-        }
-
-    Examples:
-        >>> result = detect_version_upgrade(Path.cwd())
-        >>> if result["is_upgrade"]:
-        ...     print(f"检测到从 {result['from_version']} 升级")
-    """
-    # 检测 v0.1.0 特征文件（按优先级顺序）
-    v010_features = [
-        base_dir / ".claude" / "commands" / "elecspeckit.kbconfig.md",
-        base_dir / ".qwen" / "commands" / "elecspeckit.kbconfig.toml",
-        base_dir / ".elecspecify" / "memory" / "knowledge-sources.json",
-    ]
-
-    for feature_file in v010_features:
-        if feature_file.exists():
-            return {
-                "is_upgrade": True,
-                "from_version": "v0.1.0",
-                "trigger_file": str(feature_file.relative_to(base_dir)),
-            }
-
-    # 未检测到任何升级特征
-    return {
-        "is_upgrade": False,
-        "from_version": None,
-        "trigger_file": None,
-    }
-
-
 def _upgrade_existing_project(
-    base_dir: Path, platform: str, no_git: bool, reset: bool, json_output: bool
+    base_dir: Path,
+    platform: str,
+    no_git: bool,
+    reset: bool,
+    json_output: bool,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    staged: bool = False,
 ) -> dict:
     """
     升级已有项目
@@ -271,6 +609,8 @@ def _upgrade_existing_project(
         no_git: 是否跳过 git 初始化
         reset: 是否重置 constitution.md
         json_output: 是否输出 JSON 格式
+        deploy_mode: 文件部署模式 (copy/auto/link)
+        staged: 是否分阶段部署目录树 (构建完成后原子替换)
 
     Returns:
         升级结果字典
@@ -326,7 +666,7 @@ def _upgrade_existing_project(
         import shutil
         from datetime import datetime
 
-        from .template_manager import TEMPLATE_ROOT
+        from .template_bundle import TEMPLATE_ROOT, read_template_text, template_exists
 
         constitution_file = base_dir / ".elecspecify" / "memory" / "constitution.md"
 
@@ -339,14 +679,14 @@ def _upgrade_existing_project(
 
                 # 读取模板内容
                 template_file = TEMPLATE_ROOT / "elecspecify" / "constitution-template.md"
-                if not template_file.exists():
+                if not template_exists(template_file):
                     error_msg = f"错误: 模板文件不存在: {template_file}"
                     if json_output:
                         reset_result = {"success": False, "error": error_msg}
                     else:
                         console.print(f"[red]{error_msg}[/red]")
                 else:
-                    template_content = template_file.read_text(encoding="utf-8")
+                    template_content = read_template_text(template_file)
 
                     # 创建带时间戳的备份 (格式: YYYYMMDD-HHMMSS, per spec.md FR-021)
                     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -414,22 +754,25 @@ def _upgrade_existing_project(
                 console.print("[dim]constitution.md 不存在，跳过重置[/dim]\n")
             reset_result = {"success": False, "skipped": True, "reason": "constitution.md 不存在"}
 
-    # FR-047: 检查磁盘空间（升级前需 ≥ 100MB）
-    enough, free_mb = check_disk_space(base_dir, required_mb=100)
-    if not enough:
-        error_msg = f"磁盘空间不足（剩余 {free_mb}MB），需要至少 100MB"
-        if json_output:
-            return {"status": "error", "message": error_msg, "disk_free_mb": free_mb, "disk_required_mb": 100}
-        else:
-            console.print(f"[red]错误:[/red] {error_msg}")
-            return {"status": "error", "message": error_msg}
+    # FR-047: 按升级计划检查磁盘空间（含去重后的备份）
+    disk_error = _check_deploy_disk_space(base_dir, platform, "upgrade", staged=staged)
+    if disk_error is not None:
+        if not json_output:
+            console.print(f"[red]错误:[/red] {disk_error['message']}")
+        return disk_error
 
     try:
+        # 执行尚未执行的结构迁移 (按项目记录的结构版本，最新的项目无需任何探测)
+        migration_report = run_migrations(base_dir)
+
         # 升级项目结构 (使用 create_backup=True 保护用户内容)
-        summary = initialize_project_structure(base_dir, platform, create_backup=True)
+        summary = initialize_project_structure(
+            base_dir, platform, create_backup=True, deploy_mode=deploy_mode, staged=staged
+        )
 
         # 提取文件列表
-        files = [str(change.path.relative_to(base_dir)) for change in summary.changes]
+        # --json-stream 模式下每个文件已作为事件输出, 不再汇总文件列表
+        files = None if events_enabled() else summary.relative_paths(base_dir)
 
         # Git 初始化 (处理所有场景)
         git_result = _handle_git_initialization(base_dir, platform, no_git, json_output)
@@ -442,6 +785,12 @@ def _upgrade_existing_project(
             "files_updated": summary.total_updated,
             "files_backed_up": summary.total_backed_up,
             "files_skipped": summary.total_skipped,
+            "merge_conflicts": summary.conflict_paths(base_dir),
+            "deploy_mode": deploy_mode,
+            "deploy_strategies": summary.strategies,
+            "staged": staged,
+            "schema_version": migration_report.to_version,
+            "migrations": migration_report.applied,
             "reset_constitution": reset,
             **git_result,  # 合并 git 相关结果
             "message": f"成功升级 ElecSpeckit 项目 (平台: {platform})",
@@ -474,6 +823,7 @@ def _handle_git_initialization(
     """
     # 场景 1: 用户使用 --no-git 标志
     if no_git:
+        emit_event("git", step="skip", reason="user_flag")
         if not json_output:
             console.print("[dim]Git 初始化已跳过 (--no-git 标志)[/dim]")
 
@@ -486,6 +836,7 @@ def _handle_git_initialization(
 
     # 场景 2: git 不可用
     if not is_git_available():
+        emit_event("git", step="skip", reason="git_not_available")
         if not json_output:
             console.print(
                 "[yellow]Git 未找到，已跳过仓库初始化。[/yellow]\n"
@@ -501,6 +852,7 @@ def _handle_git_initialization(
 
     # 场景 3: 已有 git 仓库
     if is_git_repo(base_dir):
+        emit_event("git", step="skip", reason="existing_repo")
         if not json_output:
             console.print("[dim]检测到现有 git 仓库，已跳过 git 初始化[/dim]")
 
@@ -594,6 +946,17 @@ def _print_init_result(result: dict) -> None:
             if "files_skipped" in result:
                 console.print(f"  跳过文件: {result['files_skipped']} 个")
 
+        for step in result.get("migrations") or []:
+            console.print(f"  结构迁移: {step['description']} ({len(step['files'])} 个文件)")
+
+        if result.get("merge_conflicts"):
+            console.print(
+                f"[yellow]⚠ {len(result['merge_conflicts'])} 个文件的用户修改与模板更新冲突,"
+                "已写入冲突标记 (<<<<<<< / >>>>>>>)，请手动解决:[/yellow]"
+            )
+            for path in result["merge_conflicts"]:
+                console.print(f"  • [cyan]{path}[/cyan]")
+
         if "git_message" in result and result["git_message"]:
             git_status_color = "green" if result.get("git_initialized") else "yellow"
             console.print(
@@ -658,7 +1021,9 @@ def _print_init_result(result: dict) -> None:
         elif mode == "upgrade":
             console.print("\n[bold]使用说明:[/bold]")
             console.print("  1. 检查更新后的模板文件")
-            console.print("  2. 如有备份,对比差异: [cyan].elecspecify/**/*.bak.*[/cyan]")
+            console.print(
+                "  2. 如有备份,查看快照清单: [cyan].elecspecify/backup/snapshots/[/cyan]"
+            )
             console.print("  3. 继续使用 ElecSpeckit 工作流")
 
     elif status == "cancelled":
@@ -668,6 +1033,243 @@ def _print_init_result(result: dict) -> None:
         console.print(f"[red]错误: {result.get('message', '未知错误')}[/red]")
 
 
+@app.command(name="apply")
+def apply_command(
+    plan_file: Path = typer.Argument(..., help="elecspeckit init --plan 生成的计划文件"),
+    no_git: bool = typer.Option(False, "--no-git", help="跳过 git 仓库初始化 (新项目)"),
+    json_output: bool = typer.Option(False, "--json", help="以 JSON 格式输出结果"),
+    deploy_mode: str = typer.Option(
+        DEPLOY_MODE_COPY,
+        "--deploy-mode",
+        help=(
+            "文件部署模式: copy (逐字节复制) 或 auto (依次尝试 reflink/copy_file_range/硬链接缓存); "
+            "计划按文件列出操作, 不支持 link"
+        ),
+    ),
+) -> None:
+    """
+    执行部署计划
+
+    严格按 init --plan 生成的操作列表执行。若计划生成后有文件被修改或模板版本
+    发生变化, 不执行任何操作并列出冲突文件, 需重新生成计划。
+    """
+    result = _apply_plan(
+        base_dir=Path.cwd(),
+        plan_file=plan_file,
+        no_git=no_git,
+        json_output=json_output,
+        deploy_mode=deploy_mode,
+    )
+
+    if json_output:
+        typer.echo(json_module.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        _print_init_result(result)
+        for conflict in result.get("conflicts", []):
+            console.print(f"  [yellow]![/yellow] {conflict}")
+
+    if result.get("status") == "error":
+        raise typer.Exit(code=1)
+
+
+def _apply_plan(
+    base_dir: Path,
+    plan_file: Path,
+    no_git: bool,
+    json_output: bool,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+) -> dict:
+    """
+    执行部署计划的核心逻辑
+
+    Args:
+        base_dir: 项目根目录
+        plan_file: 计划文件路径
+        no_git: 是否跳过 git 初始化
+        json_output: 是否输出 JSON 格式
+        deploy_mode: 文件部署模式 (copy/auto)
+
+    Returns:
+        执行结果字典
+    """
+    from .deploy_plan import DeployPlan, PlanConflictError, apply_deploy_plan
+
+    if deploy_mode == DEPLOY_MODE_LINK:
+        return {
+            "status": "error",
+            "message": "apply 不支持 link 部署模式: 计划按文件列出操作, 请使用 init --deploy-mode link",
+        }
+    if deploy_mode not in DEPLOY_MODES:
+        return {
+            "status": "error",
+            "message": f"无效的部署模式: {deploy_mode}, 仅支持 copy 或 auto",
+        }
+
+    try:
+        plan = DeployPlan.load(plan_file)
+    except FileNotFoundError:
+        return {"status": "error", "message": f"计划文件不存在: {plan_file}"}
+    except ValueError as e:
+        return {"status": "error", "message": f"无法读取部署计划: {e}"}
+
+    if plan.mode == "upgrade" and not is_elecspeckit_project(base_dir):
+        return {"status": "error", "message": "升级计划只能在已有的 ElecSpeckit 项目中执行"}
+
+    # FR-047: 按计划检查磁盘空间
+    disk_error = _check_deploy_disk_space(base_dir, plan.platform, plan.mode, plan)
+    if disk_error is not None:
+        return disk_error
+
+    try:
+        summary = apply_deploy_plan(base_dir, plan, deploy_mode=deploy_mode)
+        # 过期的计划不做任何修改，因此结构迁移在计划执行成功后进行
+        migration_report = run_migrations(base_dir) if plan.mode == "upgrade" else None
+        if migration_report is None:
+            write_schema_version(base_dir, get_schema_version())
+    except PlanConflictError as e:
+        return {
+            "status": "error",
+            "error_type": "plan_conflict",
+            "message": f"{e}，请重新运行 elecspeckit init --plan",
+            "conflicts": e.conflicts,
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"执行部署计划失败: {e}"}
+
+    files = summary.relative_paths(base_dir)
+    result = {
+        "status": "success",
+        "platform": plan.platform,
+        "mode": plan.mode,
+        "files": files,
+        "files_created": summary.total_created,
+        "files_updated": summary.total_updated,
+        "files_backed_up": summary.total_backed_up,
+        "files_skipped": summary.total_skipped,
+        "merge_conflicts": summary.conflict_paths(base_dir),
+        "deploy_mode": deploy_mode,
+        "deploy_strategies": summary.strategies,
+        "message": f"已执行部署计划 (平台: {plan.platform})",
+    }
+    if migration_report is not None:
+        result["schema_version"] = migration_report.to_version
+        result["migrations"] = migration_report.applied
+
+    if plan.mode == "new":
+        result.update(_handle_git_initialization(base_dir, plan.platform, no_git, json_output))
+
+    return result
+
+
+@app.command(name="sync")
+def sync_command(
+    projects: List[Path] = typer.Argument(..., help="接收模板的项目目录 (可指定多个)"),
+    watch: bool = typer.Option(
+        False, "--watch", "-w", help="持续监听模板目录, 模板保存后立即推送 (Ctrl+C 退出)"
+    ),
+    poll: bool = typer.Option(False, "--poll", help="使用轮询代替 inotify 监听"),
+    json_output: bool = typer.Option(
+        False, "--json", help="以 NDJSON 输出: 每个同步的文件一行, 最后一行为结果"
+    ),
+) -> None:
+    """
+    将包内模板的改动同步到测试项目 (模板开发用)
+
+    只推送内容有变化的命令模板、scripts 和 Skills 文件, 映射规则与 init 相同;
+    constitution、文档模板、skill_config.json 和被修改过的文件不会被覆盖。
+    需要在源码树或可编辑安装 (pip install -e .) 中运行。
+    """
+    result = _sync_projects(project_dirs=projects, watch=watch, poll=poll, json_output=json_output)
+
+    if json_output:
+        print(json_module.dumps({"event": "result", **result}, ensure_ascii=False), flush=True)
+    elif result.get("status") == "error":
+        console.print(f"[red]错误: {result.get('message', '未知错误')}[/red]")
+    else:
+        console.print(f"\n[green]✓[/green] 已同步 {result['files_synced']} 个文件")
+
+    if result.get("status") == "error":
+        raise typer.Exit(code=1)
+
+
+def _sync_projects(
+    project_dirs: List[Path], watch: bool, poll: bool, json_output: bool
+) -> dict:
+    """
+    同步模板的核心逻辑
+
+    Args:
+        project_dirs: 目标项目目录
+        watch: 是否持续监听
+        poll: 是否强制使用轮询
+        json_output: 是否以 NDJSON 输出每个变更
+
+    Returns:
+        同步结果字典
+    """
+    from .template_bundle import TEMPLATE_ROOT
+    from .template_sync import (
+        iter_template_files,
+        open_sync_project,
+        sync_templates,
+        watch_templates,
+    )
+
+    if not TEMPLATE_ROOT.is_dir():
+        return {
+            "status": "error",
+            "message": f"模板目录不存在: {TEMPLATE_ROOT}，sync 需要源码树或可编辑安装",
+        }
+
+    projects = []
+    for project_dir in project_dirs:
+        if not is_elecspeckit_project(project_dir):
+            return {"status": "error", "message": f"不是 ElecSpeckit 项目: {project_dir}"}
+        try:
+            projects.append(open_sync_project(project_dir))
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+    synced = 0
+
+    def report(project, change) -> None:
+        nonlocal synced
+        if change.change_type != "skipped":
+            synced += 1
+        path = change.path.relative_to(project.base_dir).as_posix()
+        if json_output:
+            event = {
+                "event": "file",
+                "project": str(project.base_dir),
+                "path": path,
+                "change": change.change_type,
+                "message": change.message,
+            }
+            print(json_module.dumps(event, ensure_ascii=False), flush=True)
+        elif change.change_type == "skipped":
+            console.print(f"  [yellow]-[/yellow] {project.base_dir.name}: {path} ({change.message})")
+        else:
+            console.print(f"  [green]✓[/green] {project.base_dir.name}: {path}")
+
+    try:
+        if watch:
+            if not json_output:
+                console.print(f"[dim]正在监听 {TEMPLATE_ROOT} (Ctrl+C 退出)[/dim]")
+            watch_templates(projects, report, use_polling=poll)
+        else:
+            sync_templates(projects, iter_template_files(), report)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        return {"status": "error", "message": f"同步失败: {e}", "files_synced": synced}
+
+    return {
+        "status": "success",
+        "projects": [str(project.base_dir) for project in projects],
+        "files_synced": synced,
+    }
+
+
 @app.command(name="check")
 def check_command(
     json_output: bool = typer.Option(False, "--json", help="以 JSON 格式输出结果")
@@ -831,6 +1433,101 @@ def _print_check_json(result: dict) -> None:
     console.print(json_module.dumps(output, indent=2, ensure_ascii=False))
 
 
+@backup_app.command(name="gc")
+def backup_gc_command(
+    keep_last: Optional[int] = typer.Option(
+        None, "--keep-last", min=0, help="每个备份系列保留最近的 N 份"
+    ),
+    keep_within: Optional[str] = typer.Option(
+        None, "--keep-within", help="保留指定时长内的备份 (如 90m, 12h, 30d, 2w)"
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="只列出将被删除的备份,不实际删除"),
+    json_output: bool = typer.Option(False, "--json", help="以 JSON 格式输出结果"),
+) -> None:
+    """
+    按保留策略回收项目备份
+
+    清理范围包括升级快照 (.elecspecify/backup/snapshots/)、不再被引用的备份对象、
+    旧版本生成的 *.bak.<时间戳> 文件和 .elecspecify/backup/ 下的旧式备份目录。
+    同一原文件的备份为一个系列,满足任一保留策略的备份都会被保留。
+    """
+    result = _gc_backups(
+        base_dir=Path.cwd(), keep_last=keep_last, keep_within=keep_within, dry_run=dry_run
+    )
+
+    if json_output:
+        typer.echo(json_module.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        _print_gc_result(result)
+
+    if result.get("status") == "error":
+        raise typer.Exit(code=1)
+
+
+def _gc_backups(
+    base_dir: Path,
+    keep_last: Optional[int] = None,
+    keep_within: Optional[str] = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    回收备份的核心逻辑
+
+    Args:
+        base_dir: 项目根目录
+        keep_last: 每个备份系列保留最近的 N 份
+        keep_within: 保留时长字符串 (如 "30d")
+        dry_run: 只计算不删除
+
+    Returns:
+        回收结果字典
+    """
+    from .backup_store import gc_backups, parse_retention_duration
+
+    if keep_last is None and keep_within is None:
+        return {"status": "error", "message": "请至少指定一种保留策略: --keep-last 或 --keep-within"}
+
+    if not is_elecspeckit_project(base_dir):
+        return {"status": "error", "message": "当前目录不是 ElecSpeckit 项目"}
+
+    try:
+        duration = parse_retention_duration(keep_within) if keep_within is not None else None
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        report = gc_backups(base_dir, keep_last=keep_last, keep_within=duration, dry_run=dry_run)
+    except OSError as e:
+        return {"status": "error", "message": f"回收备份失败: {e}"}
+
+    return {"status": "success", **report.to_dict(base_dir)}
+
+
+def _print_gc_result(result: dict) -> None:
+    """
+    以人类可读格式输出备份回收结果
+
+    Args:
+        result: _gc_backups() 返回的结果
+    """
+    if result.get("status") == "error":
+        console.print(f"[red]错误: {result.get('message', '未知错误')}[/red]")
+        return
+
+    action = "将删除" if result["dry_run"] else "已删除"
+    for path in result["deleted"]:
+        console.print(f"  [dim]{action}[/dim] {path}")
+
+    reclaimed_mb = result["reclaimed_bytes"] / (1024 * 1024)
+    console.print(
+        f"\n[green]✓[/green] {action} {result['backups_deleted']} 份备份、"
+        f"{result['objects_deleted']} 个备份对象, 释放 {reclaimed_mb:.2f} MB"
+        f" (保留 {result['backups_kept']} 份)"
+    )
+    if result["dry_run"]:
+        console.print("[dim]使用不带 --dry-run 的命令执行实际删除[/dim]")
+
+
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
@@ -844,7 +1541,10 @@ def main(
 
     可用命令:
     - init: 初始化 ElecSpeckit 项目结构
+    - apply: 执行 init --plan 生成的部署计划
     - check: 检查工具可用性
+    - sync: 将模板改动同步到测试项目 (模板开发用)
+    - backup gc: 按保留策略回收升级备份
     """
     if version:
         from elecspeckit_init import __version__
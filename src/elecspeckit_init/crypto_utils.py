@@ -19,7 +19,11 @@
 import platform
 import base64
 import json
-from typing import Optional
+from pathlib import Path
+from typing import Dict, Optional
+
+from .secret_cache import get_keyring, get_secret_resolver
+from .skill_config_store import get_generation, skill_config_lock, write_skill_config
 
 # 检测操作系统
 _system = platform.system()
@@ -79,6 +83,40 @@ def decrypt_api_key(skill_name: str, encrypted_key: str) -> str:
         raise RuntimeError(f"不支持的操作系统: {_system}")
 
 
+def decrypt_api_keys(encrypted_keys: Dict[str, str]) -> Dict[str, str]:
+    """
+    批量解密多个 Skill 的 API 密钥
+
+    存储在 keyring/Keychain 中的密钥在一次批量读取中取得并按 TTL 缓存在进程内
+    (见 secret_cache)，而不是每个 Skill 单独查询一次。
+
+    Args:
+        encrypted_keys: {Skill 名称: 加密后的 API 密钥}
+
+    Returns:
+        {Skill 名称: 明文 API 密钥}
+
+    Raises:
+        RuntimeError: 如果平台不支持或解密失败
+    """
+    stored = [
+        skill_name
+        for skill_name, encrypted_key in encrypted_keys.items()
+        if _system in ("Linux", "Darwin") and encrypted_key
+    ]
+    secrets = get_secret_resolver().get_many(stored) if stored else {}
+
+    result = {}
+    for skill_name, encrypted_key in encrypted_keys.items():
+        if skill_name in secrets:
+            if secrets[skill_name] is None:
+                raise RuntimeError(f"未找到 Skill '{skill_name}' 的 API 密钥")
+            result[skill_name] = secrets[skill_name]
+        else:
+            result[skill_name] = decrypt_api_key(skill_name, encrypted_key)
+    return result
+
+
 # ============================================================================
 # Windows 实现 (DPAPI)
 # ============================================================================
@@ -146,16 +184,12 @@ def _decrypt_windows(skill_name: str, encrypted_key: str) -> str:
 
 def _encrypt_macos(skill_name: str, api_key: str) -> str:
     """使用 macOS Keychain 存储 API 密钥"""
-    try:
-        import keyring
-    except ImportError:
-        raise RuntimeError(
-            "macOS Keychain 加密需要 keyring 库，请运行: uv pip install keyring"
-        )
+    keyring = get_keyring()
 
     try:
         # 存储到 Keychain（服务名：ElecSpeckit，账户名：skill_name）
         keyring.set_password("ElecSpeckit", skill_name, api_key)
+        get_secret_resolver().invalidate([skill_name])
 
         # 返回标记（表示已存储到 Keychain）
         marker = {
@@ -171,15 +205,8 @@ def _encrypt_macos(skill_name: str, api_key: str) -> str:
 def _decrypt_macos(skill_name: str, encrypted_key: str) -> str:
     """从 macOS Keychain 读取 API 密钥"""
     try:
-        import keyring
-    except ImportError:
-        raise RuntimeError(
-            "macOS Keychain 解密需要 keyring 库，请运行: uv pip install keyring"
-        )
-
-    try:
-        # 从 Keychain 读取（服务名：ElecSpeckit，账户名：skill_name）
-        api_key = keyring.get_password("ElecSpeckit", skill_name)
+        # 从 Keychain 读取（服务名：ElecSpeckit，账户名：skill_name），经由密钥缓存
+        api_key = get_secret_resolver().get(skill_name)
 
         if api_key is None:
             raise RuntimeError(f"未找到 Skill '{skill_name}' 的 API 密钥")
@@ -195,17 +222,12 @@ def _decrypt_macos(skill_name: str, encrypted_key: str) -> str:
 
 def _encrypt_linux(skill_name: str, api_key: str) -> str:
     """使用 Linux keyring (libsecret) 存储 API 密钥"""
-    try:
-        import keyring
-    except ImportError:
-        raise RuntimeError(
-            "Linux keyring 加密需要 keyring 库，请运行: uv pip install keyring\n"
-            "并确保已安装 libsecret: sudo apt install libsecret-1-0 (Ubuntu/Debian)"
-        )
+    keyring = get_keyring()
 
     try:
         # 存储到 keyring（服务名：ElecSpeckit，账户名：skill_name）
         keyring.set_password("ElecSpeckit", skill_name, api_key)
+        get_secret_resolver().invalidate([skill_name])
 
         # 返回标记（表示已存储到 keyring）
         marker = {
@@ -221,16 +243,8 @@ def _encrypt_linux(skill_name: str, api_key: str) -> str:
 def _decrypt_linux(skill_name: str, encrypted_key: str) -> str:
     """从 Linux keyring (libsecret) 读取 API 密钥"""
     try:
-        import keyring
-    except ImportError:
-        raise RuntimeError(
-            "Linux keyring 解密需要 keyring 库，请运行: uv pip install keyring\n"
-            "并确保已安装 libsecret: sudo apt install libsecret-1-0 (Ubuntu/Debian)"
-        )
-
-    try:
-        # 从 keyring 读取（服务名：ElecSpeckit，账户名：skill_name）
-        api_key = keyring.get_password("ElecSpeckit", skill_name)
+        # 从 keyring 读取（服务名：ElecSpeckit，账户名：skill_name），经由密钥缓存
+        api_key = get_secret_resolver().get(skill_name)
 
         if api_key is None:
             raise RuntimeError(f"未找到 Skill '{skill_name}' 的 API 密钥")
@@ -297,6 +311,15 @@ def migrate_plaintext_to_encrypted(skill_config_path: str) -> int:
     if not os.path.exists(skill_config_path):
         raise FileNotFoundError(f"配置文件不存在: {skill_config_path}")
 
+    # 读取、加密和写回期间持有配置锁
+    with skill_config_lock(Path(skill_config_path)):
+        migrated_count = _encrypt_plaintext_keys(skill_config_path)
+
+    return migrated_count
+
+
+def _encrypt_plaintext_keys(skill_config_path: str) -> int:
+    """加密配置中的明文 API 密钥并写回（调用方持有配置锁）"""
     # 读取配置文件
     with open(skill_config_path, 'r', encoding='utf-8') as f:
         config = json.load(f)
@@ -330,9 +353,8 @@ def migrate_plaintext_to_encrypted(skill_config_path: str) -> int:
         import shutil
         shutil.copy(skill_config_path, backup_path)
 
-        # 写入加密后的配置
-        with open(skill_config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        # 写入加密后的配置（写入计数加一）
+        write_skill_config(Path(skill_config_path), config, get_generation(config))
 
         print(f"已迁移 {migrated_count} 个 API 密钥到加密存储")
         print(f"原配置已备份到: {backup_path}")
@@ -0,0 +1,116 @@
+"""
+延迟部署的 Skills
+
+skill_config.json 中已禁用 (enabled: false) 且尚未部署到项目中的 Skill
+不再在 init/升级时复制到 .claude/skills/，只在 .elecspecify/state/deferred_skills.json
+中记录其模板位置 (模板目录或模板归档) 和文件清单 (相对路径、大小、SHA-256)。
+skillconfig_enable.py 启用该 Skill 时按记录从包内模板复制文件并校验内容。
+
+已经部署过的 Skill (目录已存在) 无论是否禁用都照常升级，避免留下过期文件。
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List
+
+from .deploy_state import STATE_DIR
+from .template_bundle import get_template_bundle
+from .template_manifest import TemplateManifest
+
+# 延迟部署记录文件名（位于 .elecspecify/state/）
+DEFERRED_SKILLS_FILENAME = "deferred_skills.json"
+
+# 延迟部署记录格式版本
+DEFERRED_SKILLS_FORMAT_VERSION = 1
+
+# Skills 模板目录（相对模板根目录）
+SKILLS_TEMPLATE_PREFIX = "elecspecify/skills"
+
+
+def get_deferred_record_path(base_dir: Path) -> Path:
+    """获取延迟部署记录文件路径"""
+    return base_dir / STATE_DIR / DEFERRED_SKILLS_FILENAME
+
+
+def select_deferred_skills(
+    base_dir: Path, skills_dir: Path, skill_names: Iterable[str]
+) -> List[str]:
+    """
+    选出本次部署应延迟的 Skills
+
+    只有在 skill_config.json 中显式禁用、且目标目录中尚不存在的 Skill 才延迟部署；
+    配置文件不存在或无法解析时不延迟任何 Skill。
+
+    Args:
+        base_dir: 项目根目录
+        skills_dir: Skills 目标目录（相对 base_dir 或绝对路径，如 .claude/skills）
+        skill_names: 模板中的全部 Skill 名称
+
+    Returns:
+        排序后的延迟部署 Skill 名称列表
+    """
+    config_file = base_dir / ".elecspecify" / "memory" / "skill_config.json"
+    try:
+        config = json.loads(config_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+    disabled = set()
+    for skills in config.get("skills", {}).values():
+        if not isinstance(skills, dict):
+            continue
+        for skill_name, skill_config in skills.items():
+            if isinstance(skill_config, dict) and skill_config.get("enabled") is False:
+                disabled.add(skill_name)
+
+    skills_dir = base_dir / skills_dir
+    return sorted(
+        skill_name
+        for skill_name in skill_names
+        if skill_name in disabled and not (skills_dir / skill_name).exists()
+    )
+
+
+def write_deferred_record(
+    base_dir: Path, deferred_skills: Iterable[str], manifest: TemplateManifest
+) -> None:
+    """
+    写入延迟部署记录（没有延迟的 Skill 时删除记录文件）
+
+    Args:
+        base_dir: 项目根目录
+        deferred_skills: 延迟部署的 Skill 名称
+        manifest: 模板清单（提供模板根目录和文件清单）
+    """
+    record_path = get_deferred_record_path(base_dir)
+    deferred_skills = sorted(deferred_skills)
+
+    if not deferred_skills:
+        record_path.unlink(missing_ok=True)
+        return
+
+    skills = {}
+    for skill_name in deferred_skills:
+        prefix = f"{SKILLS_TEMPLATE_PREFIX}/{skill_name}"
+        files = {
+            entry.path[len(prefix) + 1 :]: {"size": entry.size, "sha256": entry.sha256}
+            for entry in sorted(manifest.iter_prefix(prefix), key=lambda e: e.path)
+        }
+        skills[skill_name] = {"files": files}
+
+    record = {
+        "format": DEFERRED_SKILLS_FORMAT_VERSION,
+        "template_root": str(manifest.root / SKILLS_TEMPLATE_PREFIX),
+        "skills": skills,
+    }
+
+    bundle = get_template_bundle()
+    if bundle is not None:
+        # 模板以归档分发时，从归档中读取 <bundle_prefix>/<Skill>/<文件>
+        record["bundle"] = str(bundle.path)
+        record["bundle_prefix"] = SKILLS_TEMPLATE_PREFIX
+
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = record_path.with_name(record_path.name + ".tmp")
+    temp_path.write_text(json.dumps(record, indent=2, ensure_ascii=False), encoding="utf-8")
+    temp_path.replace(record_path)
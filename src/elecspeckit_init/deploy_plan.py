@@ -0,0 +1,765 @@
+"""
+部署计划模块
+
+将 init/升级拆分为 "计划" 和 "执行" 两步:
+
+- build_deploy_plan() 只根据模板清单 (大小/SHA-256)、目标文件的 stat 元数据和
+  部署状态计算完整的操作列表 (create / update / merge / skip，含字节数和是否备份)，
+  不写入磁盘；仅在缺少部署记录且大小相同、无法仅凭元数据判断时才计算目标文件哈希。
+- apply_deploy_plan() 先校验计划的前提 (目标文件自计划后未变化、模板内容与计划一致、
+  所有路径都在项目目录内)，全部通过后严格按计划执行。
+
+计划以 JSON 保存，便于在 CI 中批量审阅升级内容后再执行。
+"""
+
+import json
+import os
+import stat
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from typing import Dict, List, Optional, Set
+
+from .backup_store import BackupStore
+from .deferred_skills import select_deferred_skills, write_deferred_record
+from .deploy_state import DeployState
+from .fast_copy import DEPLOY_MODE_COPY, DEPLOY_MODE_LINK
+from .fs_utils import ChangeSummary, FileChange, file_matches_digest
+from .migrations import run_migrations
+from .platform_utils import get_allocation_block_size
+from .skills_cache import is_link
+from .staged_deploy import STAGED_TREE_DIRS
+from .template_bundle import copy_template_file, read_template_text
+from .template_manager import (
+    AGENT_CONFIG,
+    COMMAND_BASENAMES,
+    DOC_TEMPLATE_FILES,
+    REQUIRED_SKILLS,
+    TEMPLATE_ROOT,
+    _generate_placeholder_content,
+    _is_blank_file,
+    _record_skill_config,
+    _set_skill_config_permissions,
+    _store_template_base,
+    _upgrade_skill_config,
+    _write_template_file,
+    get_template_manifest,
+    verify_skills_source_integrity,
+)
+
+# 计划文件格式版本
+PLAN_FORMAT_VERSION = 1
+
+# 估算磁盘空间时每个写入文件的元数据开销（部署状态记录、快照清单条目）
+METADATA_BYTES_PER_FILE = 256
+
+# 操作类型
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_MERGE = "merge"
+ACTION_SKIP = "skip"
+
+# 写入方式
+METHOD_COPY = "copy"  # 按部署模式复制模板文件 (目录树)
+METHOD_TEXT = "text"  # 以文本方式写入模板内容 (命令模板、文档模板)
+METHOD_PLACEHOLDER = "placeholder"  # 写入生成的占位符内容
+METHOD_MERGE = "merge"  # 合并 skill_config.json
+METHOD_MERGE_TEXT = "merge_text"  # 三方合并用户修改过的命令模板
+
+
+class PlanConflictError(ValueError):
+    """计划的前提已不成立（目标文件或模板在计划后发生变化）"""
+
+    def __init__(self, conflicts: List[str]):
+        self.conflicts = conflicts
+        super().__init__(f"部署计划已过期，{len(conflicts)} 个文件在计划后发生变化")
+
+
+@dataclass
+class PlanAction:
+    """计划中的单个文件操作"""
+
+    action: str  # create / update / merge / skip
+    path: str  # 相对项目根目录的 POSIX 路径
+    method: str = METHOD_COPY
+    source: Optional[str] = None  # 相对模板根目录的 POSIX 路径
+    sha256: Optional[str] = None  # 将写入内容的 SHA-256
+    bytes: int = 0  # 将写入的字节数
+    backup: bool = False  # 覆盖前是否备份
+    backup_bytes: int = 0  # 将备份的字节数
+    backup_sha256: Optional[str] = None  # 被备份内容的 SHA-256 (由部署记录得知时，用于估算备份去重)
+    expect_size: Optional[int] = None  # 计划时目标文件的大小 (不存在时为 None)
+    expect_mtime_ns: Optional[int] = None  # 计划时目标文件的修改时间
+    reason: str = ""
+    verify: bool = False  # 跳过的文件在执行时是否校验内容并补记部署状态
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PlanAction":
+        """
+        从字典恢复操作
+
+        Raises:
+            ValueError: 路径不是项目内的相对路径
+        """
+        action = cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+        _check_relative_path(action.path, "路径")
+        if action.source is not None:
+            _check_relative_path(action.source, "模板路径")
+        return action
+
+
+def _check_relative_path(path: str, label: str) -> None:
+    """
+    确认计划中的路径是不含 ".." 的相对 POSIX 路径
+
+    Raises:
+        ValueError: 路径为空、为绝对路径 (含 Windows 盘符) 或包含 ".."
+    """
+    if not isinstance(path, str) or not path:
+        raise ValueError(f"部署计划中的{label}无效: {path!r}")
+    if PurePosixPath(path).is_absolute() or PureWindowsPath(path).anchor:
+        raise ValueError(f"部署计划中的{label}不能是绝对路径: {path}")
+    if ".." in PureWindowsPath(path).parts:
+        raise ValueError(f"部署计划中的{label}不能包含 \"..\": {path}")
+
+
+@dataclass
+class DeployPlan:
+    """完整的部署计划"""
+
+    mode: str  # "new" 或 "upgrade"
+    platform: str
+    actions: List[PlanAction] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    version: str = ""
+    deferred_skills: List[str] = field(default_factory=list)  # 已禁用、延迟部署的 Skills
+    migrations: List[dict] = field(default_factory=list)  # 待执行的结构迁移步骤 (见 migrations)
+
+    @property
+    def summary(self) -> Dict[str, int]:
+        """按操作类型统计文件数和字节数"""
+        counts = {ACTION_CREATE: 0, ACTION_UPDATE: 0, ACTION_MERGE: 0, ACTION_SKIP: 0}
+        bytes_written = 0
+        bytes_backed_up = 0
+        backups = 0
+
+        for action in self.actions:
+            counts[action.action] += 1
+            if action.action != ACTION_SKIP:
+                bytes_written += action.bytes
+            if action.backup:
+                backups += 1
+                bytes_backed_up += action.backup_bytes
+
+        return {
+            **counts,
+            "backup": backups,
+            "bytes_written": bytes_written,
+            "bytes_backed_up": bytes_backed_up,
+        }
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典"""
+        return {
+            "format": PLAN_FORMAT_VERSION,
+            "version": self.version,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "mode": self.mode,
+            "platform": self.platform,
+            "summary": self.summary,
+            "warnings": self.warnings,
+            "deferred_skills": self.deferred_skills,
+            "migrations": self.migrations,
+            "actions": [asdict(action) for action in self.actions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeployPlan":
+        """
+        从字典恢复计划
+
+        Raises:
+            ValueError: 格式版本不支持或内容无效
+        """
+        if data.get("format") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"不支持的部署计划格式: {data.get('format')}")
+        if data.get("platform") not in AGENT_CONFIG:
+            raise ValueError(f"部署计划中的平台无效: {data.get('platform')}")
+
+        try:
+            actions = [PlanAction.from_dict(item) for item in data.get("actions", [])]
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"部署计划内容无效: {e}") from e
+
+        return cls(
+            mode=data.get("mode", "upgrade"),
+            platform=data["platform"],
+            actions=actions,
+            warnings=list(data.get("warnings", [])),
+            version=data.get("version", ""),
+            deferred_skills=list(data.get("deferred_skills", [])),
+            migrations=list(data.get("migrations", [])),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "DeployPlan":
+        """从 JSON 文件读取计划"""
+        return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def build_deploy_plan(base_dir: Path, platform: str, mode: str) -> DeployPlan:
+    """
+    计算部署计划（不写入磁盘）
+
+    覆盖规则与 initialize_project_structure 一致:
+    - constitution.md 和文档模板只在不存在或为空时写入
+    - skill_config.json 升级时合并，首次初始化时复制模板
+    - scripts/ 和 Skills 目录树只更新模板已变化且用户未修改的文件
+    - 已禁用且尚未部署的 Skills 不复制，只记录为延迟部署
+    - 命令模板更新到最新内容，用户修改过的文件三方合并
+    - 升级时列出待执行的结构迁移步骤 (执行计划后进行)
+
+    Args:
+        base_dir: 项目根目录
+        platform: Agent 平台 ("claude" 或 "qwen")
+        mode: "new" (首次初始化) 或 "upgrade" (升级，覆盖前备份)
+
+    Returns:
+        DeployPlan 对象
+
+    Raises:
+        ValueError: 不支持的平台
+    """
+    if platform not in AGENT_CONFIG:
+        raise ValueError(f"不支持的平台: {platform}")
+
+    planner = _Planner(base_dir, create_backup=(mode == "upgrade"))
+    plan = DeployPlan(mode=mode, platform=platform)
+    if mode == "upgrade":
+        plan.migrations = run_migrations(base_dir, dry_run=True).applied
+
+    elecspecify_dir = Path(".elecspecify")
+    memory_dir = elecspecify_dir / "memory"
+
+    # 1. .elecspecify/ 基础结构
+    planner.plan_if_blank("elecspecify/constitution-template.md", memory_dir / "constitution.md")
+    planner.plan_skill_config(
+        "elecspecify/skill_config_template.json", memory_dir / "skill_config.json"
+    )
+    for template_file in DOC_TEMPLATE_FILES:
+        planner.plan_if_blank(
+            f"elecspecify/{template_file}", elecspecify_dir / "templates" / template_file
+        )
+    planner.plan_tree("elecspecify/scripts", elecspecify_dir / "scripts")
+
+    # 2. Agent 平台 Skills 与命令模板
+    config = AGENT_CONFIG[platform]
+    platform_dir = Path(config["dir_name"])
+
+    if platform == "claude":
+        is_complete, missing_skills = verify_skills_source_integrity()
+        if is_complete:
+            plan.deferred_skills = select_deferred_skills(
+                base_dir, platform_dir / "skills", REQUIRED_SKILLS
+            )
+            # 链接到共享缓存的 Skills (--deploy-mode link) 不逐文件计划
+            linked_skills = {
+                name for name in REQUIRED_SKILLS if is_link(base_dir / platform_dir / "skills" / name)
+            }
+            planner.plan_tree(
+                "elecspecify/skills",
+                platform_dir / "skills",
+                exclude=set(plan.deferred_skills) | linked_skills,
+            )
+        else:
+            plan.warnings.append(f"源 Skills 库不完整或已损坏: {', '.join(missing_skills)}")
+
+    commands_dir = platform_dir / config["commands_dir"]
+    for command_name in COMMAND_BASENAMES:
+        file_name = f"{command_name}{config['file_extension']}"
+        source = f"{platform}/{file_name}"
+        if planner.manifest.get(source) is not None:
+            planner.plan_template(source, commands_dir / file_name)
+        else:
+            planner.plan_placeholder(
+                _generate_placeholder_content(command_name, platform), commands_dir / file_name
+            )
+
+    plan.actions = planner.actions
+    return plan
+
+
+class _Planner:
+    """逐个目标文件生成计划操作"""
+
+    def __init__(self, base_dir: Path, create_backup: bool):
+        self.base_dir = base_dir
+        self.create_backup = create_backup
+        self.manifest = get_template_manifest()
+        self.state = DeployState.load(base_dir)
+        self.actions: List[PlanAction] = []
+
+    def _stat(self, target: Path) -> Optional[os.stat_result]:
+        try:
+            return (self.base_dir / target).stat()
+        except FileNotFoundError:
+            return None
+
+    def _add(self, target: Path, stat_result: Optional[os.stat_result], **kwargs) -> None:
+        action = PlanAction(path=target.as_posix(), **kwargs)
+        if stat_result is not None:
+            action.expect_size = stat_result.st_size
+            action.expect_mtime_ns = stat_result.st_mtime_ns
+        self.actions.append(action)
+
+    def _write(
+        self,
+        target: Path,
+        stat_result: Optional[os.stat_result],
+        method: str,
+        source: Optional[str],
+        sha256: str,
+        size: int,
+        create_backup: Optional[bool] = None,
+    ) -> None:
+        backup = self.create_backup if create_backup is None else create_backup
+        backup = backup and stat_result is not None
+        backup_sha256 = None
+        if backup and self.state.is_unmodified(self.base_dir / target, stat_result):
+            # 未被修改的已部署文件内容即为部署记录中的模板内容
+            backup_sha256 = self.state.get(self.base_dir / target).sha256
+        self._add(
+            target,
+            stat_result,
+            action=ACTION_CREATE if stat_result is None else ACTION_UPDATE,
+            method=method,
+            source=source,
+            sha256=sha256,
+            bytes=size,
+            backup=backup,
+            backup_bytes=stat_result.st_size if backup else 0,
+            backup_sha256=backup_sha256,
+        )
+
+    def plan_if_blank(self, source: str, target: Path) -> None:
+        """只在目标不存在或为空时写入（不备份）"""
+        entry = self.manifest.get(source)
+        if entry is None:
+            return
+
+        stat_result = self._stat(target)
+        if _is_blank_file(self.base_dir / target):
+            self._write(
+                target, stat_result, METHOD_TEXT, source, entry.sha256, entry.size, False
+            )
+        else:
+            self._add(target, stat_result, action=ACTION_SKIP, source=source, reason="保留用户内容")
+
+    def plan_skill_config(self, source: str, target: Path) -> None:
+        """skill_config.json: 已存在时升级合并、首次初始化保留，不存在时复制模板"""
+        entry = self.manifest.get(source)
+        if entry is None:
+            return
+
+        stat_result = self._stat(target)
+        if stat_result is None or _is_blank_file(self.base_dir / target):
+            self._write(
+                target, stat_result, METHOD_TEXT, source, entry.sha256, entry.size, False
+            )
+        elif self.create_backup and self._template_unchanged(target, entry.sha256):
+            self._add(target, stat_result, action=ACTION_SKIP, source=source, reason="模板未变化,保留用户配置")
+        elif self.create_backup:
+            self._add(
+                target,
+                stat_result,
+                action=ACTION_MERGE,
+                method=METHOD_MERGE,
+                source=source,
+                sha256=entry.sha256,
+                bytes=entry.size,
+                backup=True,
+                backup_bytes=stat_result.st_size,
+            )
+        else:
+            self._add(target, stat_result, action=ACTION_SKIP, source=source, reason="保留用户配置")
+
+    def plan_tree(self, prefix: str, target_dir: Path, exclude: Optional[Set[str]] = None) -> None:
+        """目录树: 只更新模板已变化且用户未修改的文件（跳过 exclude 中的顶层条目）"""
+        for entry in sorted(self.manifest.iter_prefix(prefix), key=lambda e: e.path):
+            relative_path = entry.path[len(prefix) + 1 :]
+            if exclude and relative_path.split("/", 1)[0] in exclude:
+                continue
+            target = target_dir / relative_path
+            target_path = self.base_dir / target
+            stat_result = self._stat(target)
+
+            if stat_result is None:
+                self._write(target, None, METHOD_COPY, entry.path, entry.sha256, entry.size)
+            elif self.state.is_current(target_path, entry.sha256, stat_result):
+                self._add(target, stat_result, action=ACTION_SKIP, source=entry.path, reason="模板未变化")
+            elif self.state.is_unmodified(target_path, stat_result):
+                self._write(target, stat_result, METHOD_COPY, entry.path, entry.sha256, entry.size)
+            else:
+                # 内容相同或已被用户修改，两种情况都保留现有文件；
+                # 大小相同时执行阶段再校验内容并补记部署状态
+                self._add(
+                    target,
+                    stat_result,
+                    action=ACTION_SKIP,
+                    source=entry.path,
+                    sha256=entry.sha256,
+                    reason="文件已存在",
+                    verify=stat_result.st_size == entry.size,
+                )
+
+    def _template_unchanged(self, target: Path, sha256: str) -> bool:
+        """目标文件上次部署的模板是否与新模板相同"""
+        record = self.state.get(self.base_dir / target)
+        return record is not None and record.sha256 == sha256
+
+    def plan_template(self, source: str, target: Path) -> None:
+        """
+        命令模板: 更新到最新模板内容
+
+        用户未修改的文件直接更新 (不备份)；用户修改过的文件在模板未变化时保留，
+        模板已变化且有合并基准时计划三方合并。
+        """
+        entry = self.manifest.get(source)
+        target_path = self.base_dir / target
+        stat_result = self._stat(target)
+
+        if stat_result is None:
+            self._write(target, None, METHOD_TEXT, source, entry.sha256, entry.size)
+            return
+
+        if self.state.is_current(target_path, entry.sha256, stat_result):
+            self._add(target, stat_result, action=ACTION_SKIP, source=source, reason="模板未变化")
+            return
+
+        # 大小不同一定需要更新；大小相同且没有部署记录时才需要计算哈希
+        if (
+            stat_result.st_size == entry.size
+            and not self.state.is_unmodified(target_path, stat_result)
+            and file_matches_digest(target_path, entry.size, entry.sha256)
+        ):
+            self._add(
+                target,
+                stat_result,
+                action=ACTION_SKIP,
+                source=source,
+                sha256=entry.sha256,
+                reason="内容相同",
+                verify=True,
+            )
+            return
+
+        record = self.state.get(target_path)
+        if record is not None:
+            if self.state.is_unmodified(target_path, stat_result):
+                self._write(
+                    target, stat_result, METHOD_TEXT, source, entry.sha256, entry.size, False
+                )
+                return
+            if record.sha256 == entry.sha256:
+                self._add(
+                    target, stat_result, action=ACTION_SKIP, source=source, reason="保留用户修改"
+                )
+                return
+            if BackupStore(self.base_dir).has_object(record.sha256):
+                self._add(
+                    target,
+                    stat_result,
+                    action=ACTION_MERGE,
+                    method=METHOD_MERGE_TEXT,
+                    source=source,
+                    sha256=entry.sha256,
+                    bytes=entry.size,
+                    backup=self.create_backup,
+                    backup_bytes=stat_result.st_size if self.create_backup else 0,
+                )
+                return
+
+        self._write(target, stat_result, METHOD_TEXT, source, entry.sha256, entry.size)
+
+    def plan_placeholder(self, content: str, target: Path) -> None:
+        """模板缺失时写入占位符"""
+        import hashlib
+
+        data = content.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        stat_result = self._stat(target)
+
+        if stat_result is not None and file_matches_digest(
+            self.base_dir / target, len(data), sha256
+        ):
+            self._add(target, stat_result, action=ACTION_SKIP, reason="内容相同")
+            return
+
+        self._write(target, stat_result, METHOD_PLACEHOLDER, None, sha256, len(data))
+
+
+def check_plan(base_dir: Path, plan: DeployPlan) -> List[str]:
+    """
+    校验计划的前提是否仍然成立
+
+    Args:
+        base_dir: 项目根目录
+        plan: 部署计划
+
+    Returns:
+        发生变化的文件描述列表；为空表示计划可以执行
+    """
+    manifest = get_template_manifest()
+    conflicts: List[str] = []
+    root = base_dir.resolve()
+
+    for action in plan.actions:
+        # 目标所在目录经符号链接解析后必须仍在项目目录内
+        if not (base_dir / action.path).parent.resolve().is_relative_to(root):
+            conflicts.append(f"{action.path}: 路径不在项目目录内")
+            continue
+
+        if action.action == ACTION_SKIP:
+            continue
+
+        if action.source is not None:
+            entry = manifest.get(action.source)
+            if entry is None or entry.sha256 != action.sha256:
+                conflicts.append(f"{action.path}: 模板 {action.source} 与计划不一致")
+                continue
+
+        try:
+            stat_result = (base_dir / action.path).stat()
+        except FileNotFoundError:
+            stat_result = None
+
+        if action.expect_size is None:
+            if stat_result is not None:
+                conflicts.append(f"{action.path}: 计划后已被创建")
+        elif stat_result is None:
+            conflicts.append(f"{action.path}: 计划后已被删除")
+        elif (
+            stat_result.st_size != action.expect_size
+            or stat_result.st_mtime_ns != action.expect_mtime_ns
+        ):
+            conflicts.append(f"{action.path}: 计划后已被修改")
+
+    return conflicts
+
+
+@dataclass
+class DiskEstimate:
+    """执行部署计划需要的磁盘空间（字节，均按文件系统分配块取整）"""
+
+    bytes_written: int = 0  # 新写入的文件内容
+    bytes_backed_up: int = 0  # 需新写入备份库的对象（已去重）
+    bytes_deduplicated: int = 0  # 因备份库中已有相同内容或计划内重复而节省的备份空间
+    bytes_metadata: int = 0  # 部署状态、快照清单等元数据
+    bytes_staged_copies: int = 0  # 分阶段部署时为与回滚点分离而复制的未变更文件
+
+    @property
+    def required_bytes(self) -> int:
+        """需要的总空间"""
+        return (
+            self.bytes_written
+            + self.bytes_backed_up
+            + self.bytes_metadata
+            + self.bytes_staged_copies
+        )
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为可序列化的字典"""
+        return {
+            "bytes_written": self.bytes_written,
+            "bytes_backed_up": self.bytes_backed_up,
+            "bytes_deduplicated": self.bytes_deduplicated,
+            "bytes_metadata": self.bytes_metadata,
+            "bytes_staged_copies": self.bytes_staged_copies,
+            "required_bytes": self.required_bytes,
+        }
+
+
+def estimate_disk_usage(base_dir: Path, plan: DeployPlan, staged: bool = False) -> DiskEstimate:
+    """
+    根据部署计划计算执行时需要的磁盘空间
+
+    - 写入: 每个 create/update/merge 操作的字节数 (来自模板清单)，被覆盖的旧内容不计为释放
+    - 备份: 被覆盖文件的内容哈希已知 (部署记录) 且备份库中已有该对象，
+      或与计划中另一个备份内容相同时不再计入；哈希未知时按完整大小计入
+    - 元数据: 每个写入的文件按 METADATA_BYTES_PER_FILE 估算部署状态和快照清单的增长
+    - 分阶段部署: 有变更的目录树 (STAGED_TREE_DIRS) 中未被替换的文件 (含用户文件)
+      会复制一份，使新目录树与作为回滚点的旧目录树互相独立，按完整大小计入；
+      这些目录树不再逐文件备份，其中的备份不计入
+
+    Args:
+        base_dir: 项目根目录
+        plan: 部署计划
+        staged: 是否以分阶段方式部署目录树
+
+    Returns:
+        DiskEstimate 对象
+    """
+    block_size = get_allocation_block_size(base_dir)
+    store = BackupStore(base_dir)
+    estimate = DiskEstimate()
+    planned_objects: Set[str] = set()
+    staged_prefixes = tuple(f"{tree.as_posix()}/" for tree in STAGED_TREE_DIRS) if staged else ()
+
+    for action in plan.actions:
+        if action.action == ACTION_SKIP:
+            continue
+
+        estimate.bytes_written += _round_to_blocks(action.bytes, block_size)
+        estimate.bytes_metadata += METADATA_BYTES_PER_FILE
+
+        if not action.backup or action.path.startswith(staged_prefixes):
+            continue
+        backup_bytes = _round_to_blocks(action.backup_bytes, block_size)
+        if action.backup_sha256 is not None and (
+            action.backup_sha256 in planned_objects or store.has_object(action.backup_sha256)
+        ):
+            estimate.bytes_deduplicated += backup_bytes
+            continue
+        if action.backup_sha256 is not None:
+            planned_objects.add(action.backup_sha256)
+        estimate.bytes_backed_up += backup_bytes
+
+    if staged:
+        estimate.bytes_staged_copies = _estimate_staged_copies(base_dir, plan, block_size)
+
+    return estimate
+
+
+def _estimate_staged_copies(base_dir: Path, plan: DeployPlan, block_size: int) -> int:
+    """
+    分阶段部署时复制的未变更文件占用的空间
+
+    没有变更的目录树不会被替换，尚不存在的目录树直接重命名，均不产生复制。
+    """
+    replaced = {action.path for action in plan.actions if action.action != ACTION_SKIP}
+    total = 0
+
+    for tree in STAGED_TREE_DIRS:
+        tree_dir = base_dir / tree
+        prefix = f"{tree.as_posix()}/"
+        if not tree_dir.is_dir() or not any(path.startswith(prefix) for path in replaced):
+            continue
+
+        for directory, _dirnames, filenames in os.walk(tree_dir):
+            for filename in filenames:
+                path = Path(directory) / filename
+                if path.relative_to(base_dir).as_posix() in replaced:
+                    continue
+                info = path.lstat()
+                if stat.S_ISREG(info.st_mode):
+                    total += _round_to_blocks(info.st_size, block_size)
+
+    return total
+
+
+def _round_to_blocks(size: int, block_size: int) -> int:
+    """文件实际占用的空间（按分配块向上取整，空文件不占用数据块）"""
+    return -(-size // block_size) * block_size
+
+
+def apply_deploy_plan(
+    base_dir: Path, plan: DeployPlan, deploy_mode: str = DEPLOY_MODE_COPY
+) -> ChangeSummary:
+    """
+    严格按计划执行部署
+
+    执行前校验全部前提，任一文件在计划后发生变化或路径不在项目目录内时不执行任何操作。
+
+    Args:
+        base_dir: 项目根目录
+        plan: 部署计划
+        deploy_mode: 目录树文件的部署模式 ("copy" 或 "auto")
+
+    Returns:
+        ChangeSummary 包含所有文件变更记录
+
+    Raises:
+        PlanConflictError: 计划已过期
+        ValueError: 部署模式为 "link"（计划按文件列出操作，无法以链接方式执行）
+    """
+    if deploy_mode == DEPLOY_MODE_LINK:
+        raise ValueError("部署计划不支持 link 部署模式")
+
+    conflicts = check_plan(base_dir, plan)
+    if conflicts:
+        raise PlanConflictError(conflicts)
+
+    state = DeployState.load(base_dir)
+    backup_snapshot = None
+    if any(action.backup for action in plan.actions):
+        backup_snapshot = BackupStore(base_dir).begin_snapshot("apply")
+
+    summary = ChangeSummary()
+
+    for action in plan.actions:
+        target = base_dir / action.path
+        source = TEMPLATE_ROOT / action.source if action.source is not None else None
+
+        if action.action == ACTION_SKIP:
+            if action.verify and file_matches_digest(target, action.expect_size, action.sha256):
+                state.record(target, action.sha256)
+            summary.add_change(FileChange(path=target, change_type="skipped", message=action.reason))
+            continue
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        backup_path = None
+
+        if action.method == METHOD_MERGE:
+            summary.add_change(_upgrade_skill_config(target, source, state, backup_snapshot))
+            _set_skill_config_permissions(target)
+            continue
+
+        if action.method == METHOD_MERGE_TEXT:
+            summary.add_change(
+                _write_template_file(source, target, action.backup, state, backup_snapshot)
+            )
+            continue
+
+        if action.backup and target.exists():
+            backup_path = backup_snapshot.add(target)
+
+        if action.method == METHOD_COPY:
+            strategy = copy_template_file(source, target, deploy_mode, action.sha256)
+        else:
+            if action.method == METHOD_PLACEHOLDER:
+                content = _generate_placeholder_content(Path(action.path).stem, plan.platform)
+            else:
+                content = read_template_text(source)
+            target.write_text(content, encoding="utf-8")
+            strategy = ""
+
+        if source is not None:
+            state.record(target, action.sha256)
+            if action.method == METHOD_TEXT and action.source.startswith(f"{plan.platform}/"):
+                # 命令模板: 保存合并基准供下次升级三方合并
+                _store_template_base(base_dir, source, action.sha256)
+        if target.name == "skill_config.json":
+            _set_skill_config_permissions(target)
+            _record_skill_config(target, source, state)
+
+        change_type = "created" if action.action == ACTION_CREATE else "updated"
+        if backup_path is not None:
+            change_type = "backed_up"
+        summary.add_change(
+            FileChange(
+                path=target,
+                change_type=change_type,
+                backup_path=backup_path,
+                message="已创建" if action.action == ACTION_CREATE else "已更新",
+                strategy=strategy,
+            )
+        )
+
+    if backup_snapshot is not None:
+        backup_snapshot.commit()
+    state.save()
+
+    if plan.platform == "claude":
+        write_deferred_record(base_dir, plan.deferred_skills, get_template_manifest())
+
+    return summary
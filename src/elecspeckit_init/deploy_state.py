@@ -0,0 +1,219 @@
+"""
+部署状态模块
+
+在 .elecspecify/state/ 中持久化记录每个已部署模板文件的状态
+（模板 SHA-256、目标文件大小和修改时间），使升级时只需 stat 即可判断
+文件是否未变化，仅处理模板已更新或磁盘副本已偏离的文件。
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+# 状态目录（相对项目根目录）
+STATE_DIR = Path(".elecspecify") / "state"
+
+# 部署记录文件名
+DEPLOY_STATE_FILENAME = "deployed.json"
+
+# 部署记录格式版本
+DEPLOY_STATE_FORMAT_VERSION = 1
+
+
+@dataclass
+class DeployedFile:
+    """单个已部署文件的记录"""
+
+    sha256: str  # 部署时模板内容的 SHA-256
+    size: int  # 部署后目标文件的字节数（MERGED_SIZE 表示文件含用户修改，仅记录合并基准）
+    mtime_ns: int  # 部署后目标文件的修改时间 (纳秒)
+
+
+# 三方合并后文件内容与模板不同，记录的大小为该值，使文件始终被视为已修改
+MERGED_SIZE = -1
+
+
+class DeployState:
+    """
+    项目部署状态
+
+    记录以项目根目录为基准的相对路径 (POSIX 格式) 为键。
+
+    Examples:
+        >>> state = DeployState.load(Path.cwd())
+        >>> if state.is_current(target, entry.sha256):
+        ...     pass  # 模板未变化且目标文件未被修改，无需任何读取
+        >>> state.record(target, entry.sha256)
+        >>> state.save()
+    """
+
+    def __init__(self, base_dir: Path, files: Optional[Dict[str, DeployedFile]] = None):
+        self.base_dir = base_dir
+        self.files: Dict[str, DeployedFile] = files or {}
+        self._dirty = False
+        self._redirects: Dict[Path, Path] = {}
+
+    @property
+    def path(self) -> Path:
+        """部署记录文件路径"""
+        return self.base_dir / STATE_DIR / DEPLOY_STATE_FILENAME
+
+    @classmethod
+    def load(cls, base_dir: Path) -> "DeployState":
+        """
+        加载项目部署状态
+
+        记录文件不存在或已损坏时返回空状态（等同于首次部署）。
+
+        Args:
+            base_dir: 项目根目录
+
+        Returns:
+            DeployState 对象
+        """
+        state = cls(base_dir)
+
+        try:
+            data = json.loads(state.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return state
+
+        if data.get("format") != DEPLOY_STATE_FORMAT_VERSION:
+            return state
+
+        for key, info in data.get("files", {}).items():
+            try:
+                state.files[key] = DeployedFile(
+                    sha256=info["sha256"], size=int(info["size"]), mtime_ns=int(info["mtime_ns"])
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        return state
+
+    def redirect(self, staging_dir: Path, target_dir: Optional[Path]) -> None:
+        """
+        将临时目录下的文件映射到最终目标目录下的键（分阶段部署使用）
+
+        Args:
+            staging_dir: 临时构建目录
+            target_dir: 最终目标目录；为 None 时取消映射
+        """
+        if target_dir is None:
+            self._redirects.pop(staging_dir, None)
+        else:
+            self._redirects[staging_dir] = target_dir
+
+    def key_for(self, path: Path) -> str:
+        """计算文件在状态记录中的键（相对项目根目录的 POSIX 路径）"""
+        for staging_dir, target_dir in self._redirects.items():
+            if path.is_relative_to(staging_dir):
+                path = target_dir / path.relative_to(staging_dir)
+                break
+        return path.relative_to(self.base_dir).as_posix()
+
+    def get(self, path: Path) -> Optional[DeployedFile]:
+        """获取文件的部署记录"""
+        return self.files.get(self.key_for(path))
+
+    def is_unmodified(self, path: Path, stat_result: Optional[os.stat_result] = None) -> bool:
+        """
+        检查目标文件自上次部署后是否未被修改（仅比较 stat 元数据）
+
+        Args:
+            path: 目标文件路径
+            stat_result: 已获取的 stat 结果（可选，避免重复 stat）
+
+        Returns:
+            True 如果存在部署记录且大小和修改时间均一致
+        """
+        record = self.get(path)
+        if record is None:
+            return False
+
+        if stat_result is None:
+            try:
+                stat_result = path.stat()
+            except OSError:
+                return False
+
+        return stat_result.st_size == record.size and stat_result.st_mtime_ns == record.mtime_ns
+
+    def is_current(
+        self, path: Path, sha256: str, stat_result: Optional[os.stat_result] = None
+    ) -> bool:
+        """
+        检查目标文件是否已是指定模板内容的最新部署
+
+        Args:
+            path: 目标文件路径
+            sha256: 当前模板内容的 SHA-256
+            stat_result: 已获取的 stat 结果（可选）
+
+        Returns:
+            True 如果模板未变化且目标文件未被修改
+        """
+        record = self.get(path)
+        return (
+            record is not None
+            and record.sha256 == sha256
+            and self.is_unmodified(path, stat_result)
+        )
+
+    def record(
+        self, path: Path, sha256: str, stat_result: Optional[os.stat_result] = None
+    ) -> None:
+        """
+        记录文件的部署状态（在写入目标文件之后调用）
+
+        Args:
+            path: 目标文件路径
+            sha256: 已部署模板内容的 SHA-256
+            stat_result: 写入后的 stat 结果（可选，避免重复 stat）
+        """
+        if stat_result is None:
+            stat_result = path.stat()
+        self.files[self.key_for(path)] = DeployedFile(
+            sha256=sha256, size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns
+        )
+        self._dirty = True
+
+    def record_base(self, path: Path, sha256: str) -> None:
+        """
+        记录三方合并后的文件（在写入目标文件之后调用）
+
+        文件内容包含用户修改，不等于任何模板；只记录合并时使用的模板 SHA-256，
+        作为下次升级的合并基准 (见 three_way_merge)，文件始终被视为已修改。
+
+        Args:
+            path: 目标文件路径
+            sha256: 合并时新模板内容的 SHA-256
+        """
+        self.files[self.key_for(path)] = DeployedFile(sha256=sha256, size=MERGED_SIZE, mtime_ns=0)
+        self._dirty = True
+
+    def forget(self, path: Path) -> None:
+        """移除文件的部署记录"""
+        if self.files.pop(self.key_for(path), None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """将部署状态写回磁盘（无变化时不写入）"""
+        if not self._dirty:
+            return
+
+        data = {
+            "format": DEPLOY_STATE_FORMAT_VERSION,
+            "files": {
+                key: {"sha256": record.sha256, "size": record.size, "mtime_ns": record.mtime_ns}
+                for key, record in sorted(self.files.items())
+            },
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(data, indent=1) + "\n", encoding="utf-8")
+        os.replace(temp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,100 @@
+"""
+部署事件流
+
+--json-stream 模式下，每个文件变更、每个部署阶段和每个 git 步骤在发生时
+立即以一行 JSON (NDJSON) 输出，而不是在结束时一次性输出完整结果。
+
+事件接收器通过 contextvars 设置，未设置时 emit_event() 不做任何事，
+因此各模块可以无条件调用。
+
+事件格式:
+    {"event": "phase", "phase": "skills", "status": "start"}
+    {"event": "file", "path": ".claude/skills/docs-seeker/SKILL.md", "change": "created", ...}
+    {"event": "git", "step": "init", "status": "success"}
+    {"event": "result", "status": "success", ...}
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TextIO
+
+EventSink = Callable[[dict], None]
+
+_event_sink: ContextVar[Optional[EventSink]] = ContextVar("elecspeckit_event_sink", default=None)
+
+
+def events_enabled() -> bool:
+    """当前上下文是否设置了事件接收器"""
+    return _event_sink.get() is not None
+
+
+def emit_event(event: str, **fields) -> None:
+    """
+    发送一个事件（未设置接收器时忽略）
+
+    Args:
+        event: 事件类型 ("phase" / "file" / "git" / "result" 等)
+        **fields: 事件字段
+    """
+    sink = _event_sink.get()
+    if sink is not None:
+        sink({"event": event, **fields})
+
+
+@contextmanager
+def event_stream(sink: Optional[EventSink]) -> Iterator[None]:
+    """
+    在上下文中设置事件接收器
+
+    Args:
+        sink: 事件接收器；为 None 时在上下文中暂停事件输出
+    """
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """发送阶段开始/结束事件"""
+    emit_event("phase", phase=name, status="start")
+    try:
+        yield
+    except BaseException:
+        emit_event("phase", phase=name, status="error")
+        raise
+    emit_event("phase", phase=name, status="end")
+
+
+class NdjsonEventWriter:
+    """
+    将事件逐行写入文本流的接收器
+
+    Path 类型字段转换为相对 base_dir 的 POSIX 路径；每行写入后立即 flush。
+    """
+
+    def __init__(self, stream: TextIO, base_dir: Optional[Path] = None):
+        self.stream = stream
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=self._default)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def _default(self, value):
+        if isinstance(value, Path):
+            if self.base_dir is not None:
+                try:
+                    return value.relative_to(self.base_dir).as_posix()
+                except ValueError:
+                    pass
+            return value.as_posix()
+        raise TypeError(f"无法序列化的事件字段: {type(value).__name__}")
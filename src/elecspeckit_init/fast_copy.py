@@ -0,0 +1,290 @@
+"""
+零拷贝文件复制策略
+
+部署模式 "auto" 下按以下顺序尝试复制文件，失败时自动降级:
+1. reflink (FICLONE ioctl, btrfs/xfs 等支持写时复制的文件系统)
+2. os.copy_file_range (内核态复制，NFS 4.2 等可由服务端完成)
+3. 硬链接到只读的用户级模板缓存 (内容寻址，同一文件系统内共享 inode；
+   缓存对象在本进程中首次使用前校验 SHA-256，内容与文件名不符时重新生成)
+4. shutil.copy2 (普通逐字节复制)
+
+模板归档 (templates.zip) 中的成员是归档文件中的一段字节，"auto" 模式下依次尝试
+os.copy_file_range (从成员偏移处复制) 和硬链接缓存，见 copy_file_region。
+
+部署模式 "copy" (默认) 始终使用 shutil.copy2。
+部署模式 "link" 下 Skills 以目录链接指向共享的用户级缓存 (见 skills_cache)，
+其余文件与 "copy" 模式相同。
+"""
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional, Set, Tuple
+
+from .template_manifest import compute_sha256
+
+# 部署模式
+DEPLOY_MODE_COPY = "copy"
+DEPLOY_MODE_AUTO = "auto"
+DEPLOY_MODE_LINK = "link"
+DEPLOY_MODES = (DEPLOY_MODE_COPY, DEPLOY_MODE_AUTO, DEPLOY_MODE_LINK)
+
+# 复制策略名称（出现在 --json 输出中）
+STRATEGY_REFLINK = "reflink"
+STRATEGY_COPY_FILE_RANGE = "copy_file_range"
+STRATEGY_HARDLINK = "hardlink"
+STRATEGY_COPY = "copy"
+STRATEGY_SYMLINK = "symlink"  # 整个 Skill 目录链接到共享缓存
+
+# linux/fs.h: #define FICLONE _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# 表示当前文件系统不支持某种策略的错误码
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EACCES,
+    errno.EROFS,
+}
+
+# 已知不支持的 (策略, 目标设备号)，避免对每个文件重复尝试失败的系统调用
+_unsupported: Set[Tuple[str, int]] = set()
+
+# 本进程中已确认内容与文件名一致的缓存对象 (SHA-256)
+_verified_objects: Set[str] = set()
+_verified_lock = threading.Lock()
+
+
+def copy_file(
+    source: Path, target: Path, deploy_mode: str = DEPLOY_MODE_COPY, sha256: Optional[str] = None
+) -> str:
+    """
+    按部署模式复制单个文件
+
+    目标文件已存在时先删除再写入，避免通过硬链接改写共享的缓存文件。
+
+    Args:
+        source: 源文件
+        target: 目标文件
+        deploy_mode: 部署模式 ("copy"、"auto" 或 "link"；"link" 对单个文件按 "copy" 处理)
+        sha256: 源文件内容的 SHA-256（可选，硬链接缓存需要）
+
+    Returns:
+        实际使用的复制策略名称
+    """
+    try:
+        target.unlink()
+    except FileNotFoundError:
+        pass
+
+    if deploy_mode == DEPLOY_MODE_AUTO:
+        device = target.parent.stat().st_dev
+
+        if sys.platform == "linux" and _try_strategy(
+            STRATEGY_REFLINK, device, _reflink, source, target
+        ):
+            shutil.copystat(source, target)
+            return STRATEGY_REFLINK
+
+        if hasattr(os, "copy_file_range") and _try_strategy(
+            STRATEGY_COPY_FILE_RANGE, device, _copy_file_range, source, target
+        ):
+            shutil.copystat(source, target)
+            return STRATEGY_COPY_FILE_RANGE
+
+        if sha256 is not None and _try_strategy(
+            STRATEGY_HARDLINK, device, _hardlink_from_cache, source, target, sha256
+        ):
+            return STRATEGY_HARDLINK
+
+    shutil.copy2(source, target)
+    return STRATEGY_COPY
+
+
+def copy_file_region(
+    source_fd: int,
+    offset: int,
+    size: int,
+    target: Path,
+    write: Callable[[BinaryIO], None],
+    sha256: Optional[str] = None,
+) -> Optional[str]:
+    """
+    "auto" 部署模式下将打开文件中的一段内容 (如模板归档成员) 部署到目标文件
+
+    依次尝试 os.copy_file_range (从 offset 处在内核态复制) 和硬链接缓存 (缓存对象由
+    write 写入)。reflink 要求偏移按文件系统块对齐，归档成员一般不满足，因此不尝试。
+
+    Args:
+        source_fd: 源文件描述符（不改变其读取位置）
+        offset: 内容在源文件中的起始偏移
+        size: 内容字节数
+        target: 目标文件（已存在时先删除）
+        write: 向打开的文件写入该段内容的函数（填充硬链接缓存时使用）
+        sha256: 内容的 SHA-256（可选，硬链接缓存需要）
+
+    Returns:
+        实际使用的复制策略名称；均不可用时返回 None，由调用方自行写入
+    """
+    try:
+        target.unlink()
+    except FileNotFoundError:
+        pass
+
+    device = target.parent.stat().st_dev
+
+    if hasattr(os, "copy_file_range") and _try_strategy(
+        STRATEGY_COPY_FILE_RANGE, device, _copy_file_range_at, source_fd, target, offset, size
+    ):
+        return STRATEGY_COPY_FILE_RANGE
+
+    if sha256 is not None and _try_strategy(
+        STRATEGY_HARDLINK, device, _hardlink_written, write, target, sha256
+    ):
+        return STRATEGY_HARDLINK
+
+    return None
+
+
+def _try_strategy(strategy: str, device: int, func, *args) -> bool:
+    """
+    尝试一种复制策略，失败时清理目标文件并记录该设备不支持此策略
+
+    策略函数返回 False 表示仅对当前文件不适用 (如内容与给定的 SHA-256 不符)，
+    不影响同一设备上的其他文件。
+
+    Returns:
+        True 如果复制成功
+    """
+    if (strategy, device) in _unsupported:
+        return False
+
+    try:
+        return func(*args) is not False
+    except OSError as e:
+        target = args[1]
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            _unsupported.add((strategy, device))
+            return False
+        raise
+
+
+def _reflink(source: Path, target: Path) -> None:
+    """通过 FICLONE ioctl 创建写时复制副本"""
+    import fcntl
+
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _copy_file_range(source: Path, target: Path) -> None:
+    """通过 os.copy_file_range 在内核态复制文件内容"""
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def _copy_file_range_at(source_fd: int, target: Path, offset: int, size: int) -> None:
+    """通过 os.copy_file_range 从 source_fd 的 offset 处复制 size 字节到新建的目标文件"""
+    with open(target, "xb") as dst:
+        remaining = size
+        while remaining > 0:
+            copied = os.copy_file_range(source_fd, dst.fileno(), remaining, offset)
+            if copied == 0:
+                raise OSError(errno.EINVAL, "copy_file_range 提前结束", str(target))
+            offset += copied
+            remaining -= copied
+
+
+def get_template_cache_dir() -> Path:
+    """
+    获取用户级模板缓存目录
+
+    Returns:
+        缓存目录路径（如 ~/.cache/elecspeckit/objects）
+    """
+    from platformdirs import user_cache_dir
+
+    return Path(user_cache_dir("elecspeckit", appauthor=False)) / "objects"
+
+
+def _hardlink_from_cache(source: Path, target: Path, sha256: str) -> bool:
+    """
+    将源文件放入只读的内容寻址缓存，再硬链接到目标位置
+
+    缓存文件权限为只读 (0444)，防止在项目中原地编辑时改写共享内容。
+
+    Returns:
+        False 如果源文件内容与 sha256 不符（不创建链接）
+    """
+
+    def write(dst: BinaryIO) -> None:
+        with open(source, "rb") as src:
+            shutil.copyfileobj(src, dst)
+
+    return link_cache_object(sha256, write, target)
+
+
+def _hardlink_written(write: Callable[[BinaryIO], None], target: Path, sha256: str) -> bool:
+    """将 write 写入的内容放入缓存，再硬链接到目标位置（参数顺序供 _try_strategy 使用）"""
+    return link_cache_object(sha256, write, target)
+
+
+def link_cache_object(sha256: str, write: Callable[[BinaryIO], None], target: Path) -> bool:
+    """
+    确保缓存中有内容为 sha256 的对象，再硬链接到目标位置
+
+    缓存中已有的对象只按文件名查找并不可信 (可能损坏或被篡改)，每个对象在本进程中
+    首次使用前校验 SHA-256，不符时删除并重新生成；新生成的对象写入临时文件并校验后
+    才原子替换到缓存中。
+
+    Args:
+        sha256: 对象内容的 SHA-256
+        write: 向打开的临时文件写入对象内容的函数
+        target: 硬链接目标路径
+
+    Returns:
+        False 如果 write 写入的内容与 sha256 不符（不创建链接）
+    """
+    cache_file = get_template_cache_dir() / sha256[:2] / sha256
+
+    if sha256 not in _verified_objects:
+        if cache_file.exists() and compute_sha256(cache_file) != sha256:
+            cache_file.unlink()
+
+        if not cache_file.exists():
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_name(f".{sha256}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(temp_file, "xb") as f:
+                    write(f)
+                if compute_sha256(temp_file) != sha256:
+                    return False
+                os.chmod(temp_file, 0o444)
+                os.replace(temp_file, cache_file)
+            finally:
+                if temp_file.exists():
+                    temp_file.unlink()
+
+        with _verified_lock:
+            _verified_objects.add(sha256)
+
+    os.link(cache_file, target)
+    return True
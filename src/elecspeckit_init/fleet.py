@@ -0,0 +1,124 @@
+"""
+批量项目初始化/升级
+
+elecspeckit init --projects-from 使用本模块在进程池中并行处理多个项目目录。
+主进程只加载一次模板清单，并在创建工作进程时传入 (fork 平台上直接继承)，
+工作进程无需再次读取清单或模板目录。
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+from .template_manifest import TemplateManifest, register_template_manifest
+
+
+def resolve_project_dirs(spec: str) -> List[Path]:
+    """
+    解析 --projects-from 参数
+
+    参数为已存在的文件时按行读取项目目录 (忽略空行和 # 注释，相对路径以
+    文件所在目录为基准)；否则作为 glob 模式 (支持 **) 匹配目录。
+
+    Args:
+        spec: 列表文件路径或 glob 模式
+
+    Returns:
+        去重后的项目目录列表（保持原有顺序）
+
+    Raises:
+        ValueError: 未找到任何项目目录
+    """
+    spec_path = Path(spec)
+    candidates: List[Path] = []
+
+    if spec_path.is_file():
+        for line in spec_path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            candidate = Path(line).expanduser()
+            if not candidate.is_absolute():
+                candidate = spec_path.parent / candidate
+            candidates.append(candidate)
+    else:
+        candidates = [Path(match) for match in sorted(glob.glob(spec, recursive=True))]
+        candidates = [candidate for candidate in candidates if candidate.is_dir()]
+
+    project_dirs: List[Path] = []
+    seen = set()
+    for candidate in candidates:
+        resolved = candidate.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            project_dirs.append(resolved)
+
+    if not project_dirs:
+        raise ValueError(f"未找到任何项目目录: {spec}")
+
+    return project_dirs
+
+
+def run_projects(
+    project_dirs: List[Path],
+    worker: Callable[..., dict],
+    manifest: TemplateManifest,
+    max_workers: int,
+    **worker_kwargs,
+) -> Iterator[dict]:
+    """
+    并行处理多个项目，按完成顺序逐个产出结果
+
+    Args:
+        project_dirs: 项目目录列表
+        worker: 处理单个项目的模块级函数 worker(base_dir, **worker_kwargs) -> dict
+        manifest: 已加载的模板清单（传给每个工作进程）
+        max_workers: 工作进程数；为 1 时在当前进程中顺序执行
+        **worker_kwargs: 传给 worker 的其余参数
+
+    Yields:
+        每个项目的结果字典（附加 "project" 和 "elapsed_ms" 字段）
+    """
+    if max_workers <= 1 or len(project_dirs) == 1:
+        for project_dir in project_dirs:
+            yield _run_one(worker, project_dir, worker_kwargs)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(project_dirs)),
+        initializer=register_template_manifest,
+        initargs=(manifest,),
+    ) as executor:
+        futures = {
+            executor.submit(_run_one, worker, project_dir, worker_kwargs): project_dir
+            for project_dir in project_dirs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # 工作进程异常退出等无法在 worker 内部捕获的错误
+                yield {
+                    "project": str(futures[future]),
+                    "status": "error",
+                    "message": f"处理失败: {e}",
+                }
+
+
+def default_worker_count() -> int:
+    """默认工作进程数（CPU 核数）"""
+    return os.cpu_count() or 1
+
+
+def _run_one(worker: Callable[..., dict], project_dir: Path, worker_kwargs: dict) -> dict:
+    """在工作进程中处理单个项目并计时"""
+    start = time.perf_counter()
+    try:
+        result = worker(project_dir, **worker_kwargs)
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    return {"project": str(project_dir), **result, "elapsed_ms": elapsed_ms}
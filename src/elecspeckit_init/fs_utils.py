@@ -4,45 +4,140 @@
 提供模板复制、目录创建和幂等检查的帮助函数
 """
 
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
+from .backup_store import BACKUP_TIMESTAMP_FORMAT, BackupSnapshot
+from .change_log import DEFAULT_SPILL_THRESHOLD, ChangeLog, FileChange
+from .deploy_state import DeployState
+from .events import emit_event, events_enabled
+from .fast_copy import DEPLOY_MODE_COPY
+from .template_bundle import copy_template_file, get_template_bundle, template_member
+from .template_manifest import TemplateManifest, compute_sha256
 
-@dataclass
-class FileChange:
-    """文件变更记录"""
+# 并行复制文件的默认线程数（I/O 密集，受限于文件系统往返延迟而非 CPU）
+DEFAULT_COPY_WORKERS = 8
 
-    path: Path
-    change_type: str  # "created", "updated", "backed_up", "skipped"
-    backup_path: Optional[Path] = None
-    message: str = ""
+# 逐块比较文件内容时的块大小
+COMPARE_CHUNK_SIZE = 64 * 1024
 
 
-@dataclass
 class ChangeSummary:
-    """变更摘要"""
+    """
+    变更摘要
 
-    changes: List[FileChange]
-    total_created: int = 0
-    total_updated: int = 0
-    total_backed_up: int = 0
-    total_skipped: int = 0
+    变更记录以紧凑形式保存在 ChangeLog 中 (见 change_log)，
+    changes 属性按需还原为 FileChange 列表，大型部署应优先使用
+    relative_paths()/paths()/merge() 避免逐条创建对象。
+    """
+
+    def __init__(
+        self,
+        changes: Optional[Iterable[FileChange]] = None,
+        spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+    ):
+        self.log = ChangeLog(spill_threshold)
+        self.total_created = 0
+        self.total_updated = 0
+        self.total_backed_up = 0
+        self.total_skipped = 0
+        self.strategies: Dict[str, int] = {}  # 各复制策略的使用次数
+        self.conflicts: List[Path] = []  # 三方合并留下冲突标记的文件
+
+        for change in changes or ():
+            self.add_change(change)
+
+    @property
+    def changes(self) -> List[FileChange]:
+        """全部变更记录（每次访问重新还原）"""
+        return list(self.log)
+
+    @property
+    def total_changes(self) -> int:
+        """变更记录总数"""
+        return len(self.log)
 
     def add_change(self, change: FileChange) -> None:
-        """添加变更记录并更新计数"""
-        self.changes.append(change)
-        if change.change_type == "created":
+        """
+        添加变更记录并更新计数
+
+        设置了事件接收器时，每个变更在第一次被记录时发送一个 "file" 事件；
+        汇总到上层 ChangeSummary 时不会重复发送。
+        """
+        if not change.reported and events_enabled():
+            change.reported = True
+            _emit_file_event(change)
+
+        self.log.append(change)
+        self._count(change.change_type, change.strategy)
+        if change.conflict:
+            self.conflicts.append(change.path)
+
+    def merge(self, other: "ChangeSummary") -> None:
+        """
+        汇总另一个 ChangeSummary 的全部记录和计数
+
+        尚未发送事件的记录 (如分阶段部署中暂停事件时记录的变更) 在此时发送。
+        """
+        self.log.extend(other.log, _emit_file_event if events_enabled() else None)
+        self.total_created += other.total_created
+        self.total_updated += other.total_updated
+        self.total_backed_up += other.total_backed_up
+        self.total_skipped += other.total_skipped
+        for strategy, count in other.strategies.items():
+            self.strategies[strategy] = self.strategies.get(strategy, 0) + count
+        self.conflicts.extend(other.conflicts)
+
+    def relative_paths(self, base_dir: Path) -> List[str]:
+        """
+        获取全部变更文件相对 base_dir 的路径（用于 JSON 输出的 files 列表）
+
+        Raises:
+            ValueError: 变更路径不在 base_dir 下
+        """
+        return list(self.log.relative_paths(base_dir))
+
+    def conflict_paths(self, base_dir: Path) -> List[str]:
+        """获取三方合并留下冲突标记的文件相对 base_dir 的路径"""
+        return [str(path.relative_to(base_dir)) for path in self.conflicts]
+
+    def paths(self, *change_types: str) -> Iterator[Path]:
+        """按记录顺序生成指定变更类型（未指定时为全部）的文件路径"""
+        return self.log.paths(*change_types)
+
+    def retarget(self, old_dir: Path, new_dir: Path) -> None:
+        """将 old_dir 下的变更路径改写到 new_dir 下"""
+        self.log.retarget(old_dir, new_dir)
+
+    def _count(self, change_type: str, strategy: str) -> None:
+        if strategy:
+            self.strategies[strategy] = self.strategies.get(strategy, 0) + 1
+        if change_type == "created":
             self.total_created += 1
-        elif change.change_type == "updated":
+        elif change_type == "updated":
             self.total_updated += 1
-        elif change.change_type == "backed_up":
+        elif change_type == "backed_up":
             self.total_backed_up += 1
-        elif change.change_type == "skipped":
+        elif change_type == "skipped":
             self.total_skipped += 1
 
 
+def _emit_file_event(change: FileChange) -> None:
+    """发送文件变更事件"""
+    emit_event(
+        "file",
+        path=change.path,
+        change=change.change_type,
+        strategy=change.strategy or None,
+        backup=change.backup_path,
+        message=change.message,
+    )
+
+
 def ensure_directory_exists(path: Path) -> bool:
     """
     确保目录存在,如不存在则创建
@@ -66,8 +161,125 @@ def ensure_directory_exists(path: Path) -> bool:
     return True
 
 
+def file_matches_digest(path: Path, size: int, sha256: str) -> bool:
+    """
+    检查文件内容是否与给定的大小和 SHA-256 一致
+
+    先比较 stat 大小，大小不同时无需读取文件内容。
+
+    Args:
+        path: 文件路径
+        size: 期望的字节数
+        sha256: 期望的 SHA-256 十六进制摘要
+
+    Returns:
+        True 如果文件存在且内容一致
+    """
+    try:
+        if path.stat().st_size != size:
+            return False
+        return compute_sha256(path) == sha256
+    except OSError:
+        return False
+
+
+def file_matches_content(path: Path, content: bytes) -> bool:
+    """
+    检查文件内容是否与给定字节完全一致
+
+    先比较 stat 大小，大小相同时按固定大小的块逐块比较，遇到第一个不同的块即返回，
+    不会一次性读入整个文件。
+
+    Args:
+        path: 文件路径
+        content: 期望的文件内容
+
+    Returns:
+        True 如果文件存在且内容一致
+    """
+    expected = memoryview(content)
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != len(expected):
+                return False
+            offset = 0
+            while offset < len(expected):
+                chunk = f.read(COMPARE_CHUNK_SIZE)
+                if not chunk or chunk != expected[offset : offset + len(chunk)]:
+                    return False
+                offset += len(chunk)
+            return not f.read(1)
+    except OSError:
+        return False
+
+
+def files_equal(first: Path, second: Path) -> bool:
+    """
+    逐块比较两个文件的内容
+
+    大小不同时只需 stat，不读取内容；否则同时读取两个文件并逐块比较。
+
+    Args:
+        first: 第一个文件
+        second: 第二个文件
+
+    Returns:
+        True 如果两个文件都存在且内容一致
+    """
+    try:
+        with open(first, "rb") as f1, open(second, "rb") as f2:
+            if os.fstat(f1.fileno()).st_size != os.fstat(f2.fileno()).st_size:
+                return False
+            while True:
+                chunk = f1.read(COMPARE_CHUNK_SIZE)
+                if chunk != f2.read(COMPARE_CHUNK_SIZE):
+                    return False
+                if not chunk:
+                    return True
+    except OSError:
+        return False
+
+
+def encode_text(content: str) -> bytes:
+    """按 Path.write_text 的方式编码文本 (UTF-8，换行符转换为平台换行符)"""
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode("utf-8")
+
+
+def backup_file(
+    target_path: Path,
+    backup_suffix: str = ".bak",
+    backup_snapshot: Optional[BackupSnapshot] = None,
+) -> Path:
+    """
+    在覆盖文件之前备份其当前内容
+
+    Args:
+        target_path: 要备份的文件
+        backup_suffix: 备份文件后缀（未提供快照时使用）
+        backup_snapshot: 备份快照（可选，提供时备份存入内容寻址备份库而非原文件旁）
+
+    Returns:
+        备份路径
+    """
+    if backup_snapshot is not None:
+        return backup_snapshot.add(target_path)
+
+    from datetime import datetime
+
+    timestamp = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
+    backup_path = target_path.parent / f"{target_path.name}{backup_suffix}.{timestamp}"
+    shutil.copy2(target_path, backup_path)
+    return backup_path
+
+
 def write_or_update_file(
-    target_path: Path, content: str, create_backup: bool = False, backup_suffix: str = ".bak"
+    target_path: Path,
+    content: str,
+    create_backup: bool = False,
+    backup_suffix: str = ".bak",
+    backup_snapshot: Optional[BackupSnapshot] = None,
 ) -> FileChange:
     """
     写入或更新文件,支持备份
@@ -77,6 +289,7 @@ def write_or_update_file(
         content: 文件内容
         create_backup: 是否为已存在文件创建备份
         backup_suffix: 备份文件后缀
+        backup_snapshot: 备份快照（可选，提供时备份存入内容寻址备份库而非原文件旁）
 
     Returns:
         FileChange 对象记录变更信息
@@ -91,30 +304,21 @@ def write_or_update_file(
     # 检查文件是否已存在
     file_exists = target_path.exists()
     backup_path = None
+    data = encode_text(content)
 
     if file_exists:
-        # 读取现有内容检查是否需要更新
-        try:
-            existing_content = target_path.read_text(encoding="utf-8")
-            if existing_content == content:
-                # 内容相同,跳过
-                return FileChange(
-                    path=target_path, change_type="skipped", message="内容相同,无需更新"
-                )
-        except Exception:
-            # 无法读取现有文件,继续覆盖
-            pass
+        # 按字节比较现有内容（先比较大小，再逐块比较），无需解码整个文件
+        if file_matches_content(target_path, data):
+            return FileChange(
+                path=target_path, change_type="skipped", message="内容相同,无需更新"
+            )
 
         # 创建备份
         if create_backup:
-            from datetime import datetime
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = target_path.parent / f"{target_path.name}{backup_suffix}.{timestamp}"
-            shutil.copy2(target_path, backup_path)
+            backup_path = backup_file(target_path, backup_suffix, backup_snapshot)
 
         # 写入新内容
-        target_path.write_text(content, encoding="utf-8")
+        target_path.write_bytes(data)
 
         return FileChange(
             path=target_path,
@@ -124,22 +328,49 @@ def write_or_update_file(
         )
     else:
         # 创建新文件
-        target_path.write_text(content, encoding="utf-8")
+        target_path.write_bytes(data)
 
         return FileChange(path=target_path, change_type="created", message="已创建")
 
 
 def copy_directory_tree(
-    source_dir: Path, target_dir: Path, overwrite: bool = False, create_backup: bool = False
+    source_dir: Path,
+    target_dir: Path,
+    overwrite: bool = False,
+    create_backup: bool = False,
+    manifest: Optional[TemplateManifest] = None,
+    state: Optional[DeployState] = None,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+    max_workers: int = DEFAULT_COPY_WORKERS,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    exclude: Optional[Set[str]] = None,
 ) -> ChangeSummary:
     """
     递归复制目录树
 
+    使用 os.scandir 一次性遍历源目录，每个目标目录只创建一次，
+    然后在有界线程池中并行处理各个文件，以掩盖网络文件系统上的单文件延迟。
+    变更记录按相对路径排序，结果与顺序执行一致。
+
+    同时提供模板清单和部署状态时，按以下规则增量处理已存在的目标文件:
+    - 模板未变化且目标文件未被修改 (stat 一致): 跳过，不读取任何内容
+    - 模板已更新且目标文件未被修改: 直接更新为新模板
+    - 目标文件内容与模板一致: 跳过并补记部署状态
+    - 其余情况 (用户修改过的文件): 按 overwrite 参数决定跳过或覆盖
+
+    不在清单中的源文件与已存在的目标文件逐块比较，内容相同时跳过，不再覆盖或备份。
+
     Args:
         source_dir: 源目录
         target_dir: 目标目录
         overwrite: 是否覆盖已存在文件
         create_backup: 覆盖时是否创建备份
+        manifest: 模板清单（可选，用于按元数据判断文件是否变化）
+        state: 项目部署状态（可选，复制后记录每个文件的部署状态）
+        backup_snapshot: 备份快照（可选，默认在目标文件旁生成 *.bak.<时间戳>）
+        max_workers: 并行复制的最大线程数（1 表示顺序执行）
+        deploy_mode: 部署模式 ("copy" 或 "auto"，见 fast_copy)
+        exclude: 不复制的条目（相对源目录的 POSIX 路径，目录整体跳过）
 
     Returns:
         ChangeSummary 包含所有文件变更记录
@@ -148,60 +379,248 @@ def copy_directory_tree(
         FileNotFoundError: 源目录不存在
         PermissionError: 无写权限
     """
-    if not source_dir.exists():
-        raise FileNotFoundError(f"源目录不存在: {source_dir}")
+    relative_dirs: List[str] = []
+    relative_files: List[str] = []
+
+    bundle_prefix = template_member(source_dir) if get_template_bundle() is not None else None
+    if bundle_prefix is not None and manifest is not None:
+        # 模板以归档分发时，从清单中列出目录树（归档中没有实际目录）
+        if not get_template_bundle().is_dir(bundle_prefix):
+            raise FileNotFoundError(f"源目录不存在: {source_dir}")
+        _list_manifest_tree(manifest, bundle_prefix, relative_dirs, relative_files, exclude or set())
+    else:
+        if not source_dir.exists():
+            raise FileNotFoundError(f"源目录不存在: {source_dir}")
 
-    if not source_dir.is_dir():
-        raise ValueError(f"源路径不是目录: {source_dir}")
+        if not source_dir.is_dir():
+            raise ValueError(f"源路径不是目录: {source_dir}")
 
-    summary = ChangeSummary(changes=[])
+        # 一次遍历源目录，收集所有文件和子目录
+        _scan_tree(source_dir, "", relative_dirs, relative_files, exclude or set())
 
-    # 递归遍历源目录
-    for source_file in source_dir.rglob("*"):
-        if source_file.is_file():
-            # 计算相对路径
-            relative_path = source_file.relative_to(source_dir)
-            target_file = target_dir / relative_path
+    summary = ChangeSummary()
 
-            # 确保目标目录存在
-            ensure_directory_exists(target_file.parent)
+    # 每个目标目录只创建一次
+    ensure_directory_exists(target_dir)
+    for relative_dir in relative_dirs:
+        (target_dir / relative_dir).mkdir(exist_ok=True)
+
+    def deploy(relative_path: str) -> _FileResult:
+        return _deploy_file(
+            source_dir / relative_path,
+            target_dir / relative_path,
+            overwrite,
+            create_backup,
+            manifest,
+            state,
+            backup_snapshot,
+            deploy_mode,
+        )
 
-            # 检查是否需要跳过
-            if target_file.exists() and not overwrite:
-                change = FileChange(
-                    path=target_file, change_type="skipped", message="文件已存在,跳过"
+    relative_files.sort()
+    if max_workers > 1 and len(relative_files) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(deploy, relative_files))
+    else:
+        results = [deploy(relative_path) for relative_path in relative_files]
+
+    # 在主线程中汇总结果并记录部署状态
+    for result in results:
+        for change in result.changes:
+            summary.add_change(change)
+        if state is not None and result.recorded_sha256 is not None:
+            state.record(result.path, result.recorded_sha256, result.stat_result)
+
+    return summary
+
+
+@dataclass
+class _FileResult:
+    """单个文件的复制结果（由工作线程返回）"""
+
+    path: Path
+    changes: List[FileChange]
+    recorded_sha256: Optional[str] = None
+    stat_result: Optional[os.stat_result] = None
+
+
+def _scan_tree(
+    directory: Path, prefix: str, dirs: List[str], files: List[str], exclude: Set[str]
+) -> None:
+    """
+    使用 os.scandir 递归收集目录下的所有文件和子目录（相对路径）
+
+    Args:
+        directory: 当前扫描的目录
+        prefix: 当前目录相对扫描根目录的路径前缀
+        dirs: 收集子目录相对路径（父目录在前）
+        files: 收集文件相对路径
+        exclude: 跳过的相对路径
+    """
+    with os.scandir(directory) as entries:
+        subdirs = []
+        for entry in entries:
+            relative_path = f"{prefix}{entry.name}"
+            if relative_path in exclude:
+                continue
+            if entry.is_dir():
+                dirs.append(relative_path)
+                subdirs.append((entry.path, relative_path))
+            elif entry.is_file():
+                files.append(relative_path)
+
+    for path, relative_path in subdirs:
+        _scan_tree(Path(path), f"{relative_path}/", dirs, files, exclude)
+
+
+def _list_manifest_tree(
+    manifest: TemplateManifest, prefix: str, dirs: List[str], files: List[str], exclude: Set[str]
+) -> None:
+    """
+    从模板清单中收集目录前缀下的所有文件和子目录（相对路径，与 _scan_tree 结果一致）
+
+    Args:
+        manifest: 模板清单
+        prefix: 目录前缀（相对模板根目录）
+        dirs: 收集子目录相对路径（父目录在前）
+        files: 收集文件相对路径
+        exclude: 跳过的相对路径（目录整体跳过）
+    """
+    seen_dirs: Set[str] = set()
+    for entry in manifest.iter_prefix(prefix):
+        relative_path = entry.path[len(prefix) + 1 :] if prefix else entry.path
+        parts = relative_path.split("/")
+        if any("/".join(parts[: index + 1]) in exclude for index in range(len(parts))):
+            continue
+
+        files.append(relative_path)
+        for index in range(1, len(parts)):
+            seen_dirs.add("/".join(parts[:index]))
+
+    dirs.extend(sorted(seen_dirs, key=lambda path: (path.count("/"), path)))
+
+
+def _deploy_file(
+    source_file: Path,
+    target_file: Path,
+    overwrite: bool,
+    create_backup: bool,
+    manifest: Optional[TemplateManifest],
+    state: Optional[DeployState],
+    backup_snapshot: Optional[BackupSnapshot],
+    deploy_mode: str,
+) -> _FileResult:
+    """
+    复制单个文件（在工作线程中执行，不修改共享状态）
+
+    Returns:
+        _FileResult 包含变更记录和待记录的部署状态
+    """
+    entry = manifest.entry_for(source_file) if manifest is not None else None
+    changes: List[FileChange] = []
+
+    try:
+        target_stat = target_file.stat()
+    except FileNotFoundError:
+        target_stat = None
+
+    if target_stat is not None:
+        if entry is not None and state is not None:
+            if state.is_current(target_file, entry.sha256, target_stat):
+                changes.append(
+                    FileChange(path=target_file, change_type="skipped", message="模板未变化,跳过")
                 )
-                summary.add_change(change)
-            else:
-                # 使用二进制模式复制文件（支持文本和二进制文件）
-                import shutil
-
-                # 创建备份（如果需要且目标文件存在）
-                if create_backup and target_file.exists():
-                    from datetime import datetime
-                    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                    backup_file = target_file.with_suffix(f"{target_file.suffix}.bak.{timestamp}")
-                    shutil.copy2(target_file, backup_file)
-
-                    change = FileChange(
-                        path=backup_file,
-                        change_type="backed_up",
-                        message=f"备份到 {backup_file.name}"
-                    )
-                    summary.add_change(change)
-
-                # 复制文件
-                shutil.copy2(source_file, target_file)
-
-                change_type = "updated" if target_file.exists() else "created"
-                change = FileChange(
-                    path=target_file,
-                    change_type=change_type,
-                    message="文件已复制"
+                return _FileResult(path=target_file, changes=changes)
+
+            # 模板已更新，但目标文件自上次部署后未被修改: 直接更新
+            replace = state.is_unmodified(target_file, target_stat)
+        else:
+            replace = False
+
+        if not replace and entry is not None and file_matches_digest(
+            target_file, entry.size, entry.sha256
+        ):
+            changes.append(
+                FileChange(path=target_file, change_type="skipped", message="内容相同,无需更新")
+            )
+            return _FileResult(
+                path=target_file,
+                changes=changes,
+                recorded_sha256=entry.sha256,
+                stat_result=target_stat,
+            )
+
+        if entry is None and files_equal(source_file, target_file):
+            # 不在清单中的源文件: 直接逐块比较内容
+            changes.append(
+                FileChange(path=target_file, change_type="skipped", message="内容相同,无需更新")
+            )
+            return _FileResult(path=target_file, changes=changes)
+
+        if not replace and not overwrite:
+            changes.append(
+                FileChange(path=target_file, change_type="skipped", message="文件已存在,跳过")
+            )
+            return _FileResult(path=target_file, changes=changes)
+
+        # 创建备份（如果需要）
+        if create_backup:
+            backup_file = _backup_file(target_file, backup_snapshot)
+            changes.append(
+                FileChange(
+                    path=backup_file,
+                    change_type="backed_up",
+                    backup_path=backup_file,
+                    message=f"备份到 {backup_file.name}",
                 )
-                summary.add_change(change)
+            )
+
+    # 按部署模式复制文件（支持文本和二进制文件）
+    strategy = copy_template_file(
+        source_file, target_file, deploy_mode, entry.sha256 if entry is not None else None
+    )
+
+    changes.append(
+        FileChange(
+            path=target_file,
+            change_type="created" if target_stat is None else "updated",
+            message="文件已复制",
+            strategy=strategy,
+        )
+    )
 
-    return summary
+    recorded_sha256 = None
+    if state is not None:
+        recorded_sha256 = entry.sha256 if entry is not None else compute_sha256(source_file)
+
+    return _FileResult(
+        path=target_file,
+        changes=changes,
+        recorded_sha256=recorded_sha256,
+        stat_result=target_file.stat() if recorded_sha256 is not None else None,
+    )
+
+
+def _backup_file(target_file: Path, backup_snapshot: Optional[BackupSnapshot]) -> Path:
+    """
+    备份即将被覆盖的文件
+
+    Args:
+        target_file: 待备份文件
+        backup_snapshot: 备份快照；为 None 时在原文件旁生成 *.bak.<时间戳>
+
+    Returns:
+        备份文件路径
+    """
+    from datetime import datetime
+
+    if backup_snapshot is not None:
+        return backup_snapshot.add(target_file)
+
+    timestamp = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
+    backup_file = target_file.with_suffix(f"{target_file.suffix}.bak.{timestamp}")
+    shutil.copy2(target_file, backup_file)
+    return backup_file
 
 
 def is_empty_directory(path: Path) -> bool:
@@ -325,7 +744,7 @@ def backup_directory_with_timestamp(
     # 生成时间戳 YYYYMMDD-HHMMSS
     from datetime import datetime
 
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    timestamp = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
     backup_dir_name = f"{prefix}.{timestamp}"
     backup_path = backup_base_dir / backup_dir_name
 
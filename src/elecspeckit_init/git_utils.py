@@ -8,6 +8,8 @@ import subprocess
 from pathlib import Path
 from typing import Optional, Tuple
 
+from .events import emit_event
+
 
 def is_git_available() -> bool:
     """
@@ -65,12 +67,15 @@ def initialize_git_repo(
         )
 
         if result.returncode != 0:
+            emit_event("git", step="init", status="error", message=result.stderr.strip())
             return False, f"git init 失败: {result.stderr}"
+        emit_event("git", step="init", status="success")
 
         # 添加所有文件
-        subprocess.run(
+        result = subprocess.run(
             ["git", "add", "."], cwd=base_dir, capture_output=True, text=True, timeout=10
         )
+        emit_event("git", step="add", status="success" if result.returncode == 0 else "error")
 
         # 创建初始提交
         commit_msg = initial_commit_message or "Initial ElecSpeckit project setup"
@@ -83,7 +88,9 @@ def initialize_git_repo(
         )
 
         if result.returncode != 0:
+            emit_event("git", step="commit", status="error", message=result.stderr.strip())
             return True, "git 仓库已初始化 (未创建提交)"
+        emit_event("git", step="commit", status="success")
 
         return True, "git 仓库已初始化并创建初始提交"
 
@@ -0,0 +1,277 @@
+"""
+项目结构迁移
+
+项目的结构版本记录在 .elecspecify/state/schema.json 中。升级时按版本顺序只执行
+记录版本之后注册的迁移步骤，每步完成后立即写回版本号，因此每个步骤对每个项目
+只执行一次；版本已是最新的项目只需读取一次记录文件，不再探测任何特征文件。
+
+没有版本记录的已有项目 (在引入版本记录之前部署) 只在第一次升级时根据特征文件
+推断起始版本，之后以记录为准。
+
+迁移步骤修改或删除的文件先存入备份库快照 (label 为 "migrate")。
+
+Examples:
+    >>> @migration(2, "将旧配置转换为新格式")
+    ... def _convert_config(base_dir: Path, snapshot: BackupSnapshot) -> List[str]:
+    ...     return []  # 返回修改或删除的文件 (相对项目根目录)
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .backup_store import BackupSnapshot, BackupStore
+from .deploy_state import STATE_DIR, DeployState
+from .template_bundle import TEMPLATE_ROOT, copy_template_file, read_template_bytes
+from .template_manifest import compute_sha256
+
+# 结构版本记录文件名
+SCHEMA_FILENAME = "schema.json"
+
+# 记录文件格式版本
+SCHEMA_FORMAT_VERSION = 1
+
+# v0.1.0 项目 (kb_config 知识源配置) 的结构版本
+V010_SCHEMA_VERSION = 0
+
+# 引入版本记录之前部署的 v0.2.x 项目的结构版本
+LEGACY_SCHEMA_VERSION = 1
+
+# v0.1.0 特征文件（按优先级顺序, per A8澄清）
+V010_FEATURE_FILES = [
+    Path(".claude") / "commands" / "elecspeckit.kbconfig.md",
+    Path(".qwen") / "commands" / "elecspeckit.kbconfig.toml",
+    Path(".elecspecify") / "memory" / "knowledge-sources.json",
+]
+
+# 项目中 skillconfig 脚本的位置（相对项目根目录 / 模板根目录）
+SKILLCONFIG_SCRIPTS_DIR = Path(".elecspecify") / "scripts" / "win" / "python"
+SKILLCONFIG_SCRIPTS_TEMPLATE = Path("elecspecify") / "scripts" / "win" / "python"
+
+# 引入 skillconfig_lib 之前发布的 skillconfig 脚本模板的 SHA-256 (脚本名 -> 各版本哈希)。
+# 这些版本没有部署记录，升级时内容与新模板不同而被当作用户修改跳过；
+# 与其中任一哈希一致的脚本是未经修改的旧模板，可以安全替换。
+LEGACY_SKILLCONFIG_SCRIPT_HASHES = {
+    "skillconfig_disable.py": {
+        "1b7f1bbe48f2e08d281f2637ade2ce225c03e4f9256398c0ec5b6138e0c3c574",
+        "95c8c94ea75ea2035ddb1ef0bde4d4314b7f2cc30bad80de4a52a0be956f8f20",
+    },
+    "skillconfig_enable.py": {
+        "ca1f6ee42655942ec915387896b68c9f7a951ba747893fa4ee843f32a55d42ab",
+        "e97b7cb786245021a7eb091b6537763a2a03325040beb7646ce261e981be5678",
+    },
+    "skillconfig_list.py": {
+        "cc3c5a69ef336bd8e23d9604d2472c57f7a953477f0b34f8f93879c424c842e8",
+        "b23e360f3576778ffae459db0025bbb5653ff09c8f35d66029a6f943f3e6dece",
+    },
+    "skillconfig_update.py": {
+        "a8f90459d92de1d09a5955c3184b7c298e75a4f410e069cf8a7b1c72cdc8ee9a",
+    },
+    "skillconfig_validate.py": {
+        "2772a9e902ca07ac3b14c77f2332c5ca8830be7e8851fa4b768d753cc0e46161",
+        "2116c3ea0ed9af110f57fb31697f79dac4806fe26ae325f4340dcae8752e9fe4",
+    },
+}
+
+MigrationFunc = Callable[[Path, BackupSnapshot], List[str]]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """单个迁移步骤"""
+
+    version: int  # 执行后项目的结构版本
+    description: str
+    apply: MigrationFunc = field(repr=False, compare=False)
+
+
+@dataclass
+class MigrationReport:
+    """一次迁移的执行结果"""
+
+    from_version: int
+    to_version: int
+    applied: List[dict] = field(default_factory=list)  # 已执行 (或 dry_run 时待执行) 的步骤
+    detected: bool = False  # 起始版本是否由特征文件推断 (项目尚无版本记录)
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典"""
+        return {
+            "from_version": self.from_version,
+            "to_version": self.to_version,
+            "applied": self.applied,
+            "detected": self.detected,
+        }
+
+
+# 已注册的迁移步骤（按版本递增）
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str) -> Callable[[MigrationFunc], MigrationFunc]:
+    """
+    注册迁移步骤的装饰器
+
+    被装饰的函数接收项目根目录和备份快照，修改或删除文件前应先调用 snapshot.add()，
+    返回修改或删除的文件列表 (相对项目根目录的 POSIX 路径)。
+
+    Args:
+        version: 执行后项目的结构版本（必须大于已注册的所有版本）
+        description: 步骤说明
+
+    Raises:
+        ValueError: 版本号未递增
+    """
+
+    def register(func: MigrationFunc) -> MigrationFunc:
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"迁移版本必须递增: {version} <= {MIGRATIONS[-1].version}")
+        MIGRATIONS.append(Migration(version=version, description=description, apply=func))
+        return func
+
+    return register
+
+
+def get_schema_version() -> int:
+    """当前版本部署的项目结构版本（最后一个迁移步骤的版本）"""
+    return MIGRATIONS[-1].version if MIGRATIONS else V010_SCHEMA_VERSION
+
+
+def get_schema_path(base_dir: Path) -> Path:
+    """结构版本记录文件路径"""
+    return base_dir / STATE_DIR / SCHEMA_FILENAME
+
+
+def read_schema_version(base_dir: Path) -> Optional[int]:
+    """
+    读取项目记录的结构版本
+
+    Returns:
+        结构版本；没有记录或记录无效时返回 None
+    """
+    try:
+        data = json.loads(get_schema_path(base_dir).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("format") != SCHEMA_FORMAT_VERSION:
+        return None
+    version = data.get("schema_version")
+    return version if isinstance(version, int) else None
+
+
+def write_schema_version(base_dir: Path, version: int) -> None:
+    """写入项目的结构版本记录"""
+    path = get_schema_path(base_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps({"format": SCHEMA_FORMAT_VERSION, "schema_version": version}, indent=1) + "\n",
+        encoding="utf-8",
+    )
+    os.replace(temp_path, path)
+
+
+def detect_schema_version(base_dir: Path) -> int:
+    """
+    根据特征文件推断没有版本记录的已有项目的结构版本
+
+    Args:
+        base_dir: 项目根目录
+
+    Returns:
+        存在 v0.1.0 特征文件时为 V010_SCHEMA_VERSION，否则为 LEGACY_SCHEMA_VERSION
+    """
+    for feature_file in V010_FEATURE_FILES:
+        if (base_dir / feature_file).exists():
+            return V010_SCHEMA_VERSION
+    return LEGACY_SCHEMA_VERSION
+
+
+def pending_migrations(version: int) -> List[Migration]:
+    """获取结构版本 version 之后待执行的迁移步骤（按版本顺序）"""
+    return [step for step in MIGRATIONS if step.version > version]
+
+
+def run_migrations(base_dir: Path, dry_run: bool = False) -> MigrationReport:
+    """
+    执行项目待执行的迁移步骤并记录结构版本
+
+    Args:
+        base_dir: 项目根目录
+        dry_run: 只计算待执行的步骤，不修改任何文件
+
+    Returns:
+        MigrationReport 对象
+    """
+    recorded = read_schema_version(base_dir)
+    version = recorded if recorded is not None else detect_schema_version(base_dir)
+    report = MigrationReport(from_version=version, to_version=version, detected=recorded is None)
+
+    for step in pending_migrations(version):
+        files: List[str] = []
+        if not dry_run:
+            snapshot = BackupStore(base_dir).begin_snapshot("migrate")
+            files = step.apply(base_dir, snapshot)
+            snapshot.commit()
+            write_schema_version(base_dir, step.version)
+        report.to_version = step.version
+        report.applied.append(
+            {"version": step.version, "description": step.description, "files": files}
+        )
+
+    if not dry_run and recorded is None and not report.applied:
+        write_schema_version(base_dir, report.to_version)
+
+    return report
+
+
+@migration(LEGACY_SCHEMA_VERSION, "移除 v0.1.0 的 kb_config 知识源配置 (已由 Claude Skills 取代)")
+def _remove_kb_config(base_dir: Path, snapshot: BackupSnapshot) -> List[str]:
+    """备份后删除 kbconfig 命令模板、knowledge-sources.json 和 kbconfig 脚本"""
+    candidates = [base_dir / feature_file for feature_file in V010_FEATURE_FILES]
+    scripts_dir = base_dir / ".elecspecify" / "scripts"
+    if scripts_dir.is_dir():
+        candidates.extend(sorted(scripts_dir.rglob("kbconfig_*.py")))
+
+    removed: List[str] = []
+    for path in candidates:
+        if path.is_file() and not path.is_symlink():
+            snapshot.add(path)
+            path.unlink()
+            removed.append(path.relative_to(base_dir).as_posix())
+    return removed
+
+
+@migration(2, "将未修改的旧版 skillconfig 脚本替换为基于 skillconfig_lib 的版本")
+def _replace_legacy_skillconfig_scripts(base_dir: Path, snapshot: BackupSnapshot) -> List[str]:
+    """
+    备份后用当前模板替换内容与已发布旧模板一致的 skillconfig 脚本，并记录部署状态
+
+    旧脚本没有部署记录，按普通升级规则会被当作用户修改而保留，而同一次升级写入的
+    命令模板已改为调用新脚本，旧脚本也不遵循配置锁、写入计数和 Skills 索引协议。
+    用户修改过的脚本 (哈希不在已知列表中) 保持不变。
+    """
+    scripts_dir = base_dir / SKILLCONFIG_SCRIPTS_DIR
+    state = DeployState.load(base_dir)
+    replaced: List[str] = []
+
+    for name, legacy_hashes in sorted(LEGACY_SKILLCONFIG_SCRIPT_HASHES.items()):
+        path = scripts_dir / name
+        if not path.is_file() or path.is_symlink():
+            continue
+        if compute_sha256(path) not in legacy_hashes:
+            continue
+
+        source = TEMPLATE_ROOT / SKILLCONFIG_SCRIPTS_TEMPLATE / name
+        snapshot.add(path)
+        copy_template_file(source, path)
+        state.record(path, hashlib.sha256(read_template_bytes(source)).hexdigest())
+        replaced.append(path.relative_to(base_dir).as_posix())
+
+    if replaced:
+        state.save()
+    return replaced
@@ -13,6 +13,9 @@ import sys
 from pathlib import Path
 from typing import Optional
 
+# 无法查询文件系统时假定的分配块大小
+DEFAULT_BLOCK_SIZE = 4096
+
 
 def get_platform() -> str:
     """
@@ -141,29 +144,59 @@ def write_text_file(file_path: str | Path, content: str, encoding: str = 'utf-8'
         set_file_permissions(path, mode=0o600)
 
 
-def check_disk_space(path: str | Path, required_mb: int = 100) -> tuple[bool, int]:
+def check_disk_space(
+    path: str | Path, required_mb: int = 100, required_bytes: Optional[int] = None
+) -> tuple[bool, int]:
     """
     FR-047: 检查磁盘剩余空间
 
     Args:
         path: 检查路径（通常是项目根目录）
         required_mb: 需要的最小空间（MB）
+        required_bytes: 需要的最小空间（字节，指定时代替 required_mb，
+            通常来自 deploy_plan.estimate_disk_usage）
 
     Returns:
         (是否足够, 实际剩余空间MB)
     """
     path = Path(path)
+    if required_bytes is None:
+        required_bytes = required_mb * 1024 * 1024
 
     try:
         stat = shutil.disk_usage(path)
         free_mb = stat.free // (1024 * 1024)
 
-        return free_mb >= required_mb, free_mb
+        return stat.free >= required_bytes, free_mb
     except OSError as e:
         print(f"警告: 无法检查磁盘空间: {e}", file=sys.stderr)
         return True, 0  # 无法检查时假设足够
 
 
+def get_allocation_block_size(path: str | Path) -> int:
+    """
+    获取路径所在文件系统的分配块大小
+
+    Args:
+        path: 检查路径（不存在时使用最近的已存在上级目录）
+
+    Returns:
+        分配块字节数；无法获取时 (如 Windows) 返回 4096
+    """
+    path = Path(path)
+    while not path.exists() and path != path.parent:
+        path = path.parent
+
+    if hasattr(os, "statvfs"):
+        try:
+            block_size = os.statvfs(path).f_frsize
+            if block_size > 0:
+                return block_size
+        except OSError:
+            pass
+    return DEFAULT_BLOCK_SIZE
+
+
 def check_python_dependency(package: str, min_version: Optional[str] = None) -> tuple[bool, Optional[str]]:
     """
     FR-048: 检查 Python 依赖库是否安装
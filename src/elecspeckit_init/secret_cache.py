@@ -0,0 +1,169 @@
+"""
+API 密钥的批量读取和进程内缓存
+
+crypto_utils 在 Linux/macOS 上把 API 密钥存入系统 keyring (服务名 ElecSpeckit，
+账户名为 Skill 名称)。逐个调用 keyring.get_password 时，Secret Service 后端每次
+都会新建 D-Bus 连接、打开会话并查找集合，单次即需数十毫秒。
+
+SecretResolver 在一次批量读取中取得所有 ElecSpeckit 密钥 (Secret Service 后端
+只连接一次、按服务属性一次搜索全部条目；其他后端复用同一个后端对象逐个读取)，
+并在进程内按 TTL 缓存，支持显式失效。
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+# keyring 服务名（与 crypto_utils 写入时一致）
+KEYRING_SERVICE = "ElecSpeckit"
+
+# 缓存条目默认有效期（秒）
+DEFAULT_SECRET_TTL = 300.0
+
+
+@lru_cache(maxsize=None)
+def get_keyring():
+    """
+    导入 keyring 模块（每个进程只导入一次）
+
+    Raises:
+        RuntimeError: 未安装 keyring
+    """
+    try:
+        import keyring
+    except ImportError:
+        raise RuntimeError(
+            "读取 API 密钥需要 keyring 库，请运行: uv pip install keyring\n"
+            "Linux 上还需安装 libsecret: sudo apt install libsecret-1-0 (Ubuntu/Debian)"
+        ) from None
+    return keyring
+
+
+def fetch_keyring_secrets(accounts: Iterable[str]) -> Dict[str, str]:
+    """
+    一次批量读取 keyring 中的 ElecSpeckit 密钥
+
+    Secret Service 后端只打开一次集合，按服务属性搜索出所有 ElecSpeckit 条目
+    (返回全部条目，不限于 accounts)；搜索失败或其他后端时，用同一个后端对象逐个读取。
+
+    Args:
+        accounts: 需要的账户名 (Skill 名称)
+
+    Returns:
+        {账户名: 密钥}，只包含找到的账户（Secret Service 后端时包含所有 ElecSpeckit 条目）
+
+    Raises:
+        RuntimeError: 未安装 keyring 或 keyring 读取失败
+    """
+    wanted = set(accounts)
+    if not wanted:
+        return {}
+
+    backend = get_keyring().get_keyring()
+    secrets: Dict[str, str] = {}
+
+    get_collection = getattr(backend, "get_preferred_collection", None)
+    if get_collection is not None:
+        try:
+            collection = get_collection()
+            if collection.is_locked():
+                collection.unlock()
+            for item in collection.search_items({"service": KEYRING_SERVICE}):
+                account = item.get_attributes().get("username")
+                if account and account not in secrets:
+                    secrets[account] = item.get_secret().decode("utf-8")
+            return secrets
+        except Exception:
+            secrets = {}
+
+    try:
+        for account in wanted:
+            value = backend.get_password(KEYRING_SERVICE, account)
+            if value is not None:
+                secrets[account] = value
+    except Exception as e:
+        raise RuntimeError(f"keyring 读取失败: {e}") from e
+    return secrets
+
+
+class SecretResolver:
+    """
+    带 TTL 的进程内密钥缓存
+
+    缓存未命中或过期的账户在一次批量读取中取得，批量读取顺带返回的其他账户一并缓存；
+    keyring 中不存在的账户同样缓存 (值为 None)，TTL 内不再重复查询。
+
+    Examples:
+        >>> resolver = SecretResolver(ttl=60)
+        >>> resolver.get_many(["perplexity-search", "mouser-component-search"])
+        {'perplexity-search': 'pplx-...', 'mouser-component-search': None}
+        >>> resolver.invalidate(["perplexity-search"])
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_SECRET_TTL,
+        fetch: Callable[[Iterable[str]], Dict[str, str]] = fetch_keyring_secrets,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self._fetch = fetch
+        self._clock = clock
+        self._entries: Dict[str, tuple] = {}  # 账户名 -> (密钥或 None, 过期时间)
+        self._lock = threading.Lock()
+
+    def get_many(self, accounts: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        获取多个账户的密钥
+
+        Returns:
+            {账户名: 密钥}，keyring 中不存在的账户为 None
+
+        Raises:
+            RuntimeError: keyring 读取失败
+        """
+        accounts = list(dict.fromkeys(accounts))
+        with self._lock:
+            now = self._clock()
+            missing: List[str] = [
+                account
+                for account in accounts
+                if account not in self._entries or self._entries[account][1] <= now
+            ]
+            if missing:
+                fetched = self._fetch(missing)
+                expires = self._clock() + self.ttl
+                for account, value in fetched.items():
+                    self._entries[account] = (value, expires)
+                for account in missing:
+                    if account not in fetched:
+                        self._entries[account] = (None, expires)
+            return {account: self._entries[account][0] for account in accounts}
+
+    def get(self, account: str) -> Optional[str]:
+        """获取单个账户的密钥（不存在时为 None）"""
+        return self.get_many([account])[account]
+
+    def invalidate(self, accounts: Optional[Iterable[str]] = None) -> None:
+        """使指定账户（未指定时为全部）的缓存失效"""
+        with self._lock:
+            if accounts is None:
+                self._entries.clear()
+            else:
+                for account in accounts:
+                    self._entries.pop(account, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_resolver: Optional[SecretResolver] = None
+
+
+def get_secret_resolver() -> SecretResolver:
+    """获取进程内共享的 SecretResolver"""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = SecretResolver()
+    return _default_resolver
@@ -0,0 +1,184 @@
+"""
+skill_config.json 并发写入保护
+
+多个进程 (elecspeckit 升级、多个 Agent 会话中运行的 skillconfig 脚本) 可能同时修改
+同一个 skill_config.json。所有写入方遵循同一协议:
+
+- 读取、修改和写回期间持有 .elecspecify/state/skill_config.json.lock 上的排他 advisory 锁
+  (POSIX 为 fcntl.flock，Windows 为 msvcrt.locking)，并发写入方排队执行而不是互相覆盖；
+  锁文件属于本机状态，不放在随项目提交的 memory 目录中
+- 配置顶层的 "generation" 计数在每次写入时加一；写回前确认磁盘上的计数仍是读取时的值
+  (compare-and-swap)，未遵循协议的写入 (如手工编辑) 会被发现而不是被静默覆盖
+
+项目中的 skillconfig 脚本 (skillconfig_lib.py) 实现相同的协议。
+
+Examples:
+    >>> with skill_config_lock(config_file):
+    ...     config = json.loads(config_file.read_text(encoding="utf-8"))
+    ...     config["skills"]["meta"]["skill-creator"]["enabled"] = False
+    ...     write_skill_config(config_file, config, expected_generation=get_generation(config))
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .deploy_state import STATE_DIR
+
+# 配置中的写入计数字段
+GENERATION_KEY = "generation"
+
+# 锁文件后缀（锁文件位于 .elecspecify/state，文件名为配置文件名加后缀）
+LOCK_SUFFIX = ".lock"
+
+# Windows 上等待锁的重试间隔（秒）
+_WINDOWS_LOCK_RETRY = 0.05
+
+
+class ConfigConflictError(RuntimeError):
+    """配置文件在读取后被未持有锁的写入方修改"""
+
+    def __init__(self, config_file: Path, expected: int, actual: Optional[int]):
+        super().__init__(
+            f"{config_file} 已被其他进程修改 (generation {expected} → {actual})"
+        )
+        self.config_file = config_file
+        self.expected = expected
+        self.actual = actual
+
+
+def get_lock_path(config_file: Path) -> Path:
+    """
+    配置文件的锁文件路径
+
+    .elecspecify/memory/skill_config.json 的锁文件为 .elecspecify/state/skill_config.json.lock
+    """
+    return config_file.parent.parent / STATE_DIR.name / (config_file.name + LOCK_SUFFIX)
+
+
+def _remove_legacy_lock(config_file: Path) -> None:
+    """删除旧版本在配置文件同目录创建的锁文件（失败时忽略）"""
+    try:
+        config_file.with_name(config_file.name + LOCK_SUFFIX).unlink()
+    except OSError:
+        pass
+
+
+@contextmanager
+def skill_config_lock(config_file: Path) -> Iterator[None]:
+    """
+    持有配置文件的排他锁（阻塞等待其他写入方释放）
+
+    锁随文件描述符关闭自动释放，进程异常退出时不会残留。
+
+    Args:
+        config_file: skill_config.json 路径
+    """
+    lock_path = get_lock_path(config_file)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    _remove_legacy_lock(config_file)
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(_WINDOWS_LOCK_RETRY)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def get_generation(config: dict) -> int:
+    """配置的写入计数（没有计数的旧配置为 0）"""
+    generation = config.get(GENERATION_KEY, 0)
+    return generation if isinstance(generation, int) else 0
+
+
+def read_generation(config_file: Path) -> Optional[int]:
+    """
+    读取磁盘上配置的写入计数
+
+    Returns:
+        写入计数；文件不存在时返回 None，无法解析时返回 -1
+    """
+    try:
+        return get_generation(json.loads(config_file.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, AttributeError):
+        return -1
+
+
+def next_generation(config: dict, expected_generation: int) -> dict:
+    """返回写入计数为 expected_generation + 1 的配置副本（计数位于 version 之后）"""
+    updated = {}
+    for key, value in config.items():
+        if key != GENERATION_KEY:
+            updated[key] = value
+        if key == "version":
+            updated[GENERATION_KEY] = expected_generation + 1
+    updated.setdefault(GENERATION_KEY, expected_generation + 1)
+    return updated
+
+
+def check_generation(config_file: Path, expected_generation: int) -> None:
+    """
+    确认磁盘上配置的写入计数仍为 expected_generation（调用方应持有锁）
+
+    Raises:
+        ConfigConflictError: 计数不一致
+    """
+    actual = read_generation(config_file)
+    if actual is not None and actual != expected_generation:
+        raise ConfigConflictError(config_file, expected_generation, actual)
+
+
+def write_skill_config(config_file: Path, config: dict, expected_generation: int) -> dict:
+    """
+    以 compare-and-swap 方式写回配置（调用方应持有 skill_config_lock）
+
+    先确认磁盘上的写入计数未变化，再将计数加一后写入同目录临时文件并原子替换。
+
+    Args:
+        config_file: skill_config.json 路径
+        config: 新配置
+        expected_generation: 读取配置时的写入计数
+
+    Returns:
+        实际写入的配置（含新的写入计数）
+
+    Raises:
+        ConfigConflictError: 配置在读取后被未持有锁的写入方修改
+    """
+    check_generation(config_file, expected_generation)
+    updated = next_generation(config, expected_generation)
+
+    temp_file = config_file.with_name(f".{config_file.name}.{os.getpid()}.tmp")
+    try:
+        temp_file.write_text(json.dumps(updated, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(temp_file, config_file)
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+    return updated
@@ -0,0 +1,401 @@
+"""
+共享的用户级 Skills 缓存
+
+部署模式 "link" 下，每个包版本的 Skills 模板只解包一次到用户缓存目录
+(如 ~/.cache/elecspeckit/skills/<版本>-<清单摘要>/)，项目中的
+.claude/skills/<名称> 只是指向缓存的符号链接 (Windows 上无法创建符号链接时使用目录联接)。
+部署只需创建或替换链接，不复制任何文件内容。
+
+缓存文件为只读 (0444)，目录为只读 (0555)。需要修改某个 Skill 时 (skillconfig 脚本重命名 SKILL.md、
+写入 API 密钥，或以其他部署模式重新运行 init)，先将该 Skill 的链接替换为
+私有副本，再在副本中修改 (按 Skill 目录粒度写时复制)。
+
+链接是指向本机用户缓存的绝对路径，项目被移动、提交到版本库或由其他用户打开时都会失效，
+因此 Skills 目录的 .gitignore 中维护一个片段，列出所有指向缓存的链接。
+"""
+
+import hashlib
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .deploy_state import DeployState
+from .fast_copy import STRATEGY_SYMLINK
+from .fs_utils import FileChange
+from .template_bundle import copy_template_file
+from .template_manifest import TemplateManifest, compute_sha256
+
+# Skills 模板目录（相对模板根目录）
+SKILLS_TEMPLATE_PREFIX = "elecspecify/skills"
+
+# Skills 目录 .gitignore 中由 elecspeckit 维护的链接列表片段
+GITIGNORE_BEGIN = "# >>> elecspeckit: links to the per-user skills cache >>>"
+GITIGNORE_END = "# <<< elecspeckit: links to the per-user skills cache <<<"
+
+
+def get_skills_cache_root() -> Path:
+    """
+    获取用户级 Skills 缓存根目录
+
+    Returns:
+        缓存根目录路径（如 ~/.cache/elecspeckit/skills）
+    """
+    from platformdirs import user_cache_dir
+
+    return Path(user_cache_dir("elecspeckit", appauthor=False)) / "skills"
+
+
+def get_skills_cache_key(manifest: TemplateManifest) -> str:
+    """
+    计算当前包版本的缓存目录名
+
+    由包版本和 Skills 模板清单摘要组成，开发环境中模板变化而版本号不变时也会使用新目录。
+
+    Returns:
+        缓存目录名（如 "0.2.1-3f2a9c1b4d5e"）
+    """
+    from elecspeckit_init import __version__
+
+    digest = hashlib.sha256()
+    for entry in sorted(manifest.iter_prefix(SKILLS_TEMPLATE_PREFIX), key=lambda e: e.path):
+        digest.update(f"{entry.path}\0{entry.sha256}\n".encode("utf-8"))
+    return f"{__version__}-{digest.hexdigest()[:12]}"
+
+
+def ensure_skills_cache(manifest: TemplateManifest) -> Path:
+    """
+    确保当前版本的 Skills 已解包到用户缓存目录
+
+    先解包到临时目录并逐个校验 SHA-256，文件和目录均设为只读后再一次重命名为版本目录；
+    多个进程同时解包时只保留先完成的一份。
+
+    Args:
+        manifest: 模板清单
+
+    Returns:
+        当前版本的缓存目录（其下每个子目录为一个 Skill）
+
+    Raises:
+        OSError: 无法写入缓存目录
+        ValueError: 模板文件与清单不一致
+    """
+    cache_dir = get_skills_cache_root() / get_skills_cache_key(manifest)
+    if cache_dir.is_dir():
+        return cache_dir
+
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    temp_dir = cache_dir.with_name(f".{cache_dir.name}.{os.getpid()}.tmp")
+    if temp_dir.exists():
+        _remove_tree(temp_dir)
+
+    try:
+        for entry in manifest.iter_prefix(SKILLS_TEMPLATE_PREFIX):
+            relative_path = entry.path[len(SKILLS_TEMPLATE_PREFIX) + 1 :]
+            if "/" not in relative_path:
+                # 顶层文件 (README.md) 仍按普通方式部署
+                continue
+
+            target = temp_dir / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            copy_template_file(manifest.root / entry.path, target)
+
+            if compute_sha256(target) != entry.sha256:
+                raise ValueError(f"模板文件与清单不一致: {entry.path}")
+            os.chmod(target, 0o444)
+
+        for directory, _dirnames, _filenames in os.walk(temp_dir, topdown=False):
+            os.chmod(directory, 0o555)
+
+        try:
+            os.rename(temp_dir, cache_dir)
+        except OSError:
+            if not cache_dir.is_dir():
+                raise
+            # 其他进程已完成解包
+            _remove_tree(temp_dir)
+    except BaseException:
+        if temp_dir.exists():
+            _remove_tree(temp_dir)
+        raise
+
+    return cache_dir
+
+
+def link_skills(
+    skills_target_dir: Path,
+    skill_names: List[str],
+    manifest: TemplateManifest,
+    state: Optional[DeployState] = None,
+) -> Tuple[List[FileChange], List[str]]:
+    """
+    将 Skills 部署为指向用户缓存的链接
+
+    - 不存在的 Skill: 创建链接
+    - 指向旧版本缓存的链接: 原子替换为指向当前版本的链接
+    - 私有副本目录: 全部文件均为未修改的模板副本时替换为链接并移除部署记录，
+      否则保留为私有副本（由调用方按复制方式升级）
+
+    Args:
+        skills_target_dir: Skills 目标目录（如 .claude/skills）
+        skill_names: 需要链接的 Skill 名称
+        manifest: 模板清单
+        state: 项目部署状态（可选，用于判断私有副本是否被修改）
+
+    Returns:
+        (变更记录列表, 保留为私有副本的 Skill 名称列表) 元组
+
+    Raises:
+        OSError: 无法创建缓存目录
+    """
+    cache_dir = ensure_skills_cache(manifest)
+    skills_target_dir.mkdir(parents=True, exist_ok=True)
+
+    changes: List[FileChange] = []
+    private_skills: List[str] = []
+
+    for skill_name in skill_names:
+        target = skills_target_dir / skill_name
+        source = cache_dir / skill_name
+
+        if is_link(target):
+            if _link_destination(target) == source:
+                changes.append(
+                    FileChange(path=target, change_type="skipped", message="链接已是最新")
+                )
+                continue
+            change_type, message = "updated", "已更新链接"
+        elif target.exists():
+            if not _is_pristine_copy(target, state):
+                private_skills.append(skill_name)
+                continue
+            change_type, message = "updated", "已替换为链接"
+        else:
+            change_type, message = "created", "已创建链接"
+
+        temp_link = skills_target_dir / f".{skill_name}.link"
+        _remove_path(temp_link)
+        if not _create_link(source, temp_link):
+            # 平台或文件系统不支持链接，退回私有副本
+            private_skills.append(skill_name)
+            continue
+
+        if change_type == "updated" and not is_link(target):
+            if state is not None:
+                for file_path in _iter_files(target):
+                    state.forget(file_path)
+            retired = skills_target_dir / f".{skill_name}.retired"
+            _remove_path(retired)
+            os.replace(target, retired)
+            os.replace(temp_link, target)
+            _remove_tree(retired)
+        else:
+            _replace_link(temp_link, target)
+
+        changes.append(
+            FileChange(
+                path=target, change_type=change_type, message=message, strategy=STRATEGY_SYMLINK
+            )
+        )
+
+    update_links_gitignore(skills_target_dir)
+    return changes, private_skills
+
+
+def unshare_skill(skill_dir: Path) -> bool:
+    """
+    将指向缓存的 Skill 链接替换为私有副本（写时复制）
+
+    Args:
+        skill_dir: .claude/skills/<名称>
+
+    Returns:
+        True 如果已替换；不是链接时返回 False
+    """
+    if not is_link(skill_dir):
+        return False
+
+    temp_dir = skill_dir.with_name(f".{skill_dir.name}.unshare")
+    if temp_dir.exists():
+        _remove_tree(temp_dir)
+
+    shutil.copytree(skill_dir, temp_dir, copy_function=shutil.copyfile)
+    # copytree 会复制缓存目录的只读权限
+    for directory, _dirnames, _filenames in os.walk(temp_dir):
+        os.chmod(directory, 0o755)
+    _remove_path(skill_dir)
+    os.replace(temp_dir, skill_dir)
+    return True
+
+
+def unshare_skills(skills_target_dir: Path) -> List[FileChange]:
+    """
+    将目录下所有指向缓存的 Skill 链接替换为私有副本
+
+    以其他部署模式重新部署时调用，避免通过链接改写共享缓存；
+    指向缓存以外位置的链接（用户自行创建）保持不变。
+
+    Returns:
+        每个被替换的 Skill 的变更记录
+    """
+    changes: List[FileChange] = []
+    if not skills_target_dir.is_dir():
+        return changes
+
+    cache_root = get_skills_cache_root()
+    with os.scandir(skills_target_dir) as entries:
+        for entry in entries:
+            skill_dir = Path(entry.path)
+            destination = _link_destination(skill_dir) if is_link(skill_dir) else None
+            if destination is None or not destination.is_relative_to(cache_root):
+                continue
+            if unshare_skill(skill_dir):
+                changes.append(
+                    FileChange(path=skill_dir, change_type="updated", message="已替换为私有副本")
+                )
+
+    if changes:
+        update_links_gitignore(skills_target_dir)
+    return changes
+
+
+def update_links_gitignore(skills_target_dir: Path) -> None:
+    """
+    在 Skills 目录的 .gitignore 中列出所有指向用户缓存的链接
+
+    链接指向本机缓存的绝对路径，提交到版本库后在其他机器上无法使用。片段位于
+    GITIGNORE_BEGIN/GITIGNORE_END 标记之间，片段外的用户内容保持不变；
+    没有链接且文件中没有其他内容时删除 .gitignore。
+
+    Args:
+        skills_target_dir: Skills 目标目录（如 .claude/skills）
+    """
+    cache_root = get_skills_cache_root()
+    links = []
+    with os.scandir(skills_target_dir) as entries:
+        for entry in entries:
+            skill_dir = Path(entry.path)
+            destination = _link_destination(skill_dir) if is_link(skill_dir) else None
+            if destination is not None and destination.is_relative_to(cache_root):
+                links.append(entry.name)
+
+    gitignore = skills_target_dir / ".gitignore"
+    try:
+        lines = gitignore.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        lines = []
+
+    if GITIGNORE_BEGIN in lines and GITIGNORE_END in lines:
+        begin, end = lines.index(GITIGNORE_BEGIN), lines.index(GITIGNORE_END)
+        user_lines = lines[:begin] + lines[end + 1 :]
+    else:
+        user_lines = lines
+
+    block = []
+    if links:
+        block = [
+            GITIGNORE_BEGIN,
+            "# 由 elecspeckit init --deploy-mode link 生成，指向本机用户缓存的链接不应提交",
+            *(f"/{name}" for name in sorted(links)),
+            GITIGNORE_END,
+        ]
+
+    new_lines = user_lines + block
+    if new_lines == lines:
+        return
+    if not any(line.strip() for line in new_lines):
+        if gitignore.exists():
+            gitignore.unlink()
+        return
+    gitignore.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
+
+
+def is_link(path: Path) -> bool:
+    """是否为符号链接或目录联接 (Windows junction)"""
+    return path.is_symlink() or (hasattr(os.path, "isjunction") and os.path.isjunction(path))
+
+
+def _link_destination(link: Path) -> Optional[Path]:
+    """读取链接指向的路径"""
+    try:
+        return Path(os.readlink(link))
+    except OSError:
+        return None
+
+
+def _create_link(source: Path, link: Path) -> bool:
+    """
+    创建指向目录的链接
+
+    优先创建符号链接；Windows 上没有创建符号链接的权限时改用目录联接。
+
+    Returns:
+        True 如果创建成功
+    """
+    try:
+        os.symlink(source, link, target_is_directory=True)
+        return True
+    except (OSError, NotImplementedError):
+        pass
+
+    if sys.platform == "win32":
+        try:
+            import _winapi
+
+            _winapi.CreateJunction(str(source), str(link))
+            return True
+        except OSError:
+            pass
+
+    return False
+
+
+def _replace_link(temp_link: Path, target: Path) -> None:
+    """以新链接替换旧链接（POSIX 上为原子操作）"""
+    if sys.platform == "win32" and is_link(target):
+        # Windows 上 os.replace 不能覆盖目录链接
+        _remove_path(target)
+    os.replace(temp_link, target)
+
+
+def _is_pristine_copy(skill_dir: Path, state: Optional[DeployState]) -> bool:
+    """私有副本中的每个文件是否都是未修改的已部署模板（无部署状态时视为已修改）"""
+    if state is None:
+        return False
+    return all(state.is_unmodified(file_path) for file_path in _iter_files(skill_dir))
+
+
+def _iter_files(directory: Path):
+    """递归遍历目录下的所有文件（不跟随链接）"""
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            yield Path(root) / name
+
+
+def _remove_path(path: Path) -> None:
+    """删除文件或链接（不跟随链接）；不存在时忽略"""
+    if is_link(path):
+        try:
+            os.unlink(path)
+        except (IsADirectoryError, PermissionError):
+            # Windows 上的目录联接
+            os.rmdir(path)
+    elif path.is_dir():
+        _remove_tree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def _remove_tree(directory: Path) -> None:
+    """删除目录树，包括只读文件"""
+
+    def make_writable(func, path, _exc_info):
+        # 只读文件本身和只读的父目录都会导致删除失败
+        os.chmod(os.path.dirname(path), stat.S_IRWXU)
+        if not os.path.islink(path):
+            os.chmod(path, stat.S_IWRITE | stat.S_IREAD | (stat.S_IEXEC if os.path.isdir(path) else 0))
+        func(path)
+
+    shutil.rmtree(directory, onerror=make_writable)
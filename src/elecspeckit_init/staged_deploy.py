@@ -0,0 +1,327 @@
+"""
+事务式分阶段部署
+
+在目标目录旁的临时目录 (同一文件系统) 中构建完整的新目录树，
+统一同步到磁盘一次，再通过一次原子重命名替换目标目录:
+
+1. 以硬链接克隆当前目标目录到 .<名称>.staging (保留用户文件和用户修改)
+2. 在临时目录中应用模板变更 (copy_directory_tree，覆盖文件时先删除再写入，
+   不会改写旧目录树中共享 inode 的文件)
+3. 未被替换、仍与旧目录树共享 inode 的文件逐个复制一份 (auto 模式下优先 reflink)，
+   使新目录树与回滚点互相独立，之后原地修改文件不会同时改写回滚点
+4. 同步文件系统一次 (Linux 使用 syncfs，其余平台退回 sync/逐文件 fsync)
+5. Linux 上使用 renameat2(RENAME_EXCHANGE) 原子交换新旧目录；
+   其他平台退回 "旧目录改名 + os.replace" 两步重命名
+6. 旧目录树移动到 .elecspecify/backup/rollback/ 作为回滚点
+
+任何一步在交换前失败时，目标目录保持原样，临时目录被删除。
+"""
+
+import ctypes
+import errno
+import os
+import shutil
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Set
+
+from .deploy_state import DeployState
+from .events import event_stream
+from .fast_copy import DEPLOY_MODE_COPY, copy_file
+from .fs_utils import DEFAULT_COPY_WORKERS, ChangeSummary, copy_directory_tree
+from .template_manifest import TemplateManifest
+
+# 回滚点目录（相对项目根目录），其下保持原目录的相对路径
+ROLLBACK_DIR = Path(".elecspecify") / "backup" / "rollback"
+
+# 以分阶段方式部署的目录树（相对项目根目录，与 template_manager 中的部署一致）
+STAGED_TREE_DIRS = (Path(".claude") / "skills", Path(".elecspecify") / "scripts")
+
+# <linux/fcntl.h>
+AT_FDCWD = -100
+# <linux/fs.h>
+RENAME_EXCHANGE = 1 << 1
+
+
+def deploy_tree_staged(
+    source_dir: Path,
+    target_dir: Path,
+    base_dir: Path,
+    manifest: Optional[TemplateManifest] = None,
+    state: Optional[DeployState] = None,
+    max_workers: int = DEFAULT_COPY_WORKERS,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    exclude: Optional[Set[str]] = None,
+) -> ChangeSummary:
+    """
+    以分阶段方式部署模板目录树，并原子替换目标目录
+
+    变更判断规则与 copy_directory_tree 相同 (用户修改过的文件保持不变)。
+    旧目录树整体保留为回滚点，因此不再逐文件创建备份。
+
+    Args:
+        source_dir: 模板目录
+        target_dir: 目标目录（如 .claude/skills）
+        base_dir: 项目根目录
+        manifest: 模板清单（可选）
+        state: 项目部署状态（可选）
+        max_workers: 并行复制线程数
+        deploy_mode: 部署模式 ("copy" 或 "auto")
+        exclude: 不部署的条目（相对模板目录的路径）
+
+    Returns:
+        ChangeSummary，变更路径均指向最终的目标目录
+
+    Raises:
+        OSError: 构建或替换失败（目标目录保持不变）
+    """
+    staging_dir = target_dir.parent / f".{target_dir.name}.staging"
+    if staging_dir.exists():
+        # 上次中断遗留的临时目录
+        shutil.rmtree(staging_dir)
+
+    target_dir.parent.mkdir(parents=True, exist_ok=True)
+    has_previous = target_dir.exists()
+
+    try:
+        if has_previous:
+            shutil.copytree(target_dir, staging_dir, symlinks=True, copy_function=_link_or_copy)
+
+        if state is not None:
+            state.redirect(staging_dir, target_dir)
+
+        # 临时目录中的路径不对外发送事件，替换完成后由调用方以最终路径汇总
+        with event_stream(None):
+            summary = copy_directory_tree(
+                source_dir,
+                staging_dir,
+                manifest=manifest,
+                state=state,
+                max_workers=max_workers,
+                deploy_mode=deploy_mode,
+                exclude=exclude,
+            )
+
+        if summary.total_skipped == summary.total_changes:
+            # 没有任何变更，无需替换
+            shutil.rmtree(staging_dir)
+            return _retarget(summary, staging_dir, target_dir)
+
+        if has_previous:
+            _break_shared_links(staging_dir, target_dir, deploy_mode, max_workers)
+
+        _sync_filesystem(staging_dir, summary)
+
+        if not has_previous:
+            os.replace(staging_dir, target_dir)
+        elif not _exchange_directories(staging_dir, target_dir):
+            retired_dir = target_dir.parent / f".{target_dir.name}.retired"
+            if retired_dir.exists():
+                shutil.rmtree(retired_dir)
+            os.replace(target_dir, retired_dir)
+            try:
+                os.replace(staging_dir, target_dir)
+            except OSError:
+                os.replace(retired_dir, target_dir)
+                raise
+            os.replace(retired_dir, staging_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    finally:
+        if state is not None:
+            state.redirect(staging_dir, None)
+
+    _fsync_directory(target_dir.parent)
+
+    if has_previous:
+        # 交换后临时目录中是旧目录树，保留为回滚点
+        _keep_rollback(staging_dir, target_dir, base_dir)
+
+    return _retarget(summary, staging_dir, target_dir)
+
+
+def get_rollback_dir(base_dir: Path, target_dir: Path) -> Path:
+    """
+    获取目标目录的回滚点路径
+
+    Examples:
+        >>> get_rollback_dir(base, base / ".claude" / "skills")
+        # base/.elecspecify/backup/rollback/.claude/skills
+    """
+    return base_dir / ROLLBACK_DIR / target_dir.relative_to(base_dir)
+
+
+def rollback_tree(base_dir: Path, target_dir: Path) -> bool:
+    """
+    将目标目录恢复为上一次分阶段部署之前的目录树
+
+    当前目录树与回滚点互换，因此可再次调用以撤销回滚。
+
+    Args:
+        base_dir: 项目根目录
+        target_dir: 目标目录（如 .claude/skills）
+
+    Returns:
+        True 如果已恢复；不存在回滚点时返回 False
+    """
+    rollback_dir = get_rollback_dir(base_dir, target_dir)
+    if not rollback_dir.is_dir():
+        return False
+
+    if not _exchange_directories(rollback_dir, target_dir):
+        swap_dir = target_dir.parent / f".{target_dir.name}.retired"
+        if swap_dir.exists():
+            shutil.rmtree(swap_dir)
+        os.replace(target_dir, swap_dir)
+        os.replace(rollback_dir, target_dir)
+        os.replace(swap_dir, rollback_dir)
+
+    _fsync_directory(target_dir.parent)
+    return True
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """克隆旧目录树时优先使用硬链接，不支持时退回复制"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _break_shared_links(
+    staging_dir: Path, target_dir: Path, deploy_mode: str, max_workers: int
+) -> None:
+    """
+    复制临时目录中仍与旧目录树共享 inode 的文件，使两棵目录树互相独立
+
+    硬链接克隆只用于避免复制即将被替换的文件；未被模板变更替换的文件在此复制一份
+    (先写入同目录临时文件再原子替换)，否则旧目录树作为回滚点会随新文件的原地修改一起变化。
+
+    Args:
+        staging_dir: 临时目录
+        target_dir: 当前目标目录（旧目录树）
+        deploy_mode: 部署模式（"auto" 时优先使用 reflink/copy_file_range）
+        max_workers: 并行复制线程数
+    """
+    shared = []
+    for directory, _dirnames, filenames in os.walk(staging_dir):
+        for filename in filenames:
+            path = Path(directory) / filename
+            info = path.lstat()
+            if info.st_nlink < 2 or not stat.S_ISREG(info.st_mode):
+                continue
+            try:
+                previous = (target_dir / path.relative_to(staging_dir)).lstat()
+            except FileNotFoundError:
+                continue
+            if (previous.st_dev, previous.st_ino) == (info.st_dev, info.st_ino):
+                shared.append(path)
+
+    def unshare(path: Path) -> None:
+        temp_path = path.with_name(f".{path.name}.unshare")
+        copy_file(path, temp_path, deploy_mode)
+        os.replace(temp_path, path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(unshare, shared))
+
+
+def _retarget(summary: ChangeSummary, staging_dir: Path, target_dir: Path) -> ChangeSummary:
+    """将变更记录中的临时目录路径改写为目标目录路径"""
+    summary.retarget(staging_dir, target_dir)
+    return summary
+
+
+def _keep_rollback(retired_dir: Path, target_dir: Path, base_dir: Path) -> None:
+    """将被替换的旧目录树移动为回滚点（只保留最近一个）"""
+    rollback_dir = get_rollback_dir(base_dir, target_dir)
+    if rollback_dir.exists():
+        shutil.rmtree(rollback_dir)
+    rollback_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        os.replace(retired_dir, rollback_dir)
+    except OSError:
+        # 不在同一文件系统等情况下，旧目录树留在原位（.<名称>.staging）
+        pass
+
+
+def _sync_filesystem(staging_dir: Path, summary: ChangeSummary) -> None:
+    """
+    将临时目录中的新文件一次性同步到磁盘
+
+    Linux 上对所在文件系统调用一次 syncfs；其他 POSIX 平台调用 os.sync；
+    Windows 上逐个 fsync 新写入的文件。
+    """
+    if sys.platform == "linux" and _syncfs(staging_dir):
+        return
+
+    if hasattr(os, "sync"):
+        os.sync()
+        return
+
+    for path in summary.paths("created", "updated"):
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+
+
+def _syncfs(path: Path) -> bool:
+    """调用 syncfs(2) 同步 path 所在的文件系统"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        syncfs = libc.syncfs
+    except (OSError, AttributeError):
+        return False
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return syncfs(fd) == 0
+    finally:
+        os.close(fd)
+
+
+def _exchange_directories(first: Path, second: Path) -> bool:
+    """
+    原子交换两个目录 (Linux renameat2 RENAME_EXCHANGE)
+
+    Returns:
+        True 如果交换成功；平台或文件系统不支持时返回 False
+
+    Raises:
+        OSError: 其他重命名错误
+    """
+    if sys.platform != "linux":
+        return False
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        # glibc < 2.28 或非 glibc 环境
+        return False
+
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    result = renameat2(
+        AT_FDCWD, os.fsencode(first), AT_FDCWD, os.fsencode(second), RENAME_EXCHANGE
+    )
+    if result == 0:
+        return True
+
+    error = ctypes.get_errno()
+    if error in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+        return False
+    raise OSError(error, os.strerror(error), str(second))
+
+
+def _fsync_directory(directory: Path) -> None:
+    """同步目录项，使重命名持久化（Windows 不支持打开目录，直接跳过）"""
+    if sys.platform == "win32":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
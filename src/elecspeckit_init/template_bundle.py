@@ -0,0 +1,289 @@
+"""
+模板归档读取模块
+
+wheel 中的模板以单个不压缩的 zip 归档 (templates.zip) 分发，而不是上千个零散文件，
+安装时只需写入一个文件。运行时以只读方式内存映射归档，只解析一次中央目录，
+之后每个成员都是映射中的一段连续字节，读取和部署时直接切片写入目标文件，
+不再逐个打开模板文件。
+
+源码树和可编辑安装中没有归档，所有函数退回到读取 templates/ 目录下的文件，
+调用方无需区分两种形式。模板路径统一以 TEMPLATE_ROOT 下的 Path 表示。
+
+部署模式 "auto" 下归档成员同样使用 fast_copy 的零拷贝策略 (从归档文件描述符的成员偏移处
+copy_file_range，或硬链接到由映射内容填充的缓存)，均不可用时才从映射写入目标文件。
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Set
+
+from .fast_copy import (
+    DEPLOY_MODE_AUTO,
+    DEPLOY_MODE_COPY,
+    STRATEGY_COPY,
+    STRATEGY_COPY_FILE_RANGE,
+    copy_file,
+    copy_file_region,
+)
+from .template_manifest import BUNDLE_FILENAME, MANIFEST_FILENAME, TemplateManifest
+
+# 包目录
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+# 模板根目录（使用归档时该目录不存在，仅作为模板路径的基准）
+TEMPLATE_ROOT = PACKAGE_DIR / "templates"
+
+# 模板归档路径
+BUNDLE_PATH = PACKAGE_DIR / BUNDLE_FILENAME
+
+# zip 本地文件头: 签名、版本、标志、压缩方式、时间、日期、CRC、压缩大小、原始大小、文件名长度、扩展字段长度
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class _Member(NamedTuple):
+    """归档成员在映射中的位置"""
+
+    offset: int  # 数据起始偏移
+    size: int
+    mode: int  # 权限位（0 表示未记录）
+
+
+class TemplateBundle:
+    """
+    内存映射的模板归档
+
+    Examples:
+        >>> bundle = TemplateBundle(BUNDLE_PATH)
+        >>> bundle.read("elecspecify/skills/docs-seeker/SKILL.md")
+        >>> bundle.extract("claude/elecspeckit.plan.md", target)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.members: Dict[str, _Member] = {}
+        self.dirs: Set[str] = set()
+
+        # 文件保持打开，供 copy_file_range 按成员偏移复制
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        try:
+            self._index()
+        except BaseException:
+            self._map.close()
+            self._file.close()
+            raise
+
+    def _index(self) -> None:
+        """解析中央目录，记录每个成员数据在映射中的偏移"""
+        with zipfile.ZipFile(self._map) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"模板归档成员不能压缩: {info.filename}")
+
+                header = _LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+                if header[0] != _LOCAL_HEADER_SIGNATURE:
+                    raise ValueError(f"模板归档已损坏: {info.filename}")
+                offset = info.header_offset + _LOCAL_HEADER.size + header[9] + header[10]
+
+                self.members[info.filename] = _Member(
+                    offset=offset, size=info.file_size, mode=(info.external_attr >> 16) & 0o777
+                )
+
+                parent, _, _ = info.filename.rpartition("/")
+                while parent and parent not in self.dirs:
+                    self.dirs.add(parent)
+                    parent, _, _ = parent.rpartition("/")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.members
+
+    def is_dir(self, name: str) -> bool:
+        """归档中是否有以 name 为前缀的目录（空字符串表示根目录）"""
+        return name == "" or name in self.dirs
+
+    def view(self, name: str) -> memoryview:
+        """
+        获取成员内容的只读视图（不复制）
+
+        Raises:
+            KeyError: 成员不存在
+        """
+        member = self.members[name]
+        return memoryview(self._map)[member.offset : member.offset + member.size]
+
+    def read(self, name: str) -> bytes:
+        """读取成员内容"""
+        member = self.members[name]
+        return self._map[member.offset : member.offset + member.size]
+
+    def _write_member(self, name: str, f) -> None:
+        """将成员内容写入打开的文件"""
+        view = self.view(name)
+        try:
+            f.write(view)
+        finally:
+            view.release()
+
+    def deploy_fast(self, name: str, target: Path, sha256: Optional[str] = None) -> Optional[str]:
+        """
+        以零拷贝策略部署成员 ("auto" 部署模式，见 fast_copy.copy_file_region)
+
+        Returns:
+            实际使用的复制策略名称；均不可用时返回 None（目标文件不存在）
+
+        Raises:
+            KeyError: 成员不存在
+        """
+        member = self.members[name]
+        strategy = copy_file_region(
+            self._file.fileno(),
+            member.offset,
+            member.size,
+            target,
+            lambda f: self._write_member(name, f),
+            sha256,
+        )
+        if strategy == STRATEGY_COPY_FILE_RANGE and member.mode:
+            os.chmod(target, member.mode)
+        return strategy
+
+    def extract(self, name: str, target: Path) -> None:
+        """
+        将成员写入目标文件
+
+        目标文件已存在时先删除再写入 (与 fast_copy.copy_file 相同)，并恢复归档中记录的权限位。
+
+        Raises:
+            KeyError: 成员不存在
+        """
+        member = self.members[name]
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+
+        with open(target, "xb") as f:
+            self._write_member(name, f)
+
+        if member.mode:
+            os.chmod(target, member.mode)
+
+    def load_manifest(self, root: Path) -> TemplateManifest:
+        """从归档中的 manifest.json 读取模板清单"""
+        data = json.loads(self.read(MANIFEST_FILENAME).decode("utf-8"))
+        return TemplateManifest.from_dict(root, data)
+
+
+_bundle: Optional[TemplateBundle] = None
+_bundle_checked = False
+_bundle_lock = threading.Lock()
+
+
+def get_template_bundle() -> Optional[TemplateBundle]:
+    """
+    获取包内模板归档（每个进程只映射一次）
+
+    Returns:
+        TemplateBundle 对象；源码树/可编辑安装中没有归档时返回 None
+    """
+    global _bundle, _bundle_checked
+
+    if not _bundle_checked:
+        with _bundle_lock:
+            if not _bundle_checked:
+                if BUNDLE_PATH.is_file():
+                    _bundle = TemplateBundle(BUNDLE_PATH)
+                _bundle_checked = True
+    return _bundle
+
+
+def template_member(path: Path) -> Optional[str]:
+    """
+    将模板路径转换为归档成员名
+
+    Returns:
+        相对 TEMPLATE_ROOT 的 POSIX 路径；不在模板根目录下时返回 None
+    """
+    try:
+        relative_path = path.relative_to(TEMPLATE_ROOT).as_posix()
+    except ValueError:
+        return None
+    return "" if relative_path == "." else relative_path
+
+
+def template_exists(path: Path) -> bool:
+    """模板文件或目录是否存在"""
+    bundle = get_template_bundle()
+    member = template_member(path) if bundle is not None else None
+    if member is None:
+        return path.exists()
+    return member in bundle or bundle.is_dir(member)
+
+
+def read_template_bytes(path: Path) -> bytes:
+    """
+    读取模板文件内容
+
+    Raises:
+        FileNotFoundError: 模板文件不存在
+    """
+    bundle = get_template_bundle()
+    member = template_member(path) if bundle is not None else None
+    if member is None:
+        return path.read_bytes()
+    if member not in bundle:
+        raise FileNotFoundError(f"模板文件不存在: {path}")
+    return bundle.read(member)
+
+
+def read_template_text(path: Path) -> str:
+    """
+    以 UTF-8 读取模板文件内容（换行符处理与 Path.read_text 一致）
+
+    Raises:
+        FileNotFoundError: 模板文件不存在
+    """
+    bundle = get_template_bundle()
+    if bundle is None or template_member(path) is None:
+        return path.read_text(encoding="utf-8")
+    content = read_template_bytes(path).decode("utf-8")
+    return content.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def copy_template_file(
+    source: Path, target: Path, deploy_mode: str = DEPLOY_MODE_COPY, sha256: Optional[str] = None
+) -> str:
+    """
+    将模板文件部署到目标位置
+
+    使用归档时，"auto" 部署模式先尝试零拷贝策略 (TemplateBundle.deploy_fast)，不可用时
+    直接从内存映射写入目标文件；没有归档时按部署模式复制 (见 fast_copy.copy_file)。
+
+    Returns:
+        实际使用的复制策略名称
+    """
+    bundle = get_template_bundle()
+    member = template_member(source) if bundle is not None else None
+    if member is None or member not in bundle:
+        return copy_file(source, target, deploy_mode, sha256)
+
+    if deploy_mode == DEPLOY_MODE_AUTO:
+        strategy = bundle.deploy_fast(member, target, sha256)
+        if strategy is not None:
+            return strategy
+
+    bundle.extract(member, target)
+    return STRATEGY_COPY
@@ -0,0 +1,163 @@
+"""
+模板完整性校验
+
+按模板清单逐个校验包内模板文件 (存在、大小、SHA-256)，在部署前发现
+损坏或不完整的安装，而不是部署出残缺的 Skills。
+
+完整校验需要读取全部模板内容，因此结果按 "包版本 + 安装路径" 记录在用户缓存目录
+(如 ~/.cache/elecspeckit/integrity/<键>.json) 中: 同一安装只在第一次运行时校验，
+之后只比较记录中的清单摘要和模板文件 (归档或 manifest.json) 的 stat 元数据。
+只记录校验通过的结果，损坏的安装每次都会重新校验。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .template_bundle import BUNDLE_PATH, get_template_bundle
+from .template_manifest import MANIFEST_FILENAME, TemplateManifest, compute_sha256
+
+# 校验记录格式版本
+INTEGRITY_FORMAT_VERSION = 1
+
+# 进程内已通过校验的清单摘要
+_verified_digests: Dict[Path, str] = {}
+
+
+def get_integrity_cache_path(install_path: Path) -> Path:
+    """
+    获取安装对应的校验记录路径
+
+    Args:
+        install_path: 模板根目录
+
+    Returns:
+        用户缓存目录中的记录文件路径（文件名由包版本和安装路径决定）
+    """
+    from platformdirs import user_cache_dir
+
+    from elecspeckit_init import __version__
+
+    key = hashlib.sha256(f"{__version__}\0{install_path}".encode("utf-8")).hexdigest()[:16]
+    return Path(user_cache_dir("elecspeckit", appauthor=False)) / "integrity" / f"{key}.json"
+
+
+def verify_template_integrity(manifest: TemplateManifest) -> List[str]:
+    """
+    校验模板文件与清单一致（同一安装只完整校验一次）
+
+    Args:
+        manifest: 模板清单
+
+    Returns:
+        缺失或内容不一致的模板路径（相对模板根目录），为空表示完整
+    """
+    digest = _manifest_digest(manifest)
+    if _verified_digests.get(manifest.root) == digest:
+        return []
+
+    cache_path = get_integrity_cache_path(manifest.root)
+    fingerprint = _install_fingerprint(manifest.root)
+    if _read_verified(cache_path, digest, fingerprint):
+        _verified_digests[manifest.root] = digest
+        return []
+
+    problems = _verify_entries(manifest)
+    if not problems:
+        _verified_digests[manifest.root] = digest
+        _write_verified(cache_path, manifest.root, digest, fingerprint)
+    return problems
+
+
+def _verify_entries(manifest: TemplateManifest) -> List[str]:
+    """逐个校验清单条目"""
+    bundle = get_template_bundle()
+    problems: List[str] = []
+
+    for entry in sorted(manifest.entries.values(), key=lambda e: e.path):
+        if bundle is not None and entry.path in bundle:
+            if bundle.members[entry.path].size != entry.size:
+                problems.append(entry.path)
+                continue
+            view = bundle.view(entry.path)
+            try:
+                sha256 = hashlib.sha256(view).hexdigest()
+            finally:
+                view.release()
+        else:
+            path = manifest.root / entry.path
+            try:
+                if path.stat().st_size != entry.size:
+                    problems.append(entry.path)
+                    continue
+                sha256 = compute_sha256(path)
+            except OSError:
+                problems.append(entry.path)
+                continue
+
+        if sha256 != entry.sha256:
+            problems.append(entry.path)
+
+    return problems
+
+
+def _manifest_digest(manifest: TemplateManifest) -> str:
+    """清单内容摘要（路径、大小和哈希）"""
+    digest = hashlib.sha256()
+    for entry in sorted(manifest.entries.values(), key=lambda e: e.path):
+        digest.update(f"{entry.path}\0{entry.size}\0{entry.sha256}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _install_fingerprint(root: Path) -> Optional[List[int]]:
+    """
+    安装的 stat 指纹: 模板归档或 manifest.json 的 (大小, 修改时间)
+
+    两者都不存在时 (源码树中现场扫描生成清单) 返回 None，仅依赖清单摘要判断。
+    """
+    for path in (BUNDLE_PATH, root / MANIFEST_FILENAME):
+        try:
+            stat_result = path.stat()
+        except OSError:
+            continue
+        return [stat_result.st_size, stat_result.st_mtime_ns]
+    return None
+
+
+def _read_verified(cache_path: Path, digest: str, fingerprint: Optional[List[int]]) -> bool:
+    """记录是否表明当前安装已通过校验"""
+    try:
+        record = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+
+    return (
+        isinstance(record, dict)
+        and record.get("format") == INTEGRITY_FORMAT_VERSION
+        and record.get("manifest_digest") == digest
+        and record.get("fingerprint") == fingerprint
+    )
+
+
+def _write_verified(
+    cache_path: Path, root: Path, digest: str, fingerprint: Optional[List[int]]
+) -> None:
+    """写入校验通过的记录（缓存目录不可写时忽略）"""
+    from elecspeckit_init import __version__
+
+    record = {
+        "format": INTEGRITY_FORMAT_VERSION,
+        "version": __version__,
+        "install_path": str(root),
+        "manifest_digest": digest,
+        "fingerprint": fingerprint,
+    }
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
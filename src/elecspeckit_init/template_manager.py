@@ -5,18 +5,47 @@
 """
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Set
 
+from .backup_store import BackupSnapshot, BackupStore
+from .deferred_skills import select_deferred_skills, write_deferred_record
+from .deploy_state import DeployState
+from .events import phase
+from .fast_copy import DEPLOY_MODE_COPY, DEPLOY_MODE_LINK
 from .fs_utils import (
     ChangeSummary,
     FileChange,
+    backup_file,
     copy_directory_tree,
     ensure_directory_exists,
+    file_matches_digest,
     write_or_update_file,
 )
+from .skill_config_store import get_generation, skill_config_lock, write_skill_config
+from .skills_cache import link_skills, unshare_skills
+from .staged_deploy import deploy_tree_staged
+from .template_bundle import (
+    TEMPLATE_ROOT,
+    read_template_bytes,
+    read_template_text,
+    template_exists,
+)
+from .template_integrity import verify_template_integrity
+from .template_manifest import TemplateManifest, load_template_manifest
+from .three_way_merge import load_merge_base, merge_json, merge_text, store_merge_base
+
+
+def get_template_manifest() -> TemplateManifest:
+    """
+    获取包内模板清单
 
-# 模板目录位于包内
-TEMPLATE_ROOT = Path(__file__).resolve().parent / "templates"
+    清单在每个进程中只加载一次，记录所有模板文件的路径、大小和 SHA-256。
+    使用模板归档时从归档内的 manifest.json 读取。
+
+    Returns:
+        TemplateManifest 对象
+    """
+    return load_template_manifest(TEMPLATE_ROOT)
 
 
 # Agent 平台配置
@@ -39,9 +68,21 @@ COMMAND_BASENAMES = [
     "elecspeckit.skillconfig",
 ]
 
+# 复制到 .elecspecify/templates/ 的文档模板（仅在目标不存在或为空时写入）
+DOC_TEMPLATE_FILES = [
+    "spec-template.md",
+    "plan-template.md",
+    "tasks-template.md",
+    "checklist-template.md",
+]
+
 
 def initialize_project_structure(
-    base_dir: Path, platform: str, create_backup: bool = False
+    base_dir: Path,
+    platform: str,
+    create_backup: bool = False,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    staged: bool = False,
 ) -> ChangeSummary:
     """
     初始化完整的项目结构
@@ -50,26 +91,50 @@ def initialize_project_structure(
         base_dir: 项目根目录
         platform: Agent 平台 ("claude" 或 "qwen")
         create_backup: 是否创建备份
+        deploy_mode: 目录树部署模式 ("copy" 或 "auto"，见 fast_copy)
+        staged: 是否以分阶段方式部署目录树 (.elecspecify/scripts、.claude/skills)，
+            构建完成后原子替换，旧目录树保留为回滚点 (见 staged_deploy)
 
     Returns:
         ChangeSummary 包含所有文件变更记录
     """
-    summary = ChangeSummary(changes=[])
+    summary = ChangeSummary()
+
+    # 加载上次部署的状态，升级时只处理模板已更新或已偏离的文件
+    state = DeployState.load(base_dir)
+
+    # 升级时被覆盖的文件统一存入内容寻址备份库，本次升级生成一个快照
+    backup_snapshot = BackupStore(base_dir).begin_snapshot("upgrade") if create_backup else None
 
     # 1. 创建 .elecspecify/ 基础结构
-    elecspecify_changes = _create_elecspecify_structure(base_dir, create_backup)
-    for change in elecspecify_changes:
-        summary.add_change(change)
+    with phase("elecspecify"):
+        elecspecify_changes = _create_elecspecify_structure(
+            base_dir, create_backup, state, deploy_mode, backup_snapshot, staged
+        )
+        summary.merge(elecspecify_changes)
 
     # 2. 创建 Agent 平台目录和命令模板
-    agent_changes = _create_agent_commands(base_dir, platform, create_backup)
-    for change in agent_changes:
-        summary.add_change(change)
+    with phase("agent"):
+        agent_changes = _create_agent_commands(
+            base_dir, platform, create_backup, state, deploy_mode, backup_snapshot, staged
+        )
+        summary.merge(agent_changes)
+
+    if backup_snapshot is not None:
+        backup_snapshot.commit()
+    state.save()
 
     return summary
 
 
-def _create_elecspecify_structure(base_dir: Path, create_backup: bool) -> List[FileChange]:
+def _create_elecspecify_structure(
+    base_dir: Path,
+    create_backup: bool,
+    state: Optional[DeployState] = None,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+    staged: bool = False,
+) -> ChangeSummary:
     """
     创建 .elecspecify/ 基础结构
 
@@ -78,7 +143,7 @@ def _create_elecspecify_structure(base_dir: Path, create_backup: bool) -> List[F
     - .elecspecify/scripts/ (由 copy_directory_tree 根据模板内容自动创建)
     - .elecspecify/templates/ (spec-template.md, plan-template.md, etc.)
     """
-    changes: List[FileChange] = []
+    changes = ChangeSummary()
 
     elecspecify_dir = base_dir / ".elecspecify"
     memory_dir = elecspecify_dir / "memory"
@@ -91,85 +156,86 @@ def _create_elecspecify_structure(base_dir: Path, create_backup: bool) -> List[F
     # 复制 elecspecify 模板
     elecspecify_template_dir = TEMPLATE_ROOT / "elecspecify"
 
-    if elecspecify_template_dir.exists():
+    if template_exists(elecspecify_template_dir):
         # 复制 constitution-template.md
         constitution_source = elecspecify_template_dir / "constitution-template.md"
-        if constitution_source.exists():
+        if template_exists(constitution_source):
             constitution_target = memory_dir / "constitution.md"
-            content = constitution_source.read_text(encoding="utf-8")
 
             # 只在文件不存在或为空时创建
-            if (
-                not constitution_target.exists()
-                or not constitution_target.read_text(encoding="utf-8").strip()
-            ):
+            if _is_blank_file(constitution_target):
+                content = read_template_text(constitution_source)
                 change = write_or_update_file(
                     constitution_target, content, create_backup=False  # 首次创建不需要备份
                 )
-                changes.append(change)
+                changes.add_change(change)
 
         # 复制 skill_config_template.json (仅 Claude 平台)
         skill_config_source = elecspecify_template_dir / "skill_config_template.json"
-        if skill_config_source.exists():
+        if template_exists(skill_config_source):
             skill_config_target = memory_dir / "skill_config.json"
 
             # T063.2: 智能合并逻辑
             if skill_config_target.exists() and skill_config_target.read_text(encoding="utf-8").strip():
                 # 升级模式：执行智能合并
                 if create_backup:
-                    merged_config = _merge_skill_config(skill_config_target, skill_config_source)
-                    import json
-
-                    content = json.dumps(merged_config, indent=2, ensure_ascii=False)
-                    change = write_or_update_file(
-                        skill_config_target, content, create_backup=create_backup
+                    change = _upgrade_skill_config(
+                        skill_config_target, skill_config_source, state, backup_snapshot
                     )
-                    changes.append(change)
+                    changes.add_change(change)
                 # 否则不做任何操作，保留用户配置
             else:
                 # 首次创建：直接复制模板
-                content = skill_config_source.read_text(encoding="utf-8")
+                content = read_template_text(skill_config_source)
                 change = write_or_update_file(
                     skill_config_target, content, create_backup=False
                 )
-                changes.append(change)
+                changes.add_change(change)
+                _record_skill_config(skill_config_target, skill_config_source, state)
 
             # T058.1: 设置文件权限为 0600（仅文件所有者可读写）
             _set_skill_config_permissions(skill_config_target)
 
         # 复制模板文件到 templates/ 目录
-        template_files = [
-            "spec-template.md",
-            "plan-template.md",
-            "tasks-template.md",
-            "checklist-template.md",
-        ]
-
-        for template_file in template_files:
+        for template_file in DOC_TEMPLATE_FILES:
             source = elecspecify_template_dir / template_file
-            if source.exists():
+            if template_exists(source):
                 target = templates_dir / template_file
-                content = source.read_text(encoding="utf-8")
 
-                if not target.exists() or not target.read_text(encoding="utf-8").strip():
+                if _is_blank_file(target):
+                    content = read_template_text(source)
                     change = write_or_update_file(target, content, create_backup=False)
-                    changes.append(change)
+                    changes.add_change(change)
 
         # 复制 scripts 目录 (包含查询脚本)
         scripts_source_dir = elecspecify_template_dir / "scripts"
-        if scripts_source_dir.exists():
+        if template_exists(scripts_source_dir):
             scripts_target_dir = elecspecify_dir / "scripts"
-            # 使用 copy_directory_tree 复制整个 scripts 目录树
-            script_changes = copy_directory_tree(
-                scripts_source_dir, scripts_target_dir, create_backup=create_backup
+            # 复制整个 scripts 目录树
+            script_changes = _deploy_template_tree(
+                scripts_source_dir,
+                scripts_target_dir,
+                base_dir,
+                create_backup,
+                state,
+                deploy_mode,
+                backup_snapshot,
+                staged,
             )
-            for change in script_changes.changes:
-                changes.append(change)
+            changes.merge(script_changes)
 
     return changes
 
 
-def _create_agent_commands(base_dir: Path, platform: str, create_backup: bool) -> List[FileChange]:
+def _create_agent_commands(
+    base_dir: Path,
+    platform: str,
+    create_backup: bool,
+    state: Optional[DeployState] = None,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+    staged: bool = False,
+) -> ChangeSummary:
     """
     创建 Agent 平台命令模板
 
@@ -177,11 +243,15 @@ def _create_agent_commands(base_dir: Path, platform: str, create_backup: bool) -
         base_dir: 项目根目录
         platform: Agent 平台
         create_backup: 是否创建备份
+        state: 项目部署状态（可选）
+        deploy_mode: Skills 目录树部署模式
+        backup_snapshot: 备份快照（可选）
+        staged: 是否以分阶段方式部署 Skills 目录树
 
     Returns:
-        文件变更列表
+        ChangeSummary 包含本步骤的文件变更记录
     """
-    changes: List[FileChange] = []
+    changes = ChangeSummary()
 
     if platform not in AGENT_CONFIG:
         raise ValueError(f"不支持的平台: {platform}")
@@ -196,38 +266,197 @@ def _create_agent_commands(base_dir: Path, platform: str, create_backup: bool) -
     # 部署 Skills (仅 Claude 平台)
     if platform == "claude":
         try:
-            skills_summary = deploy_skills_to_claude(base_dir, create_backup)
-            for change in skills_summary.changes:
-                changes.append(change)
+            skills_summary = deploy_skills_to_claude(
+                base_dir, create_backup, state, deploy_mode, backup_snapshot, staged
+            )
+            changes.merge(skills_summary)
         except RuntimeError as e:
-            # Skills 库不完整时记录警告但不中断初始化
+            # Skills 库不完整或已损坏时记录警告但不中断初始化
             import sys
             print(f"警告: {e}", file=sys.stderr)
 
     # 复制命令模板
     template_dir = TEMPLATE_ROOT / platform
 
-    if template_dir.exists():
+    if template_exists(template_dir):
         for command_name in COMMAND_BASENAMES:
             template_file = template_dir / f"{command_name}{config['file_extension']}"
 
-            if template_file.exists():
+            if template_exists(template_file):
                 target_file = commands_dir / f"{command_name}{config['file_extension']}"
-                content = template_file.read_text(encoding="utf-8")
 
-                change = write_or_update_file(target_file, content, create_backup=create_backup)
-                changes.append(change)
+                change = _write_template_file(
+                    template_file, target_file, create_backup, state, backup_snapshot
+                )
+                changes.add_change(change)
             else:
                 # 如果模板不存在,创建占位符
                 target_file = commands_dir / f"{command_name}{config['file_extension']}"
                 content = _generate_placeholder_content(command_name, platform)
 
-                change = write_or_update_file(target_file, content, create_backup=create_backup)
-                changes.append(change)
+                change = write_or_update_file(
+                    target_file,
+                    content,
+                    create_backup=create_backup,
+                    backup_snapshot=backup_snapshot,
+                )
+                changes.add_change(change)
 
     return changes
 
 
+def _is_blank_file(path: Path) -> bool:
+    """
+    检查文件是否不存在或内容为空白
+
+    非空文件只有在很小时才读取内容判断是否全为空白字符，避免读取大文件。
+    """
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return True
+
+    if size == 0:
+        return True
+    if size > 4096:
+        return False
+    return not path.read_text(encoding="utf-8").strip()
+
+
+def _write_template_file(
+    template_file: Path,
+    target_file: Path,
+    create_backup: bool,
+    state: Optional[DeployState] = None,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+) -> FileChange:
+    """
+    将模板文件写入目标位置
+
+    先用部署状态 (stat 元数据) 和模板清单中的大小、SHA-256 判断目标文件
+    是否已是最新，只有需要写入时才读取模板内容。
+
+    有部署状态时:
+    - 用户未修改的文件直接更新为新模板，不创建备份
+    - 用户修改过的文件: 模板未变化时保留；模板已变化时与上次部署的模板做三方合并，
+      只有两侧修改同一区域时才写入冲突标记
+
+    Args:
+        template_file: 模板文件路径
+        target_file: 目标文件路径
+        create_backup: 是否为已存在文件创建备份
+        state: 项目部署状态（可选）
+        backup_snapshot: 备份快照（可选）
+
+    Returns:
+        FileChange 对象记录变更信息 (有冲突时 conflict 为 True)
+    """
+    entry = get_template_manifest().entry_for(template_file)
+
+    if entry is not None:
+        if state is not None and state.is_current(target_file, entry.sha256):
+            _store_template_base(state.base_dir, template_file, entry.sha256)
+            return FileChange(path=target_file, change_type="skipped", message="模板未变化,跳过")
+
+        if file_matches_digest(target_file, entry.size, entry.sha256):
+            if state is not None:
+                state.record(target_file, entry.sha256)
+                _store_template_base(state.base_dir, template_file, entry.sha256)
+            return FileChange(path=target_file, change_type="skipped", message="内容相同,无需更新")
+
+        record = state.get(target_file) if state is not None else None
+        if record is not None and target_file.exists():
+            if state.is_unmodified(target_file):
+                # 未修改的已部署文件可直接快进到新模板，无需备份
+                create_backup = False
+            elif record.sha256 == entry.sha256:
+                return FileChange(
+                    path=target_file, change_type="skipped", message="模板未变化,保留用户修改"
+                )
+            else:
+                change = _merge_template_file(
+                    template_file, target_file, entry.sha256, record.sha256, state,
+                    create_backup, backup_snapshot,
+                )
+                if change is not None:
+                    return change
+
+    content = read_template_text(template_file)
+    change = write_or_update_file(
+        target_file, content, create_backup=create_backup, backup_snapshot=backup_snapshot
+    )
+
+    if state is not None and entry is not None:
+        state.record(target_file, entry.sha256)
+        _store_template_base(state.base_dir, template_file, entry.sha256)
+
+    return change
+
+
+def _merge_template_file(
+    template_file: Path,
+    target_file: Path,
+    sha256: str,
+    base_sha256: str,
+    state: DeployState,
+    create_backup: bool,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+) -> Optional[FileChange]:
+    """
+    三方合并用户修改过的模板文件
+
+    Args:
+        template_file: 新模板文件路径
+        target_file: 目标文件路径（含用户修改）
+        sha256: 新模板内容的 SHA-256
+        base_sha256: 上次部署的模板内容的 SHA-256（合并基准）
+        state: 项目部署状态
+        create_backup: 写入前是否备份目标文件
+        backup_snapshot: 备份快照（可选）
+
+    Returns:
+        FileChange 对象；合并基准不可用或目标文件无法按 UTF-8 读取时返回 None (调用方整体覆盖)
+    """
+    base = load_merge_base(state.base_dir, base_sha256)
+    if base is None:
+        return None
+    try:
+        ours = target_file.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    theirs = read_template_text(template_file)
+    result = merge_text(base, ours, theirs)
+    _store_template_base(state.base_dir, template_file, sha256)
+
+    if result.content == ours:
+        state.record_base(target_file, sha256)
+        return FileChange(
+            path=target_file, change_type="skipped", message="已包含模板更新,保留用户修改"
+        )
+
+    change = write_or_update_file(
+        target_file, result.content, create_backup=create_backup, backup_snapshot=backup_snapshot
+    )
+    if result.content == theirs:
+        state.record(target_file, sha256)
+    else:
+        state.record_base(target_file, sha256)
+
+    if result.conflicts:
+        change.conflict = True
+        change.message = f"三方合并有 {result.conflicts} 处冲突,已写入冲突标记"
+    else:
+        change.message = "已合并模板更新和用户修改"
+    return change
+
+
+def _store_template_base(base_dir: Path, template_file: Path, sha256: str) -> None:
+    """将部署的模板内容存为下次升级的合并基准（已存在时不重复读取模板）"""
+    if not BackupStore(base_dir).has_object(sha256):
+        store_merge_base(base_dir, read_template_bytes(template_file))
+
+
 def _generate_placeholder_content(command_name: str, platform: str) -> str:
     """
     生成占位符内容
@@ -350,93 +579,300 @@ REQUIRED_SKILLS = [
 
 def verify_skills_source_integrity() -> tuple[bool, list[str]]:
     """
-    验证源 Skills 库完整性 (T057.1)
+    验证源模板完整性 (T057.1)
 
-    检查模板目录是否包含 v0.2.1 定义的全部 15 个 Skills
+    检查模板清单包含 v0.2.1 定义的全部 15 个 Skills，并按清单校验整个模板目录
+    (大小和 SHA-256)。完整校验的结果按包版本和安装路径缓存 (见 template_integrity)，
+    同一安装只在第一次运行时读取模板内容。
 
     Returns:
-        (是否完整, 缺失的 Skills 列表) 元组
+        (是否完整, 问题列表) 元组；问题列表为缺失或损坏的 Skill 名称，
+        Skills 以外的模板文件以相对模板根目录的路径列出
     """
-    skills_source_dir = TEMPLATE_ROOT / "elecspecify" / "skills"
-
-    if not skills_source_dir.exists():
-        return False, REQUIRED_SKILLS
-
-    missing_skills = []
-    for skill_name in REQUIRED_SKILLS:
-        skill_md = skills_source_dir / skill_name / "SKILL.md"
-        if not skill_md.exists():
-            missing_skills.append(skill_name)
+    manifest = get_template_manifest()
+    skills_prefix = "elecspecify/skills"
+
+    missing_skills = [
+        skill_name
+        for skill_name in REQUIRED_SKILLS
+        if manifest.get(f"{skills_prefix}/{skill_name}/SKILL.md") is None
+    ]
+    if missing_skills:
+        return False, missing_skills
+
+    problems: list[str] = []
+    for path in verify_template_integrity(manifest):
+        if path.startswith(skills_prefix + "/") and path.count("/") > 2:
+            name = path.split("/")[2]
+        else:
+            name = path
+        if name not in problems:
+            problems.append(name)
 
-    return len(missing_skills) == 0, missing_skills
+    return len(problems) == 0, problems
 
 
 def deploy_skills_to_claude(
-    base_dir: Path, create_backup: bool = False
+    base_dir: Path,
+    create_backup: bool = False,
+    state: Optional[DeployState] = None,
+    deploy_mode: str = DEPLOY_MODE_COPY,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+    staged: bool = False,
 ) -> ChangeSummary:
     """
     部署 Skills 到 .claude/skills/ 目录 (T057, T060)
 
+    skill_config.json 中已禁用且尚未部署的 Skill 不复制，只记录到
+    .elecspecify/state/deferred_skills.json，由 skillconfig_enable.py 在启用时部署。
+    deploy_mode 为 "link" 时，各 Skill 目录为指向用户级共享缓存的链接 (见 skills_cache)。
+
+    升级时只更新模板已变化且未被用户修改的文件，被覆盖的文件存入内容寻址备份库
+    (.elecspecify/backup/objects/)，相同内容在多次升级间只保存一份；
+    无变化的升级不会复制或备份任何内容。
+
     Args:
         base_dir: 项目根目录
         create_backup: 是否创建备份（升级模式）
+        state: 项目部署状态（可选，用于增量升级）
+        deploy_mode: 部署模式 ("copy"、"auto" 或 "link"，"auto" 优先使用 reflink 等零拷贝方式，
+            "link" 将 Skills 链接到共享缓存)
+        backup_snapshot: 备份快照（可选，未提供且需要备份时自动创建并提交）
+        staged: 是否在临时目录中构建后原子替换 .claude/skills（旧目录树作为回滚点，
+            不再逐文件备份）
 
     Returns:
         ChangeSummary 包含所有文件变更记录
 
     Raises:
-        RuntimeError: 源 Skills 库不完整时抛出异常
+        RuntimeError: 源 Skills 库不完整或已损坏时抛出异常
     """
     # T057.1: 验证源 Skills 库完整性
     is_complete, missing_skills = verify_skills_source_integrity()
     if not is_complete:
         raise RuntimeError(
-            f"源 Skills 库不完整，缺失以下 Skills: {', '.join(missing_skills)}\n"
-            f"请确保 templates/elecspecify/skills/ 目录包含全部 15 个 Skills"
+            f"源 Skills 库不完整或已损坏: {', '.join(missing_skills)}\n"
+            f"请确保 templates/elecspecify/skills/ 目录包含全部 15 个 Skills，或重新安装 elecspeckit-cli"
         )
 
-    summary = ChangeSummary(changes=[])
+    summary = ChangeSummary()
 
     skills_source_dir = TEMPLATE_ROOT / "elecspecify" / "skills"
     skills_target_dir = base_dir / ".claude" / "skills"
 
-    # 确保目标目录存在
-    ensure_directory_exists(skills_target_dir)
-
-    # T062: 升级时创建备份
-    if create_backup and skills_target_dir.exists():
-        from datetime import datetime
-
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        backup_dir = base_dir / ".elecspecify" / "backup" / f"skills.bak.{timestamp}"
-        ensure_directory_exists(backup_dir.parent)
-
-        # 备份现有 Skills 目录
-        if any(skills_target_dir.iterdir()):
-            import shutil
+    # T062: 升级时备份被覆盖的文件（分阶段部署时旧目录树本身即为备份）
+    owns_snapshot = create_backup and backup_snapshot is None and not staged
+    if owns_snapshot:
+        backup_snapshot = BackupStore(base_dir).begin_snapshot("skills")
+
+    deferred_skills = select_deferred_skills(base_dir, skills_target_dir, REQUIRED_SKILLS)
+    excluded_skills = set(deferred_skills)
+
+    with phase("skills"):
+        if deploy_mode == DEPLOY_MODE_LINK:
+            # 已启用的 Skills 链接到用户级共享缓存，用户修改过的私有副本按复制方式升级
+            link_changes, private_skills = link_skills(
+                skills_target_dir,
+                [name for name in REQUIRED_SKILLS if name not in excluded_skills],
+                get_template_manifest(),
+                state,
+            )
+            for change in link_changes:
+                summary.add_change(change)
+            excluded_skills.update(
+                name for name in REQUIRED_SKILLS if name not in private_skills
+            )
+        else:
+            # 其他模式下先将链接替换为私有副本，避免改写共享缓存
+            for change in unshare_skills(skills_target_dir):
+                summary.add_change(change)
+
+        # T060: 完整复制 Skills（包含子目录、Python 脚本、references/）
+        skills_changes = _deploy_template_tree(
+            skills_source_dir,
+            skills_target_dir,
+            base_dir,
+            create_backup,
+            state,
+            deploy_mode,
+            backup_snapshot,
+            staged,
+            exclude=excluded_skills,
+        )
 
-            shutil.copytree(skills_target_dir, backup_dir, dirs_exist_ok=True)
+        summary.merge(skills_changes)
 
-            # 记录备份信息
+        for skill_name in deferred_skills:
             summary.add_change(
                 FileChange(
-                    path=backup_dir,
-                    change_type="backed_up",
-                    message=f"备份旧的 Skills 目录到 {backup_dir.relative_to(base_dir)}",
+                    path=skills_target_dir / skill_name,
+                    change_type="skipped",
+                    message="已禁用，启用时部署",
                 )
             )
 
-    # T060: 完整复制 Skills（包含子目录、Python 脚本、references/）
-    skills_changes = copy_directory_tree(
-        skills_source_dir, skills_target_dir, create_backup=False
-    )
+    write_deferred_record(base_dir, deferred_skills, get_template_manifest())
 
-    for change in skills_changes.changes:
-        summary.add_change(change)
+    if owns_snapshot:
+        backup_snapshot.commit()
 
     return summary
 
 
+def _deploy_template_tree(
+    source_dir: Path,
+    target_dir: Path,
+    base_dir: Path,
+    create_backup: bool,
+    state: Optional[DeployState],
+    deploy_mode: str,
+    backup_snapshot: Optional[BackupSnapshot],
+    staged: bool,
+    exclude: Optional[Set[str]] = None,
+) -> ChangeSummary:
+    """
+    部署模板目录树（逐文件写入或分阶段原子替换）
+
+    Args:
+        source_dir: 模板目录
+        target_dir: 目标目录
+        base_dir: 项目根目录
+        create_backup: 覆盖文件时是否备份（分阶段部署时由回滚点代替）
+        state: 项目部署状态（可选）
+        deploy_mode: 部署模式
+        backup_snapshot: 备份快照（可选）
+        staged: 是否分阶段部署
+        exclude: 不部署的条目（相对模板目录的路径）
+
+    Returns:
+        ChangeSummary 包含所有文件变更记录
+    """
+    if staged:
+        return deploy_tree_staged(
+            source_dir,
+            target_dir,
+            base_dir,
+            manifest=get_template_manifest(),
+            state=state,
+            deploy_mode=deploy_mode,
+            exclude=exclude,
+        )
+
+    ensure_directory_exists(target_dir)
+    return copy_directory_tree(
+        source_dir,
+        target_dir,
+        create_backup=create_backup,
+        manifest=get_template_manifest(),
+        state=state,
+        backup_snapshot=backup_snapshot,
+        deploy_mode=deploy_mode,
+        exclude=exclude,
+    )
+
+
+def _record_skill_config(
+    target: Path, source: Path, state: Optional[DeployState], merged: bool = False
+) -> None:
+    """
+    记录写入的 skill_config.json 及其模板，作为下次升级三方合并的基准
+
+    Args:
+        target: 项目中的 skill_config.json
+        source: 模板 skill_config_template.json
+        state: 项目部署状态（可选，为 None 时不记录）
+        merged: 文件是否含用户配置（合并结果）
+    """
+    if state is None:
+        return
+    entry = get_template_manifest().entry_for(source)
+    if entry is None:
+        return
+
+    if merged:
+        state.record_base(target, entry.sha256)
+    else:
+        state.record(target, entry.sha256)
+    _store_template_base(state.base_dir, source, entry.sha256)
+
+
+def _upgrade_skill_config(
+    target: Path,
+    source: Path,
+    state: Optional[DeployState] = None,
+    backup_snapshot: Optional[BackupSnapshot] = None,
+) -> FileChange:
+    """
+    升级已有的 skill_config.json
+
+    有上次部署的模板 (部署状态 + 备份库中的合并基准) 时按键三方合并:
+    模板未变化的配置直接保留，不备份也不重写；用户未改动的键采用新模板的值，
+    两侧都修改过的键保留用户的值。没有合并基准时退回 _merge_skill_config()。
+    合并期间持有 skill_config_lock，先备份现有配置，再通过 write_skill_config
+    以 compare-and-swap 原子写回，写入后配置的写入计数加一。
+
+    Args:
+        target: 项目中的 skill_config.json
+        source: 模板 skill_config_template.json
+        state: 项目部署状态（可选）
+        backup_snapshot: 备份快照（可选）
+
+    Returns:
+        FileChange 对象记录变更信息
+    """
+    import json
+
+    entry = get_template_manifest().entry_for(source)
+    record = state.get(target) if state is not None else None
+    conflicts: List[str] = []
+    merged_config = None
+
+    if entry is not None and record is not None and record.sha256 == entry.sha256:
+        return FileChange(path=target, change_type="skipped", message="模板未变化,保留用户配置")
+
+    # 读取、合并和写回期间持有锁，与 skillconfig 脚本的写入串行执行
+    with skill_config_lock(target):
+        try:
+            current = json.loads(target.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            current = None
+
+        if entry is not None and record is not None and current is not None:
+            base = load_merge_base(state.base_dir, record.sha256)
+            if base is not None:
+                try:
+                    merged_config, conflicts = merge_json(
+                        json.loads(base), current, json.loads(read_template_text(source))
+                    )
+                except ValueError:
+                    merged_config = None
+
+        if merged_config is None:
+            merged_config = _merge_skill_config(target, source)
+
+        # 先备份再以临时文件 + 原子替换写回，写入中断不会留下截断的配置
+        backup_path = None
+        if target.exists():
+            backup_path = backup_file(target, backup_snapshot=backup_snapshot)
+        generation = get_generation(current) if isinstance(current, dict) else 0
+        write_skill_config(target, merged_config, generation)
+    _record_skill_config(target, source, state, merged=True)
+
+    if backup_path is not None:
+        change = FileChange(
+            path=target,
+            change_type="backed_up",
+            backup_path=backup_path,
+            message=f"已更新 (备份: {backup_path.name})",
+        )
+    else:
+        change = FileChange(path=target, change_type="created", message="已创建")
+
+    if conflicts:
+        change.message = f"已合并配置,{len(conflicts)} 项与模板更新冲突,保留用户的值"
+    return change
+
+
 def _merge_skill_config(
     existing_config_path: Path, template_config_path: Path
 ) -> dict:
@@ -455,7 +891,7 @@ def _merge_skill_config(
     import json
 
     # 读取模板配置 (官方配置)
-    template_config = json.loads(template_config_path.read_text(encoding="utf-8"))
+    template_config = json.loads(read_template_text(template_config_path))
 
     # 如果现有配置不存在，直接返回模板配置
     if not existing_config_path.exists():
@@ -504,11 +940,16 @@ def _merge_skill_config(
                 # 新增的 Skill，使用模板配置
                 merged_skills[category][skill_name] = skill_config
 
+    # 合并配置方案（保留用户新增或修改的方案）
+    merged_profiles = dict(template_config.get("profiles", {}))
+    merged_profiles.update(existing_config.get("profiles", {}))
+
     # 构建最终配置
     merged_config = {
         "version": template_config["version"],
         "platform": template_config["platform"],
         "skills": merged_skills,
+        "profiles": merged_profiles,
         "notes": template_config.get("notes", {}),
     }
 
@@ -0,0 +1,282 @@
+"""
+模板清单模块
+
+为包内模板目录生成并加载内容寻址清单 (manifest)，记录每个模板文件的
+相对路径、大小和 SHA-256。清单在构建 wheel 时生成 (见 hatch_build.py)，
+运行时每个进程只加载一次，升级时可仅凭元数据判断文件是否未变化。
+
+构建 wheel 时还会将整个模板目录打包为单个归档 templates.zip (见 write_template_bundle)，
+运行时由 template_bundle 通过内存映射直接读取归档成员。
+
+本模块只依赖标准库，以便构建钩子在包未安装时直接加载。
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# 清单文件名（位于模板根目录下，本身不计入清单）
+MANIFEST_FILENAME = "manifest.json"
+
+# 清单格式版本
+MANIFEST_FORMAT_VERSION = 1
+
+# 计算哈希时的读取块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 模板归档文件名（位于模板根目录旁，即包目录下）
+BUNDLE_FILENAME = "templates.zip"
+
+# 归档成员的固定时间戳，使相同模板生成完全相同的归档
+BUNDLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# 进程内已加载的清单（按模板根目录）
+_loaded_manifests: Dict[Path, "TemplateManifest"] = {}
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """单个模板文件的清单条目"""
+
+    path: str  # 相对模板根目录的 POSIX 路径
+    size: int
+    sha256: str
+
+
+@dataclass
+class TemplateManifest:
+    """模板目录清单"""
+
+    root: Path
+    entries: Dict[str, ManifestEntry]
+
+    def get(self, relative_path: str) -> Optional[ManifestEntry]:
+        """按相对路径 (POSIX 格式) 查找条目"""
+        return self.entries.get(relative_path)
+
+    def entry_for(self, path: Path) -> Optional[ManifestEntry]:
+        """
+        按模板文件的绝对路径查找条目
+
+        Args:
+            path: 位于模板根目录下的文件路径
+
+        Returns:
+            对应的 ManifestEntry，不在清单中时返回 None
+        """
+        try:
+            relative = path.relative_to(self.root)
+        except ValueError:
+            return None
+        return self.entries.get(relative.as_posix())
+
+    def iter_prefix(self, prefix: str) -> Iterator[ManifestEntry]:
+        """
+        遍历指定目录前缀下的所有条目
+
+        Args:
+            prefix: 目录前缀（如 "elecspecify/skills"）
+        """
+        prefix = prefix.rstrip("/") + "/"
+        for relative_path, entry in self.entries.items():
+            if relative_path.startswith(prefix):
+                yield entry
+
+    def total_size(self, prefix: str = "") -> int:
+        """计算指定前缀下所有文件的总字节数"""
+        if not prefix:
+            return sum(entry.size for entry in self.entries.values())
+        return sum(entry.size for entry in self.iter_prefix(prefix))
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典"""
+        return {
+            "format": MANIFEST_FORMAT_VERSION,
+            "files": {
+                relative_path: {"size": entry.size, "sha256": entry.sha256}
+                for relative_path, entry in sorted(self.entries.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, root: Path, data: dict) -> "TemplateManifest":
+        """从字典恢复清单"""
+        if data.get("format") != MANIFEST_FORMAT_VERSION:
+            raise ValueError(f"不支持的模板清单格式: {data.get('format')}")
+
+        entries = {
+            relative_path: ManifestEntry(
+                path=relative_path, size=int(info["size"]), sha256=info["sha256"]
+            )
+            for relative_path, info in data.get("files", {}).items()
+        }
+        return cls(root=root, entries=entries)
+
+
+def compute_sha256(path: Path) -> str:
+    """
+    分块计算文件的 SHA-256
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制摘要字符串
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_template_manifest(root: Path) -> TemplateManifest:
+    """
+    扫描模板目录并生成清单
+
+    Args:
+        root: 模板根目录
+
+    Returns:
+        TemplateManifest 对象
+
+    Raises:
+        FileNotFoundError: 模板目录不存在
+    """
+    if not root.is_dir():
+        raise FileNotFoundError(f"模板目录不存在: {root}")
+
+    entries: Dict[str, ManifestEntry] = {}
+
+    for dir_path, dir_names, file_names in os.walk(root):
+        # 跳过 Python 缓存目录
+        dir_names[:] = [name for name in dir_names if name != "__pycache__"]
+
+        for file_name in file_names:
+            file_path = Path(dir_path) / file_name
+            relative_path = file_path.relative_to(root).as_posix()
+
+            if relative_path == MANIFEST_FILENAME:
+                continue
+
+            entries[relative_path] = ManifestEntry(
+                path=relative_path,
+                size=file_path.stat().st_size,
+                sha256=compute_sha256(file_path),
+            )
+
+    return TemplateManifest(root=root, entries=entries)
+
+
+def write_template_manifest(root: Path, output_path: Optional[Path] = None) -> Path:
+    """
+    生成清单并写入 JSON 文件
+
+    Args:
+        root: 模板根目录
+        output_path: 输出路径（默认 <root>/manifest.json）
+
+    Returns:
+        写入的清单文件路径
+    """
+    manifest = build_template_manifest(root)
+    output_path = output_path or root / MANIFEST_FILENAME
+    output_path.write_text(
+        json.dumps(manifest.to_dict(), indent=1, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+    return output_path
+
+
+def write_template_bundle(root: Path, output_path: Path) -> Path:
+    """
+    将模板目录打包为单个归档
+
+    所有成员以不压缩 (ZIP_STORED) 方式按路径顺序写入，运行时可直接从内存映射中
+    切片读取；清单作为第一个成员 manifest.json 一同写入。文件权限位保存在成员属性中。
+
+    Args:
+        root: 模板根目录
+        output_path: 归档输出路径
+
+    Returns:
+        写入的归档路径
+    """
+    manifest = build_template_manifest(root)
+    manifest_data = json.dumps(manifest.to_dict(), indent=1, ensure_ascii=False) + "\n"
+
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as bundle:
+        info = zipfile.ZipInfo(MANIFEST_FILENAME, date_time=BUNDLE_DATE_TIME)
+        info.external_attr = 0o644 << 16
+        bundle.writestr(info, manifest_data.encode("utf-8"))
+
+        for relative_path in sorted(manifest.entries):
+            file_path = root / relative_path
+            info = zipfile.ZipInfo(relative_path, date_time=BUNDLE_DATE_TIME)
+            info.external_attr = (file_path.stat().st_mode & 0o777) << 16
+            bundle.writestr(info, file_path.read_bytes())
+
+    return output_path
+
+
+def load_template_manifest(root: Path) -> TemplateManifest:
+    """
+    加载模板清单（每个进程每个根目录只加载一次）
+
+    优先读取构建时生成的清单 (模板归档或 manifest.json)；开发环境 (源码树/可编辑安装)
+    中没有清单时，退回到现场扫描模板目录。
+
+    Args:
+        root: 模板根目录
+
+    Returns:
+        TemplateManifest 对象
+    """
+    manifest = _loaded_manifests.get(root)
+    if manifest is None:
+        manifest = _read_template_manifest(root)
+        _loaded_manifests[root] = manifest
+    return manifest
+
+
+def register_template_manifest(manifest: TemplateManifest) -> None:
+    """
+    注册已加载的清单，使 load_template_manifest() 直接复用
+
+    用于多进程批量升级: 主进程加载一次清单后传给各工作进程。
+    """
+    _loaded_manifests[manifest.root] = manifest
+
+
+def _read_template_manifest(root: Path) -> TemplateManifest:
+    """
+    读取清单: 优先读取模板归档中的 manifest.json，其次读取模板目录中的 manifest.json，
+    都不存在或损坏时扫描模板目录
+    """
+    bundle_file = root.parent / BUNDLE_FILENAME
+    manifest_file = root / MANIFEST_FILENAME
+
+    try:
+        if bundle_file.is_file():
+            with zipfile.ZipFile(bundle_file) as bundle:
+                data = json.loads(bundle.read(MANIFEST_FILENAME).decode("utf-8"))
+            return TemplateManifest.from_dict(root, data)
+
+        if manifest_file.exists():
+            data = json.loads(manifest_file.read_text(encoding="utf-8"))
+            return TemplateManifest.from_dict(root, data)
+    except (ValueError, KeyError, zipfile.BadZipFile):
+        # 清单损坏时退回到现场扫描
+        pass
+
+    return build_template_manifest(root)
+
+
+if __name__ == "__main__":
+    import sys
+
+    template_root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "templates"
+    print(write_template_manifest(template_root))
@@ -0,0 +1,443 @@
+"""
+模板同步 (elecspeckit sync)
+
+供模板开发者使用: 修改 src/elecspeckit_init/templates 下的模板后，只把变化的
+模板文件推送到一个或多个测试项目中，而不是每次重新运行 elecspeckit init。
+
+模板路径到项目路径的映射与 init 相同 (AGENT_CONFIG、COMMAND_BASENAMES):
+
+- <平台>/<命令>.<扩展名>       -> <平台目录>/commands/<命令>.<扩展名>
+- elecspecify/scripts/<路径>  -> .elecspecify/scripts/<路径>
+- elecspecify/skills/<路径>   -> .claude/skills/<路径> (仅 Claude 平台)
+
+constitution、文档模板和 skill_config.json 只在 init 时写入用户内容，不同步；
+被用户修改过的文件、链接到共享缓存的 Skills 和延迟部署的 Skills 同样跳过。
+删除模板文件不会删除项目中的文件 (与 init 升级一致)。
+
+watch 模式在 Linux 上通过 inotify (ctypes) 监听模板目录，其他平台或 inotify
+不可用时退回按间隔轮询 stat 元数据。
+
+只支持源码树/可编辑安装 (模板为目录而非归档)。
+"""
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .deferred_skills import select_deferred_skills
+from .deploy_state import DeployState
+from .fs_utils import FileChange, files_equal, write_or_update_file
+from .skills_cache import is_link
+from .template_bundle import TEMPLATE_ROOT, copy_template_file, read_template_text
+from .template_manager import AGENT_CONFIG, COMMAND_BASENAMES, detect_platform
+from .template_manifest import MANIFEST_FILENAME, compute_sha256
+from .three_way_merge import store_merge_base
+
+# 收到第一个变更事件后继续等待的时间（编辑器保存时通常会产生一串事件）
+SYNC_DEBOUNCE_SECONDS = 0.02
+
+# 轮询模式的扫描间隔
+DEFAULT_POLL_INTERVAL = 0.5
+
+# 模板目录树到项目目录的映射（相对模板根目录 -> 相对项目根目录）
+SCRIPTS_PREFIX = "elecspecify/scripts/"
+SKILLS_PREFIX = "elecspecify/skills/"
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# inotify_event 头部: wd, mask, cookie, len
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+# 同步回调: (项目, 变更记录)
+SyncCallback = Callable[["SyncProject", FileChange], None]
+
+
+@dataclass
+class SyncProject:
+    """同步目标项目"""
+
+    base_dir: Path
+    platform: str
+    state: Optional[DeployState] = field(default=None, repr=False)  # 未提供时从项目加载
+
+    def __post_init__(self) -> None:
+        if self.state is None:
+            self.state = DeployState.load(self.base_dir)
+
+
+def open_sync_project(base_dir: Path) -> SyncProject:
+    """
+    打开同步目标项目并检测其平台
+
+    Raises:
+        ValueError: 不是 ElecSpeckit 项目或无法检测平台
+    """
+    base_dir = base_dir.resolve()
+    platform = detect_platform(base_dir)
+    if platform is None:
+        raise ValueError(f"无法检测到项目的 Agent 平台 (.claude/ 或 .qwen/ 目录不存在): {base_dir}")
+    return SyncProject(base_dir=base_dir, platform=platform)
+
+
+def map_template_path(relative_path: str, platform: str) -> Optional[Path]:
+    """
+    将模板路径映射为项目中的目标路径
+
+    Args:
+        relative_path: 相对模板根目录的 POSIX 路径
+        platform: 项目的 Agent 平台
+
+    Returns:
+        相对项目根目录的目标路径；sync 不处理的模板返回 None
+    """
+    config = AGENT_CONFIG[platform]
+
+    directory, _, name = relative_path.rpartition("/")
+    if directory == platform:
+        extension = config["file_extension"]
+        if name.endswith(extension) and name[: -len(extension)] in COMMAND_BASENAMES:
+            return Path(config["dir_name"]) / config["commands_dir"] / name
+        return None
+
+    if relative_path.startswith(SCRIPTS_PREFIX):
+        return Path(".elecspecify") / "scripts" / relative_path[len(SCRIPTS_PREFIX) :]
+
+    if relative_path.startswith(SKILLS_PREFIX) and platform == "claude":
+        return Path(".claude") / "skills" / relative_path[len(SKILLS_PREFIX) :]
+
+    return None
+
+
+def sync_template_file(project: SyncProject, relative_path: str) -> Optional[FileChange]:
+    """
+    将单个模板文件同步到项目中（调用方负责 project.state.save()）
+
+    Args:
+        project: 目标项目
+        relative_path: 相对模板根目录的 POSIX 路径
+
+    Returns:
+        变更记录；模板不映射到该项目 (含链接和延迟部署的 Skills)、
+        已被删除或内容相同时返回 None
+    """
+    target_path = map_template_path(relative_path, project.platform)
+    source = TEMPLATE_ROOT / relative_path
+    if target_path is None or not source.is_file():
+        return None
+
+    target = project.base_dir / target_path
+
+    if relative_path.startswith(SKILLS_PREFIX):
+        skill_name = relative_path[len(SKILLS_PREFIX) :].split("/", 1)[0]
+        skill_dir = project.base_dir / ".claude" / "skills" / skill_name
+        if skill_dir != target and is_link(skill_dir):
+            # 链接到共享缓存的 Skill 不能原地修改
+            return None
+        if select_deferred_skills(project.base_dir, Path(".claude") / "skills", [skill_name]):
+            return None
+
+    existed = target.exists()
+    if existed:
+        if files_equal(source, target):
+            return None
+        if not project.state.is_unmodified(target):
+            return FileChange(path=target, change_type="skipped", message="文件已被修改,跳过")
+
+    if relative_path.rpartition("/")[0] == project.platform:
+        # 命令模板与 init 相同，以文本方式写入，并保存合并基准供升级时三方合并
+        change = write_or_update_file(target, read_template_text(source), create_backup=False)
+        sha256 = store_merge_base(project.base_dir, source.read_bytes())
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        strategy = copy_template_file(source, target)
+        change = FileChange(
+            path=target,
+            change_type="updated" if existed else "created",
+            message="已同步",
+            strategy=strategy,
+        )
+        sha256 = compute_sha256(source)
+
+    project.state.record(target, sha256)
+    return change
+
+
+def iter_template_files() -> Iterable[str]:
+    """遍历模板目录中的全部文件（相对模板根目录的 POSIX 路径，已排序）"""
+    relative_paths = []
+    for dir_path, dir_names, file_names in os.walk(TEMPLATE_ROOT):
+        dir_names[:] = [name for name in dir_names if name != "__pycache__"]
+        for file_name in file_names:
+            relative_path = (Path(dir_path) / file_name).relative_to(TEMPLATE_ROOT).as_posix()
+            if not is_ignored_template(relative_path):
+                relative_paths.append(relative_path)
+    return sorted(relative_paths)
+
+
+def is_ignored_template(relative_path: str) -> bool:
+    """是否为不同步的文件（清单、Python 缓存、编辑器临时文件）"""
+    name = relative_path.rpartition("/")[2]
+    return (
+        relative_path == MANIFEST_FILENAME
+        or "__pycache__/" in f"{relative_path}/"
+        or name.endswith(("~", ".swp", ".swx", ".tmp", ".pyc"))
+        or name.startswith(".#")
+        or name == "4913"  # vim 保存前的写入探测文件
+    )
+
+
+def sync_templates(
+    projects: List[SyncProject],
+    relative_paths: Iterable[str],
+    callback: Optional[SyncCallback] = None,
+) -> int:
+    """
+    将一组模板文件同步到所有项目，并保存各项目的部署状态
+
+    Returns:
+        写入的文件数
+    """
+    written = 0
+    for relative_path in relative_paths:
+        for project in projects:
+            change = sync_template_file(project, relative_path)
+            if change is None:
+                continue
+            if change.change_type != "skipped":
+                written += 1
+            if callback is not None:
+                callback(project, change)
+
+    for project in projects:
+        project.state.save()
+    return written
+
+
+def watch_templates(
+    projects: List[SyncProject],
+    callback: Optional[SyncCallback] = None,
+    stop_event: Optional[threading.Event] = None,
+    use_polling: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> None:
+    """
+    先完整同步一次，然后持续监听模板目录并推送变化的文件
+
+    Args:
+        projects: 目标项目
+        callback: 每个变更记录的回调
+        stop_event: 设置后退出监听（未提供时一直运行到 KeyboardInterrupt）
+        use_polling: 强制使用轮询
+        poll_interval: 轮询间隔（秒）
+
+    Raises:
+        RuntimeError: 模板不是目录形式（如从 wheel 安装）
+    """
+    if not TEMPLATE_ROOT.is_dir():
+        raise RuntimeError(f"模板目录不存在: {TEMPLATE_ROOT}，sync 需要源码树或可编辑安装")
+
+    watcher = create_watcher(TEMPLATE_ROOT, use_polling, poll_interval)
+    try:
+        sync_templates(projects, iter_template_files(), callback)
+
+        while stop_event is None or not stop_event.is_set():
+            changed = watcher.wait(1.0)
+            if changed is not None and not changed:
+                continue
+
+            # 合并短时间内的后续事件
+            while changed is not None:
+                more = watcher.wait(SYNC_DEBOUNCE_SECONDS)
+                if more is None:
+                    changed = None
+                elif not more:
+                    break
+                else:
+                    changed |= more
+
+            # 事件队列溢出时重新比较全部模板
+            relative_paths = iter_template_files() if changed is None else sorted(changed)
+            sync_templates(
+                projects,
+                [path for path in relative_paths if not is_ignored_template(path)],
+                callback,
+            )
+    finally:
+        watcher.close()
+
+
+def create_watcher(root: Path, use_polling: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """
+    创建模板目录监听器
+
+    Returns:
+        InotifyWatcher (Linux 且 inotify 可用) 或 PollingWatcher
+    """
+    if not use_polling and sys.platform == "linux":
+        try:
+            return InotifyWatcher(root)
+        except OSError:
+            pass
+    return PollingWatcher(root, poll_interval)
+
+
+class InotifyWatcher:
+    """
+    基于 inotify 的递归目录监听器
+
+    wait() 返回自上次调用以来写入完成 (IN_CLOSE_WRITE) 或移入 (IN_MOVED_TO) 的文件；
+    新建的子目录自动加入监听，其中已有的文件视为变更。
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._watches: Dict[int, Path] = {}
+        try:
+            self._add_tree(root)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _add_tree(self, directory: Path) -> List[str]:
+        """监听目录及其全部子目录，返回其中已有的文件"""
+        existing: List[str] = []
+        for dir_path, dir_names, file_names in os.walk(directory):
+            dir_names[:] = [name for name in dir_names if name != "__pycache__"]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), self.MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOENT:
+                    continue
+                raise OSError(error, os.strerror(error), dir_path)
+            self._watches[wd] = Path(dir_path)
+            existing.extend(
+                (Path(dir_path) / name).relative_to(self.root).as_posix() for name in file_names
+            )
+        return existing
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """
+        等待变更事件
+
+        Returns:
+            变更文件的相对路径集合 (超时为空集合)；事件队列溢出时返回 None
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and path.name != "__pycache__":
+                        changed.update(self._add_tree(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.add(path.relative_to(self.root).as_posix())
+
+        return changed
+
+    def close(self) -> None:
+        """关闭 inotify 实例"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """按间隔比较 stat 元数据 (大小、修改时间) 的目录监听器"""
+
+    def __init__(self, root: Path, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            dir_names[:] = [name for name in dir_names if name != "__pycache__"]
+            for file_name in file_names:
+                path = Path(dir_path) / file_name
+                try:
+                    stat_result = path.stat()
+                except OSError:
+                    continue
+                snapshot[path.relative_to(self.root).as_posix()] = (
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                )
+        return snapshot
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """
+        等待到下一次扫描（不超过 timeout）并返回变化的文件
+
+        Returns:
+            新增或修改的文件的相对路径集合（本次未扫描时为空集合）
+        """
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {
+            path for path, signature in snapshot.items() if self._snapshot.get(path) != signature
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        """轮询监听器无需释放资源"""
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+skillconfig_apply.py - 批量应用 Skills 配置变更（事务）
+
+用法:
+    python skillconfig_apply.py --profile offline
+    python skillconfig_apply.py --profile full --api-key perplexity-search=pplx-...
+    python skillconfig_apply.py --enable arxiv-search,web-research --disable docs-seeker
+    python skillconfig_apply.py --file my-profile.json [--dry-run]
+    python skillconfig_apply.py --list-profiles
+
+配置方案 (profile) 格式:
+    {
+      "enable": ["arxiv-search", "..."],   # "*" 表示全部 Skills
+      "disable": ["web-research", "..."],  # "*" 表示全部 Skills
+      "api_keys": {"perplexity-search": "pplx-..."}
+    }
+
+    命名方案保存在 skill_config.json 的 "profiles" 字段中（内置 "full" 和 "offline"），
+    也可以用 --file 指定 JSON 文件。--enable/--disable/--api-key 在方案之后应用。
+
+功能:
+    所有变更在一个进程内作为一个事务完成:
+    1. 读取一次配置，解析全部变更
+    2. 部署需要启用的延迟部署 Skill，重命名所有 SKILL.md ↔ (DISABLED)SKILL.md
+    3. 对修改后的配置执行一次验证，失败时撤销全部重命名
+    4. 同步 API 密钥到 SKILL.md frontmatter
+    5. 写回一次配置文件，失败时撤销全部文件修改
+
+退出码:
+    0: 成功（包括没有任何变更的幂等操作）
+    1: Skill 或配置方案不存在、参数无效
+    2: 文件重命名或写入失败（已撤销全部修改）
+    3: 验证失败或延迟部署的 Skill 无法部署（已撤销全部修改）
+    4: 配置文件 JSON 格式错误
+    5: 配置文件在读取后被其他进程修改（已撤销全部修改）
+"""
+
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from skillconfig_lib import (
+    DISABLED_SKILL_MD,
+    SKILL_MD,
+    SKILLS_PATH,
+    SkillConfigError,
+    config_lock,
+    exit_with_error,
+    find_skill,
+    load_config,
+    materialize_deferred_skill,
+    require_project_root,
+    save_config,
+    setup_utf8_output,
+    unshare_skill_dir,
+    update_skill_frontmatter,
+    validate_config,
+)
+
+
+def load_profile(config, profile_name=None, profile_file=None):
+    """
+    读取配置方案
+
+    Returns:
+        配置方案字典（未指定方案时为空字典）
+
+    Raises:
+        SkillConfigError: 方案不存在或格式错误 (退出码 1)
+    """
+    if profile_file is not None:
+        try:
+            profile = json.loads(Path(profile_file).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise SkillConfigError(f"无法读取配置方案文件: {e}", 1) from None
+    elif profile_name is not None:
+        profiles = config.get("profiles", {})
+        if profile_name not in profiles:
+            raise SkillConfigError(
+                f"配置方案 '{profile_name}' 不存在",
+                1,
+                "运行 'python skillconfig_apply.py --list-profiles' 查看所有配置方案",
+            )
+        profile = profiles[profile_name]
+    else:
+        return {}
+
+    if not isinstance(profile, dict):
+        raise SkillConfigError("配置方案格式错误: 应为 JSON 对象", 1)
+    return profile
+
+
+def resolve_changes(config, profile, enable, disable, api_keys):
+    """
+    计算每个 Skill 的目标状态
+
+    先应用配置方案 (先 disable 后 enable)，再应用命令行参数（命令行参数优先）。
+
+    Returns:
+        ({Skill 名称: 目标 enabled}, {Skill 名称: API 密钥}) 元组
+
+    Raises:
+        SkillConfigError: Skill 不存在、同一 Skill 同时启用和禁用或不需要 API 密钥 (退出码 1)
+    """
+    all_skills = [name for skills in config.get("skills", {}).values() for name in skills]
+
+    def expand(names):
+        expanded = []
+        for name in names:
+            if name == "*":
+                expanded.extend(all_skills)
+            else:
+                find_skill(config, name)
+                expanded.append(name)
+        return expanded
+
+    # 方案中先禁用再启用，便于 {"disable": ["*"], "enable": [...]} 只保留指定的 Skills
+    targets = {}
+    for name in expand(profile.get("disable", [])):
+        targets[name] = False
+    for name in expand(profile.get("enable", [])):
+        targets[name] = True
+
+    both = set(enable) & set(disable)
+    if both:
+        raise SkillConfigError(f"Skill 不能同时启用和禁用: {', '.join(sorted(both))}", 1)
+    for name in expand(enable):
+        targets[name] = True
+    for name in expand(disable):
+        targets[name] = False
+
+    keys = dict(profile.get("api_keys", {}))
+    keys.update(api_keys)
+    for name in keys:
+        _category, skill_config = find_skill(config, name)
+        if not skill_config.get("requires_api", False):
+            raise SkillConfigError(f"Skill '{name}' 不需要 API 密钥", 1)
+
+    return targets, keys
+
+
+class Transaction:
+    """
+    记录已执行的文件修改，失败时按相反顺序撤销
+    """
+
+    def __init__(self):
+        self.renames = []  # (原路径, 新路径)
+        self.rewrites = []  # (文件路径, 原内容)
+
+    def rename(self, source, target):
+        """重命名文件并记录"""
+        source.rename(target)
+        self.renames.append((source, target))
+
+    def record_rename(self, source, target):
+        """记录已由其他操作完成的重命名（撤销时改回 source）"""
+        self.renames.append((source, target))
+
+    def update_frontmatter(self, skill_md, api_key):
+        """更新 SKILL.md frontmatter 并记录原内容"""
+        original = skill_md.read_text(encoding="utf-8")
+        updated = update_skill_frontmatter(skill_md, api_key)
+        if updated:
+            self.rewrites.append((skill_md, original))
+        return updated
+
+    def rollback(self):
+        """撤销全部修改（尽力而为，返回无法撤销的错误信息）"""
+        failures = []
+        for path, original in reversed(self.rewrites):
+            try:
+                path.write_text(original, encoding="utf-8")
+            except OSError as e:
+                failures.append(f"{path}: {e}")
+        for source, target in reversed(self.renames):
+            try:
+                target.rename(source)
+            except OSError as e:
+                failures.append(f"{target} → {source}: {e}")
+        return failures
+
+
+def abort(transaction, error):
+    """撤销事务并抛出错误"""
+    failures = transaction.rollback()
+    if failures:
+        error.hint = "以下修改无法撤销，请运行 skillconfig_validate.py 检查:\n  " + "\n  ".join(failures)
+    raise error
+
+
+def apply_changes(project_root, config, config_file, targets, api_keys, dry_run=False):
+    """在一个事务中应用全部变更"""
+    skills_dir = project_root / SKILLS_PATH
+
+    enabled = []
+    disabled = []
+    for name, target in targets.items():
+        _category, skill_config = find_skill(config, name)
+        skill_md = skills_dir / name / SKILL_MD
+        disabled_skill_md = skills_dir / name / DISABLED_SKILL_MD
+        if target and (not skill_config.get("enabled", False) or disabled_skill_md.exists()):
+            enabled.append(name)
+        elif not target and (skill_config.get("enabled", False) or skill_md.exists()):
+            disabled.append(name)
+    updated_keys = {
+        name: key for name, key in api_keys.items()
+        if find_skill(config, name)[1].get("api_key", "") != key
+    }
+
+    if not (enabled or disabled or updated_keys):
+        print("✅ Skills 配置已是目标状态（幂等操作）")
+        return 0
+
+    if dry_run:
+        print("将执行以下变更（--dry-run，未修改任何文件）:")
+        for name in enabled:
+            print(f"  ✅ 启用 {name}")
+        for name in disabled:
+            print(f"  ❌ 禁用 {name}")
+        for name in updated_keys:
+            print(f"  🔑 更新 API 密钥 {name}")
+        return 0
+
+    transaction = Transaction()
+    frontmatter_keys = dict(updated_keys)
+    try:
+        # 1. 部署延迟部署的 Skill 并重命名 SKILL.md
+        for name in enabled:
+            skill_dir = skills_dir / name
+            if materialize_deferred_skill(project_root, skills_dir, name):
+                # 新部署的 Skill 视为由禁用状态启用，撤销时重新禁用
+                transaction.record_rename(skill_dir / DISABLED_SKILL_MD, skill_dir / SKILL_MD)
+                api_key = find_skill(config, name)[1].get("api_key", "")
+                if api_key.strip():
+                    frontmatter_keys.setdefault(name, api_key)
+            elif (skill_dir / DISABLED_SKILL_MD).exists():
+                transaction.rename(skill_dir / DISABLED_SKILL_MD, skill_dir / SKILL_MD)
+            find_skill(config, name)[1]["enabled"] = True
+
+        for name in disabled:
+            skill_dir = skills_dir / name
+            if (skill_dir / SKILL_MD).exists():
+                unshare_skill_dir(skill_dir)
+                transaction.rename(skill_dir / SKILL_MD, skill_dir / DISABLED_SKILL_MD)
+            find_skill(config, name)[1]["enabled"] = False
+    except SkillConfigError as e:
+        abort(transaction, e)
+    except OSError as e:
+        abort(transaction, SkillConfigError(f"无法重命名文件: {e}", 2))
+
+    # 2. 对修改后的配置执行一次验证
+    for name, key in updated_keys.items():
+        find_skill(config, name)[1]["api_key"] = key
+    result = validate_config(project_root, config)
+    if result["status"] != "valid":
+        details = "\n".join(f"  {error['skill']}: {error['error']}" for error in result["errors"])
+        abort(transaction, SkillConfigError(f"配置验证失败，已撤销全部修改\n{details}", 3))
+
+    # 3. 同步 API 密钥到 SKILL.md frontmatter
+    frontmatter_failed = []
+    try:
+        for name, key in frontmatter_keys.items():
+            skill_dir = skills_dir / name
+            skill_md = skill_dir / SKILL_MD
+            if not skill_md.exists():
+                skill_md = skill_dir / DISABLED_SKILL_MD
+            if not skill_md.exists():
+                continue
+            unshare_skill_dir(skill_dir)
+            if not transaction.update_frontmatter(skill_md, key):
+                frontmatter_failed.append(name)
+    except OSError as e:
+        abort(transaction, SkillConfigError(f"无法更新 SKILL.md: {e}", 2))
+
+    # 4. 写回一次配置文件
+    try:
+        if updated_keys:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            shutil.copy2(config_file, config_file.with_suffix(f".json.bak.{timestamp}"))
+        save_config(config_file, config)
+    except SkillConfigError as e:
+        abort(transaction, e)
+    except OSError as e:
+        abort(transaction, SkillConfigError(f"无法写入配置文件: {e}", 2))
+
+    # 输出结果
+    print(f"✅ 已应用 Skills 配置变更 (配置文件: {config_file})")
+    for name in enabled:
+        print(f"   ✅ 已启用 {name}")
+    for name in disabled:
+        print(f"   ❌ 已禁用 {name}")
+    for name in updated_keys:
+        print(f"   🔑 已更新 API 密钥 {name}")
+    for name in frontmatter_failed:
+        print(f"   ⚠ 警告: 无法更新 {name} 的 SKILL.md frontmatter，可能需要重启 Claude Code")
+    for warning in result["warnings"]:
+        print(f"   ⚠ {warning['skill']}: {warning['warning']}")
+
+    return 0
+
+
+def list_profiles():
+    """列出 skill_config.json 中的配置方案"""
+    project_root = require_project_root()
+    config, _config_file = load_config(project_root)
+    profiles = config.get("profiles", {})
+    if not profiles:
+        print("skill_config.json 中没有配置方案")
+        return 0
+
+    for name, profile in profiles.items():
+        print(f"{name}:")
+        if profile.get("description"):
+            print(f"  {profile['description']}")
+        if profile.get("enable"):
+            print(f"  启用: {', '.join(profile['enable'])}")
+        if profile.get("disable"):
+            print(f"  禁用: {', '.join(profile['disable'])}")
+    return 0
+
+
+def split_names(values):
+    """解析逗号分隔的 Skill 名称列表（参数可重复）"""
+    return [name.strip() for value in values for name in value.split(",") if name.strip()]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量应用 ElecSpecKit Skills 配置变更")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--profile", help="skill_config.json 中的配置方案名称（例如：offline）")
+    source.add_argument("--file", help="配置方案 JSON 文件")
+    source.add_argument("--list-profiles", action="store_true", help="列出所有配置方案")
+    parser.add_argument("--enable", action="append", default=[], help="启用的 Skills（逗号分隔）")
+    parser.add_argument("--disable", action="append", default=[], help="禁用的 Skills（逗号分隔）")
+    parser.add_argument(
+        "--api-key",
+        action="append",
+        default=[],
+        metavar="SKILL=KEY",
+        help="设置 API 密钥（可重复，KEY 为空时清空）",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="只显示将执行的变更")
+
+    args = parser.parse_args()
+
+    try:
+        if args.list_profiles:
+            sys.exit(list_profiles())
+
+        api_keys = {}
+        for item in args.api_key:
+            name, sep, key = item.partition("=")
+            if not sep or not name.strip():
+                raise SkillConfigError(f"--api-key 格式错误: '{item}'（应为 SKILL=KEY）", 1)
+            api_keys[name.strip()] = key
+
+        enable = split_names(args.enable)
+        disable = split_names(args.disable)
+        if not (args.profile or args.file or enable or disable or api_keys):
+            parser.error("请指定 --profile、--file、--enable、--disable 或 --api-key")
+
+        project_root = require_project_root()
+        # 整个事务期间持有配置锁，并发的 skillconfig 操作依次执行
+        with config_lock(project_root):
+            config, config_file = load_config(project_root)
+            profile = load_profile(config, args.profile, args.file)
+            targets, keys = resolve_changes(config, profile, enable, disable, api_keys)
+            code = apply_changes(project_root, config, config_file, targets, keys, dry_run=args.dry_run)
+        sys.exit(code)
+    except SkillConfigError as e:
+        exit_with_error(e)
+
+
+if __name__ == "__main__":
+    setup_utf8_output()
+
+    main()
@@ -15,97 +15,67 @@ skillconfig_disable.py - 禁用 Skill
     0: 成功（包括已禁用的幂等操作）
     1: Skill 不存在
     2: 文件重命名失败（权限问题或文件被占用）
+    5: 配置文件在读取后被其他进程修改（未写入）
 """
 
-import json
 import sys
-from pathlib import Path
 
-
-def find_project_root():
-    """从当前目录向上查找项目根目录"""
-    current = Path.cwd()
-    while current != current.parent:
-        if (current / ".elecspecify").exists():
-            return current
-        current = current.parent
-    return None
+from skillconfig_lib import (
+    DISABLED_SKILL_MD,
+    SKILL_MD,
+    SKILLS_PATH,
+    SkillConfigError,
+    config_lock,
+    exit_with_error,
+    find_skill,
+    load_config,
+    require_project_root,
+    save_config,
+    setup_utf8_output,
+    unshare_skill_dir,
+)
 
 
 def disable_skill(skill_name):
     """禁用 Skill"""
-    project_root = find_project_root()
-    if not project_root:
-        print("错误: 未找到 ElecSpecKit 项目根目录", file=sys.stderr)
-        print("提示: 请在项目目录中运行此命令", file=sys.stderr)
-        sys.exit(1)
-
-    config_file = project_root / ".elecspecify" / "memory" / "skill_config.json"
-    skills_dir = project_root / ".claude" / "skills"
+    project_root = require_project_root()
+    # 读取、修改和写回期间持有配置锁，并发的 skillconfig 操作依次执行
+    with config_lock(project_root):
+        config, config_file = load_config(project_root)
+        _category, skill_config = find_skill(config, skill_name)
+        skills_dir = project_root / SKILLS_PATH
 
-    if not config_file.exists():
-        print(f"错误: 配置文件不存在: {config_file}", file=sys.stderr)
-        sys.exit(1)
+        # 检查是否已禁用（幂等性）
+        already_disabled = not skill_config.get("enabled", False)
 
-    # 读取配置
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"错误: 配置文件 JSON 格式错误: {e}", file=sys.stderr)
-        sys.exit(4)
-
-    # 查找 Skill
-    found = False
-    skill_category = None
-    skill_config = None
-
-    for category, skills in config.get("skills", {}).items():
-        if skill_name in skills:
-            found = True
-            skill_category = category
-            skill_config = skills[skill_name]
-            break
-
-    if not found:
-        print(f"错误: Skill '{skill_name}' 不存在", file=sys.stderr)
-        sys.exit(1)
-
-    # 检查是否已禁用（幂等性）
-    already_disabled = not skill_config.get("enabled", False)
-
-    # 更新 enabled 状态（保留 API 密钥）
-    skill_config["enabled"] = False
-
-    # 写回配置文件
-    try:
-        with open(config_file, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-            f.write("\n")
-    except Exception as e:
-        print(f"错误: 无法写入配置文件: {e}", file=sys.stderr)
-        sys.exit(2)
+        # 更新 enabled 状态（保留 API 密钥）
+        skill_config["enabled"] = False
 
-    # 重命名 SKILL.md 文件
-    skill_dir = skills_dir / skill_name
-    skill_md = skill_dir / "SKILL.md"
-    disabled_skill_md = skill_dir / "(DISABLED)SKILL.md"
-
-    file_renamed = False
-
-    if skill_md.exists():
+        # 写回配置文件
         try:
-            skill_md.rename(disabled_skill_md)
-            file_renamed = True
-        except Exception as e:
-            print(f"错误: 无法重命名文件: {e}", file=sys.stderr)
-            print(f"  {skill_md} → {disabled_skill_md}", file=sys.stderr)
-            # 回滚配置更改
-            skill_config["enabled"] = not already_disabled
-            with open(config_file, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-                f.write("\n")
-            sys.exit(2)
+            save_config(config_file, config)
+        except OSError as e:
+            raise SkillConfigError(f"无法写入配置文件: {e}", 2) from None
+
+        # 重命名 SKILL.md 文件
+        skill_dir = skills_dir / skill_name
+        skill_md = skill_dir / SKILL_MD
+        disabled_skill_md = skill_dir / DISABLED_SKILL_MD
+
+        file_renamed = False
+
+        if skill_md.exists():
+            try:
+                unshare_skill_dir(skill_dir)
+                skill_md.rename(disabled_skill_md)
+                file_renamed = True
+            except Exception as e:
+                print(f"错误: 无法重命名文件: {e}", file=sys.stderr)
+                print(f"  {skill_md} → {disabled_skill_md}", file=sys.stderr)
+                # 回滚配置更改
+                skill_config["enabled"] = not already_disabled
+                save_config(config_file, config)
+                sys.exit(2)
 
     # 输出结果
     if already_disabled and not file_renamed:
@@ -124,11 +94,7 @@ def disable_skill(skill_name):
 
 
 if __name__ == "__main__":
-    # 设置 UTF-8 输出（Windows 兼容性）
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
-    if hasattr(sys.stderr, 'reconfigure'):
-        sys.stderr.reconfigure(encoding='utf-8')
+    setup_utf8_output()
 
     import argparse
 
@@ -137,4 +103,7 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    disable_skill(args.skill_name)
+    try:
+        disable_skill(args.skill_name)
+    except SkillConfigError as e:
+        exit_with_error(e)
@@ -6,111 +6,91 @@ skillconfig_enable.py - 启用 Skill
     python skillconfig_enable.py <skill_name>
 
 功能:
-    1. 更新 skill_config.json 中 enabled: true
-    2. 重命名 (DISABLED)SKILL.md → SKILL.md
-    3. Claude Code 开始加载此 Skill
+    1. 延迟部署的 Skill (init 时已禁用、未复制) 从包内模板目录部署到 .claude/skills/
+    2. 更新 skill_config.json 中 enabled: true
+    3. 重命名 (DISABLED)SKILL.md → SKILL.md
+    4. Claude Code 开始加载此 Skill
 
 退出码:
     0: 成功（包括已启用的幂等操作）
     1: Skill 不存在
     2: 文件重命名失败（权限问题或文件被占用）
+    3: 延迟部署的 Skill 无法从模板部署（模板缺失或与记录不一致）
+    4: 配置文件 JSON 格式错误
+    5: 配置文件在读取后被其他进程修改（未写入）
 """
 
-import json
 import sys
-from pathlib import Path
 
-
-def find_project_root():
-    """从当前目录向上查找项目根目录"""
-    current = Path.cwd()
-    while current != current.parent:
-        if (current / ".elecspecify").exists():
-            return current
-        current = current.parent
-    return None
+from skillconfig_lib import (
+    DISABLED_SKILL_MD,
+    SKILL_MD,
+    SKILLS_PATH,
+    SkillConfigError,
+    config_lock,
+    exit_with_error,
+    find_skill,
+    load_config,
+    materialize_deferred_skill,
+    require_project_root,
+    save_config,
+    setup_utf8_output,
+    update_skill_frontmatter,
+)
 
 
 def enable_skill(skill_name):
     """启用 Skill"""
-    project_root = find_project_root()
-    if not project_root:
-        print("错误: 未找到 ElecSpecKit 项目根目录", file=sys.stderr)
-        print("提示: 请在项目目录中运行此命令", file=sys.stderr)
-        sys.exit(1)
-
-    config_file = project_root / ".elecspecify" / "memory" / "skill_config.json"
-    skills_dir = project_root / ".claude" / "skills"
-
-    if not config_file.exists():
-        print(f"错误: 配置文件不存在: {config_file}", file=sys.stderr)
-        sys.exit(1)
+    project_root = require_project_root()
+    # 读取、修改和写回期间持有配置锁，并发的 skillconfig 操作依次执行
+    with config_lock(project_root):
+        config, config_file = load_config(project_root)
+        _category, skill_config = find_skill(config, skill_name)
+        skills_dir = project_root / SKILLS_PATH
 
-    # 读取配置
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"错误: 配置文件 JSON 格式错误: {e}", file=sys.stderr)
-        sys.exit(4)
-
-    # 查找 Skill
-    found = False
-    skill_category = None
-    skill_config = None
-
-    for category, skills in config.get("skills", {}).items():
-        if skill_name in skills:
-            found = True
-            skill_category = category
-            skill_config = skills[skill_name]
-            break
-
-    if not found:
-        print(f"错误: Skill '{skill_name}' 不存在", file=sys.stderr)
-        sys.exit(1)
-
-    # 检查是否已启用（幂等性）
-    already_enabled = skill_config.get("enabled", False)
-
-    # 更新 enabled 状态
-    skill_config["enabled"] = True
-
-    # 写回配置文件
-    try:
-        with open(config_file, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-            f.write("\n")
-    except Exception as e:
-        print(f"错误: 无法写入配置文件: {e}", file=sys.stderr)
-        sys.exit(2)
+        # 检查是否已启用（幂等性）
+        already_enabled = skill_config.get("enabled", False)
 
-    # 重命名 SKILL.md 文件
-    skill_dir = skills_dir / skill_name
-    disabled_skill_md = skill_dir / "(DISABLED)SKILL.md"
-    skill_md = skill_dir / "SKILL.md"
+        # 延迟部署的 Skill 先从模板部署（失败时不修改配置）
+        materialized = materialize_deferred_skill(project_root, skills_dir, skill_name)
+        if materialized and skill_config.get("api_key", "").strip():
+            update_skill_frontmatter(skills_dir / skill_name / SKILL_MD, skill_config["api_key"])
 
-    file_renamed = False
+        # 更新 enabled 状态
+        skill_config["enabled"] = True
 
-    if disabled_skill_md.exists():
+        # 写回配置文件
         try:
-            disabled_skill_md.rename(skill_md)
-            file_renamed = True
-        except Exception as e:
-            print(f"错误: 无法重命名文件: {e}", file=sys.stderr)
-            print(f"  {disabled_skill_md} → {skill_md}", file=sys.stderr)
-            # 回滚配置更改
-            skill_config["enabled"] = already_enabled
-            with open(config_file, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-                f.write("\n")
-            sys.exit(2)
+            save_config(config_file, config)
+        except OSError as e:
+            raise SkillConfigError(f"无法写入配置文件: {e}", 2) from None
+
+        # 重命名 SKILL.md 文件
+        skill_dir = skills_dir / skill_name
+        disabled_skill_md = skill_dir / DISABLED_SKILL_MD
+        skill_md = skill_dir / SKILL_MD
+
+        file_renamed = False
+
+        if disabled_skill_md.exists():
+            try:
+                disabled_skill_md.rename(skill_md)
+                file_renamed = True
+            except Exception as e:
+                print(f"错误: 无法重命名文件: {e}", file=sys.stderr)
+                print(f"  {disabled_skill_md} → {skill_md}", file=sys.stderr)
+                # 回滚配置更改
+                skill_config["enabled"] = already_enabled
+                save_config(config_file, config)
+                sys.exit(2)
 
     # 输出结果
-    if already_enabled and not file_renamed:
+    if already_enabled and not file_renamed and not materialized:
         print(f"✅ Skill '{skill_name}' 已启用（幂等操作）")
     else:
         print(f"✅ Skill '{skill_name}' 已启用")
+        if materialized:
+            print(f"   已从模板部署到: {skills_dir / skill_name}")
         if file_renamed:
             print(f"   文件已重命名: (DISABLED)SKILL.md → SKILL.md")
         print(f"   Claude Code 现在可以加载此 Skill")
@@ -119,11 +99,7 @@ def enable_skill(skill_name):
 
 
 if __name__ == "__main__":
-    # 设置 UTF-8 输出（Windows 兼容性）
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
-    if hasattr(sys.stderr, 'reconfigure'):
-        sys.stderr.reconfigure(encoding='utf-8')
+    setup_utf8_output()
 
     import argparse
 
@@ -132,4 +108,7 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    enable_skill(args.skill_name)
+    try:
+        enable_skill(args.skill_name)
+    except SkillConfigError as e:
+        exit_with_error(e)
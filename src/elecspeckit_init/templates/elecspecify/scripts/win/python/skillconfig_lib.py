@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+"""
+skillconfig_lib.py - skillconfig_*.py 脚本共用的 Skills 配置库
+
+各 skillconfig 脚本通过 import 使用本模块（脚本所在目录位于 sys.path 首位），
+在同一进程内完成读取、修改、验证和写回 skill_config.json:
+
+- 验证直接作用于内存中已解析的配置对象，不再移动配置文件、复制临时文件
+  并启动 skillconfig_validate.py 子进程
+- 写回时先写入同目录临时文件再原子替换，并设置仅所有者可读写的权限
+- 修改配置的脚本在读取、修改和写回期间持有 .elecspecify/state/skill_config.json.lock
+  上的排他锁 (config_lock)，写回时以配置顶层的 "generation" 计数做 compare-and-swap，
+  与 elecspeckit 的 skill_config_store 模块使用相同的协议
+- .claude/skills/ 中各 Skill 的 SKILL.md 状态和 frontmatter 缓存在 Skills 文件索引
+  (.elecspecify/state/skills_index.json) 中，按目录和文件的 stat 增量刷新
+
+错误以 SkillConfigError 抛出，exit_code 为脚本的退出码，由各脚本统一输出并退出。
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# 配置文件和 Skills 目录（相对项目根目录）
+CONFIG_PATH = Path(".elecspecify") / "memory" / "skill_config.json"
+SKILLS_PATH = Path(".claude") / "skills"
+
+# 延迟部署记录（由 elecspeckit init 写入）
+DEFERRED_RECORD = Path(".elecspecify") / "state" / "deferred_skills.json"
+
+# Skills 文件索引（由 skillconfig 脚本按 stat 增量刷新，与部署记录一样属于本机状态）
+INDEX_PATH = Path(".elecspecify") / "state" / "skills_index.json"
+
+# 旧版本写入的索引位置（位于随项目提交的 memory 目录，写入新索引时删除）
+LEGACY_INDEX_PATH = Path(".elecspecify") / "memory" / "skills_index.json"
+INDEX_FORMAT_VERSION = 1
+
+# 修改时间与索引写入时间相差不超过此值的目录不信任索引（文件系统时间戳粒度）
+INDEX_RACY_NS = 2_000_000_000
+
+SKILL_MD = "SKILL.md"
+DISABLED_SKILL_MD = "(DISABLED)SKILL.md"
+
+# 配置中的写入计数字段和锁文件（与 elecspeckit_init.skill_config_store 一致，
+# 锁文件属于本机状态，不放在随项目提交的 memory 目录中）
+GENERATION_KEY = "generation"
+LOCK_PATH = Path(".elecspecify") / "state" / "skill_config.json.lock"
+
+# Skills 目录 .gitignore 中的链接列表片段标记（与 elecspeckit_init.skills_cache 一致）
+LINKS_GITIGNORE_BEGIN = "# >>> elecspeckit: links to the per-user skills cache >>>"
+LINKS_GITIGNORE_END = "# <<< elecspeckit: links to the per-user skills cache <<<"
+
+
+class SkillConfigError(Exception):
+    """skillconfig 操作失败"""
+
+    def __init__(self, message, exit_code=1, hint=None):
+        super().__init__(message)
+        self.exit_code = exit_code
+        self.hint = hint
+
+
+def setup_utf8_output():
+    """设置 UTF-8 输出（Windows 兼容性）"""
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    if hasattr(sys.stderr, 'reconfigure'):
+        sys.stderr.reconfigure(encoding='utf-8')
+
+
+def exit_with_error(error):
+    """输出错误信息和提示到 stderr 并以错误的退出码退出"""
+    print(f"错误: {error}", file=sys.stderr)
+    if error.hint:
+        print(f"提示: {error.hint}", file=sys.stderr)
+    sys.exit(error.exit_code)
+
+
+def find_project_root():
+    """从当前目录向上查找项目根目录（包含 .elecspecify/ 的目录）"""
+    current = Path.cwd()
+    while current != current.parent:
+        if (current / ".elecspecify").exists():
+            return current
+        current = current.parent
+    return None
+
+
+def require_project_root():
+    """
+    查找项目根目录
+
+    Raises:
+        SkillConfigError: 不在 ElecSpecKit 项目中 (退出码 1)
+    """
+    project_root = find_project_root()
+    if project_root is None:
+        raise SkillConfigError(
+            "未找到 ElecSpecKit 项目根目录", 1, "请在项目目录中运行此命令"
+        )
+    return project_root
+
+
+def load_config(project_root):
+    """
+    读取 skill_config.json
+
+    Returns:
+        (配置字典, 配置文件路径) 元组
+
+    Raises:
+        SkillConfigError: 配置文件不存在 (退出码 1) 或 JSON 格式错误 (退出码 4)
+    """
+    config_file = project_root / CONFIG_PATH
+    try:
+        with open(config_file, "r", encoding="utf-8") as f:
+            return json.load(f), config_file
+    except FileNotFoundError:
+        raise SkillConfigError(
+            f"配置文件不存在: {config_file}", 1, "请运行 'elecspeckit init' 初始化项目"
+        ) from None
+    except json.JSONDecodeError as e:
+        raise SkillConfigError(f"配置文件 JSON 格式错误: {e}", 4) from None
+
+
+def find_skill(config, skill_name):
+    """
+    在配置中查找 Skill
+
+    Returns:
+        (分类, Skill 配置字典) 元组
+
+    Raises:
+        SkillConfigError: Skill 不存在 (退出码 1)
+    """
+    for category, skills in config.get("skills", {}).items():
+        if skill_name in skills:
+            return category, skills[skill_name]
+    raise SkillConfigError(
+        f"Skill '{skill_name}' 不存在", 1, "运行 'python skillconfig_list.py' 查看所有可用 Skills"
+    )
+
+
+@contextmanager
+def config_lock(project_root):
+    """
+    持有 skill_config.json 的排他锁（阻塞等待其他写入方释放）
+
+    修改配置的脚本在读取配置之前获取，直到写回完成后释放；
+    锁随文件描述符关闭自动释放，进程异常退出时不会残留。
+    """
+    lock_path = project_root / LOCK_PATH
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def get_generation(config):
+    """配置的写入计数（没有计数的旧配置为 0）"""
+    generation = config.get(GENERATION_KEY, 0)
+    return generation if isinstance(generation, int) else 0
+
+
+def save_config(config_file, config):
+    """
+    以 compare-and-swap 方式原子写回配置文件并设置仅所有者可读写的权限
+
+    调用方应持有 config_lock。先确认磁盘上配置的写入计数仍为读取时的值，
+    再将计数加一（同时更新 config）后写入同目录临时文件并以 os.replace 替换，
+    写入失败时原文件保持不变。
+
+    Raises:
+        SkillConfigError: 配置在读取后被未持有锁的写入方修改 (退出码 5)
+        OSError: 写入失败
+    """
+    expected = get_generation(config)
+    try:
+        actual = get_generation(json.loads(config_file.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        actual = expected
+    except (ValueError, AttributeError):
+        actual = None
+    if actual != expected:
+        raise SkillConfigError(
+            f"配置文件在读取后被其他进程修改 (generation {expected} → {actual})，未写入",
+            5,
+            "请重新运行此命令",
+        )
+
+    config[GENERATION_KEY] = expected + 1
+    temp_file = config_file.with_name(f".{config_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(temp_file, config_file)
+    except OSError:
+        config[GENERATION_KEY] = expected
+        raise
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+    restrict_permissions(config_file)
+
+
+def restrict_permissions(path):
+    """设置文件权限为仅所有者可读写（失败时忽略）"""
+    try:
+        if sys.platform != "win32":
+            os.chmod(path, 0o600)
+        else:
+            # Windows: 使用 icacls 设置权限
+            subprocess.run(
+                [
+                    "icacls",
+                    str(path),
+                    "/inheritance:r",
+                    "/grant:r",
+                    f"{os.environ.get('USERNAME', 'Administrator')}:F",
+                ],
+                check=False,
+                capture_output=True,
+            )
+    except Exception:
+        pass  # 权限设置失败不阻塞
+
+
+def load_deferred_skills(project_root):
+    """
+    读取延迟部署的 Skills（init 时已禁用，启用时才部署）
+
+    Returns:
+        (Skill 名称集合, 读取失败时的错误信息或 None) 元组
+    """
+    record_file = project_root / DEFERRED_RECORD
+    if not record_file.exists():
+        return set(), None
+    try:
+        return set(json.loads(record_file.read_text(encoding="utf-8")).get("skills", {})), None
+    except (OSError, ValueError) as e:
+        return set(), f"无法读取延迟部署记录: {e}"
+
+
+def split_frontmatter(content):
+    """
+    拆分 SKILL.md 内容的 YAML frontmatter
+
+    Returns:
+        (frontmatter 文本, frontmatter 之后的内容) 元组；没有 frontmatter 时返回 (None, content)
+    """
+    if not content.startswith("---\n"):
+        return None, content
+    end = content.find("\n---", 4)
+    if end == -1:
+        return None, content
+    return content[4:end], content[end + 4:]
+
+
+def parse_frontmatter(text):
+    """解析 frontmatter 中的顶层 "key: value" 字段（嵌套和多行值只保留首行）"""
+    fields = {}
+    for line in text.splitlines():
+        if not line or line[0] in " \t#-":
+            continue
+        key, sep, value = line.partition(":")
+        if sep:
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            fields[key.strip()] = value
+    return fields
+
+
+def read_frontmatter(skill_md):
+    """
+    只读取 SKILL.md 开头的 frontmatter 部分
+
+    Returns:
+        frontmatter 字段字典（没有 frontmatter 时为空字典）
+    """
+    with open(skill_md, "r", encoding="utf-8", errors="replace") as f:
+        if f.readline().rstrip("\r\n") != "---":
+            return {}
+        lines = []
+        for line in f:
+            if line.rstrip("\r\n") == "---":
+                return parse_frontmatter("".join(lines))
+            lines.append(line)
+    return {}
+
+
+def _index_skill_dir(skill_dir, dir_stat):
+    """探测 Skill 目录中的 SKILL.md 文件并读取 frontmatter，返回索引条目"""
+    entry = {"mtime_ns": dir_stat.st_mtime_ns, "file": None, "enabled": False}
+    for name in (SKILL_MD, DISABLED_SKILL_MD):
+        try:
+            file_stat = (skill_dir / name).stat()
+        except OSError:
+            continue
+        entry.update(
+            file=name,
+            enabled=name == SKILL_MD,
+            file_mtime_ns=file_stat.st_mtime_ns,
+            size=file_stat.st_size,
+        )
+        try:
+            entry["frontmatter"] = read_frontmatter(skill_dir / name)
+        except OSError:
+            entry["frontmatter"] = {}
+        break
+    return entry
+
+
+def _index_entry_current(skill_dir, entry, dir_stat, indexed_at):
+    """索引条目是否仍与目录和 SKILL.md 文件的 stat 一致"""
+    if entry.get("mtime_ns") != dir_stat.st_mtime_ns:
+        return False
+    # 索引写入时刚修改过的目录: 同一时间戳内的后续修改无法通过 stat 发现
+    if indexed_at - dir_stat.st_mtime_ns <= INDEX_RACY_NS:
+        return False
+    if entry.get("file") is None:
+        return True
+    try:
+        file_stat = (skill_dir / entry["file"]).stat()
+    except OSError:
+        return False
+    return (
+        file_stat.st_mtime_ns == entry.get("file_mtime_ns")
+        and file_stat.st_size == entry.get("size")
+    )
+
+
+def load_skills_index(project_root):
+    """
+    读取 Skills 文件索引，并按 stat 增量刷新
+
+    索引记录 .claude/skills/ 中每个 Skill 目录的修改时间、SKILL.md 文件名
+    (即文件层面的启用状态)、文件的修改时间和大小，以及 frontmatter 字段。
+    目录和文件的 stat 与索引一致时直接使用索引条目，只重新探测和解析变化的 Skill；
+    有变化时写回索引（写入失败时忽略）。
+
+    Returns:
+        {Skill 名称: 索引条目}；Skills 目录不存在时返回 None
+    """
+    skills_dir = project_root / SKILLS_PATH
+    index_file = project_root / INDEX_PATH
+
+    try:
+        index = json.loads(index_file.read_text(encoding="utf-8"))
+        if index.get("format") != INDEX_FORMAT_VERSION:
+            raise ValueError(index.get("format"))
+    except (OSError, ValueError, AttributeError):
+        index = {"skills": {}, "indexed_at": 0}
+
+    cached = index.get("skills", {})
+    indexed_at = index.get("indexed_at", 0)
+    skills = {}
+    changed = False
+
+    try:
+        dir_entries = list(os.scandir(skills_dir))
+    except OSError:
+        return None
+
+    for dir_entry in dir_entries:
+        if dir_entry.name.startswith(".") or not dir_entry.is_dir():
+            continue
+        skill_dir = Path(dir_entry.path)
+        try:
+            dir_stat = dir_entry.stat()
+        except OSError:
+            continue
+        entry = cached.get(dir_entry.name)
+        if entry is None or not _index_entry_current(skill_dir, entry, dir_stat, indexed_at):
+            entry = _index_skill_dir(skill_dir, dir_stat)
+            changed = True
+        skills[dir_entry.name] = entry
+
+    if changed or set(skills) != set(cached):
+        save_skills_index(index_file, skills)
+        try:
+            (project_root / LEGACY_INDEX_PATH).unlink()
+        except OSError:
+            pass
+
+    return skills
+
+
+def save_skills_index(index_file, skills):
+    """写回 Skills 文件索引（写入失败时忽略，下次运行重新探测）"""
+    temp_file = index_file.with_name(f".{index_file.name}.{os.getpid()}.tmp")
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {"format": INDEX_FORMAT_VERSION, "indexed_at": time.time_ns(), "skills": skills},
+                f,
+                separators=(",", ":"),
+                ensure_ascii=False,
+            )
+        os.replace(temp_file, index_file)
+    except OSError:
+        if temp_file.exists():
+            temp_file.unlink()
+
+
+def validate_config(project_root, config):
+    """
+    验证 Skills 配置与 .claude/skills/ 目录一致
+
+    验证内容:
+        1. 配置中的每个 Skill 目录存在（已禁用且延迟部署的 Skill 除外）
+        2. enabled: true 的 Skill 有 SKILL.md 文件
+        3. enabled: false 的 Skill 使用 (DISABLED)SKILL.md（警告）
+        4. 已启用且需要 API 的 Skill 配置了 API 密钥（警告）
+        5. Skills 目录中的 Skill 都在配置中（警告）
+
+    Args:
+        project_root: 项目根目录
+        config: 已解析的配置字典（可以是尚未写回的修改后配置）
+
+    Returns:
+        {"status": "valid" | "invalid", "errors": [...], "warnings": [...]}
+    """
+    skills_dir = project_root / SKILLS_PATH
+    errors = []
+    warnings = []
+
+    deferred_skills, deferred_error = load_deferred_skills(project_root)
+    if deferred_error:
+        warnings.append({"skill": "system", "warning": deferred_error})
+
+    # Skill 目录和 SKILL.md 状态来自按 stat 增量刷新的索引
+    index = load_skills_index(project_root)
+    if index is None:
+        warnings.append({
+            "skill": "system",
+            "warning": f"Skills 目录不存在: {skills_dir}（可能尚未部署 Skills）"
+        })
+
+    # 收集配置中的所有 Skills
+    configured_skills = set()
+    for category, skills in config.get("skills", {}).items():
+        for skill_name, skill_config in skills.items():
+            configured_skills.add(skill_name)
+
+            if index is None:
+                continue
+
+            enabled = skill_config.get("enabled", False)
+            entry = index.get(skill_name)
+
+            # 检查 Skill 目录存在
+            if entry is None:
+                if skill_name in deferred_skills:
+                    if enabled:
+                        errors.append({
+                            "skill": skill_name,
+                            "error": "enabled: true 但 Skill 尚未部署（请运行 skillconfig_enable.py）"
+                        })
+                    continue
+                errors.append({
+                    "skill": skill_name,
+                    "error": f"Skill 目录不存在: {skills_dir / skill_name}"
+                })
+                continue
+
+            # 检查 SKILL.md 文件
+            has_skill_md = entry["file"] == SKILL_MD
+
+            if enabled:
+                # 已启用的 Skill 应该有 SKILL.md
+                if not has_skill_md:
+                    if entry["file"] == DISABLED_SKILL_MD:
+                        errors.append({
+                            "skill": skill_name,
+                            "error": "enabled: true 但文件名为 (DISABLED)SKILL.md"
+                        })
+                    else:
+                        errors.append({
+                            "skill": skill_name,
+                            "error": "enabled: true 但 SKILL.md 不存在"
+                        })
+            elif has_skill_md:
+                # 已禁用的 Skill 应该有 (DISABLED)SKILL.md
+                warnings.append({
+                    "skill": skill_name,
+                    "warning": "enabled: false 但文件名为 SKILL.md（应为 (DISABLED)SKILL.md）"
+                })
+
+            # 检查 API 密钥
+            requires_api = skill_config.get("requires_api", False)
+            has_api_key = bool(skill_config.get("api_key", "").strip())
+
+            if enabled and requires_api and not has_api_key:
+                warnings.append({
+                    "skill": skill_name,
+                    "warning": "Skill 已启用且需要 API 密钥，但未配置 API 密钥"
+                })
+
+    # 检查 Skills 目录中未在配置的 Skills
+    for skill_name in index or {}:
+        if skill_name not in configured_skills:
+            warnings.append({
+                "skill": skill_name,
+                "warning": "Skills 目录中存在但未在配置中"
+            })
+
+    return {
+        "status": "valid" if not errors else "invalid",
+        "errors": errors,
+        "warnings": warnings
+    }
+
+
+def find_template_source(record):
+    """
+    查找 Skills 模板（模板目录或模板归档 templates.zip）
+
+    优先使用记录中的位置；该位置不存在时（如 elecspeckit 已重新安装到其他位置）
+    尝试在当前 Python 环境中定位 elecspeckit_init 包。
+
+    Returns:
+        读取函数 read(相对 Skills 模板目录的路径) -> bytes，找不到时返回 None
+    """
+    candidates = []
+    if record.get("bundle"):
+        candidates.append((Path(record["bundle"]), record.get("bundle_prefix", "elecspecify/skills")))
+    candidates.append((Path(record.get("template_root", "")), None))
+
+    try:
+        import importlib.util
+
+        spec = importlib.util.find_spec("elecspeckit_init")
+    except (ImportError, ValueError):
+        spec = None
+
+    if spec is not None and spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            candidates.append((Path(location) / "templates.zip", "elecspecify/skills"))
+            candidates.append((Path(location) / "templates" / "elecspecify" / "skills", None))
+
+    for location, bundle_prefix in candidates:
+        if bundle_prefix is not None and location.is_file():
+            try:
+                bundle = zipfile.ZipFile(location)
+            except (OSError, zipfile.BadZipFile):
+                continue
+            return lambda relative_path: bundle.read(f"{bundle_prefix}/{relative_path}")
+        if bundle_prefix is None and location.is_dir():
+            return lambda relative_path: (location / relative_path).read_bytes()
+
+    return None
+
+
+def materialize_deferred_skill(project_root, skills_dir, skill_name):
+    """
+    部署延迟部署的 Skill
+
+    先复制到临时目录并逐个校验 SHA-256，全部通过后再重命名为正式目录，
+    失败时不留下不完整的 Skill 目录。
+
+    Returns:
+        True 如果已部署；Skill 不在延迟部署记录中时返回 False
+
+    Raises:
+        SkillConfigError: 记录无法读取或模板无法部署 (退出码 3)
+    """
+    record_file = project_root / DEFERRED_RECORD
+    if not record_file.exists() or (skills_dir / skill_name).exists():
+        return False
+
+    try:
+        record = json.loads(record_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise SkillConfigError(f"无法读取延迟部署记录: {e}", 3) from None
+
+    entry = record.get("skills", {}).get(skill_name)
+    if entry is None:
+        return False
+
+    read_template = find_template_source(record)
+    if read_template is None:
+        raise SkillConfigError(
+            f"找不到 Skill '{skill_name}' 的模板目录", 3, "请运行 'elecspeckit init' 重新部署 Skills"
+        )
+
+    staging_dir = skills_dir / f".{skill_name}.tmp"
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+
+    try:
+        for relative_path, expected in sorted(entry.get("files", {}).items()):
+            source = f"{skill_name}/{relative_path}"
+            content = read_template(source)
+            if hashlib.sha256(content).hexdigest() != expected.get("sha256"):
+                raise ValueError(f"模板文件与记录不一致: {source}")
+
+            target = staging_dir / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+
+        staging_dir.rename(skills_dir / skill_name)
+    except (OSError, ValueError, KeyError) as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise SkillConfigError(
+            f"无法部署 Skill '{skill_name}': {e}", 3, "请运行 'elecspeckit init' 重新部署 Skills"
+        ) from None
+
+    # 从记录中移除（最后一个延迟部署的 Skill 部署后删除记录文件）
+    del record["skills"][skill_name]
+    if record["skills"]:
+        temp_file = record_file.with_name(record_file.name + ".tmp")
+        temp_file.write_text(json.dumps(record, indent=2, ensure_ascii=False), encoding="utf-8")
+        temp_file.replace(record_file)
+    else:
+        record_file.unlink()
+
+    return True
+
+
+def unshare_skill_dir(skill_dir):
+    """
+    将指向共享缓存的 Skill 链接替换为私有副本
+
+    elecspeckit init --deploy-mode link 部署的 Skill 是指向用户级缓存的链接，
+    缓存文件只读且被多个项目共享，修改前先复制到项目中。
+
+    Returns:
+        True 如果已替换；不是链接时返回 False
+    """
+    is_junction = hasattr(os.path, "isjunction") and os.path.isjunction(skill_dir)
+    if not (skill_dir.is_symlink() or is_junction):
+        return False
+
+    temp_dir = skill_dir.with_name(f".{skill_dir.name}.unshare")
+    if temp_dir.exists():
+        shutil.rmtree(temp_dir)
+
+    shutil.copytree(skill_dir, temp_dir, copy_function=shutil.copyfile)
+    # copytree 会复制缓存目录的只读权限
+    for directory, _dirnames, _filenames in os.walk(temp_dir):
+        os.chmod(directory, 0o755)
+    try:
+        os.unlink(skill_dir)
+    except (IsADirectoryError, PermissionError):
+        # Windows 上的目录联接
+        os.rmdir(skill_dir)
+    os.replace(temp_dir, skill_dir)
+    forget_link_gitignore(skill_dir)
+    return True
+
+
+def forget_link_gitignore(skill_dir):
+    """
+    从 Skills 目录 .gitignore 的链接列表片段中移除已替换为私有副本的 Skill
+
+    片段由 elecspeckit init --deploy-mode link 维护，只列出指向用户缓存的链接；
+    私有副本是项目自己的文件，应当可以提交。
+    """
+    gitignore = skill_dir.parent / ".gitignore"
+    try:
+        lines = gitignore.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return
+
+    if LINKS_GITIGNORE_BEGIN not in lines or LINKS_GITIGNORE_END not in lines:
+        return
+    begin, end = lines.index(LINKS_GITIGNORE_BEGIN), lines.index(LINKS_GITIGNORE_END)
+    entry = f"/{skill_dir.name}"
+    if entry not in lines[begin:end]:
+        return
+
+    lines.remove(entry)
+    gitignore.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def update_skill_frontmatter(skill_path, api_key):
+    """
+    更新 SKILL.md 的 frontmatter 中的 api_key 字段
+
+    Args:
+        skill_path: SKILL.md 文件路径
+        api_key: API 密钥值
+
+    Returns:
+        True if updated, False otherwise
+    """
+    if not skill_path.exists():
+        return False
+
+    try:
+        content = skill_path.read_text(encoding="utf-8")
+
+        # 拆分 frontmatter (YAML格式)
+        frontmatter, rest_content = split_frontmatter(content)
+        if frontmatter is None:
+            return False
+
+        # 更新或添加 api_key 字段
+        api_key_pattern = r"^api_key:.*$"
+
+        if re.search(api_key_pattern, frontmatter, re.MULTILINE):
+            # 已存在 api_key 字段，替换它
+            new_frontmatter = re.sub(
+                api_key_pattern,
+                f'api_key: "{api_key}"',
+                frontmatter,
+                flags=re.MULTILINE
+            )
+        else:
+            # 不存在 api_key 字段，在 requires_api 后添加
+            requires_api_pattern = r"(^requires_api:.*$)"
+            new_frontmatter = re.sub(
+                requires_api_pattern,
+                rf'\1\napi_key: "{api_key}"',
+                frontmatter,
+                flags=re.MULTILINE
+            )
+
+        # 重新组装文件内容
+        new_content = f"---\n{new_frontmatter}\n---{rest_content}"
+
+        # 写回文件
+        skill_path.write_text(new_content, encoding="utf-8")
+        return True
+
+    except Exception as e:
+        print(f"警告: 无法更新 SKILL.md frontmatter: {e}", file=sys.stderr)
+        return False
@@ -6,8 +6,11 @@ skillconfig_list.py - 列出所有 Skills 及其配置状态
     python skillconfig_list.py [--format {text|json}]
 
 输出:
-    text: 文本格式，按分类显示，带状态图标
-    json: JSON 格式，完整配置数据
+    text: 文本格式，按分类显示，带状态图标；SKILL.md 文件状态与配置不一致时标出
+    json: JSON 格式，完整配置数据，"deployed" 字段为每个已部署 Skill 的文件状态
+
+    Skill 的文件状态来自 Skills 文件索引 (.elecspecify/state/skills_index.json)，
+    只重新探测 stat 发生变化的 Skill 目录。
 
 退出码:
     0: 成功
@@ -16,44 +19,33 @@ skillconfig_list.py - 列出所有 Skills 及其配置状态
 """
 
 import json
-import sys
-from pathlib import Path
-
-
-def find_project_root():
-    """从当前目录向上查找项目根目录（包含 .elecspecify/ 的目录）"""
-    current = Path.cwd()
-    while current != current.parent:
-        if (current / ".elecspecify").exists():
-            return current
-        current = current.parent
-    return None
-
-
-def load_skill_config():
-    """加载项目的 skill_config.json"""
-    project_root = find_project_root()
-    if not project_root:
-        print("错误: 未找到 ElecSpecKit 项目根目录（需要 .elecspecify/ 目录）", file=sys.stderr)
-        print("提示: 请在项目目录中运行此命令", file=sys.stderr)
-        sys.exit(1)
-
-    config_file = project_root / ".elecspecify" / "memory" / "skill_config.json"
-
-    if not config_file.exists():
-        print(f"错误: 配置文件不存在: {config_file}", file=sys.stderr)
-        print("提示: 请运行 'elecspeckit init' 初始化项目", file=sys.stderr)
-        sys.exit(1)
 
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            return json.load(f), config_file
-    except json.JSONDecodeError as e:
-        print(f"错误: 配置文件 JSON 格式错误: {e}", file=sys.stderr)
-        sys.exit(4)
-
-
-def format_text(config):
+from skillconfig_lib import (
+    DISABLED_SKILL_MD,
+    SKILL_MD,
+    SkillConfigError,
+    exit_with_error,
+    load_config,
+    load_skills_index,
+    require_project_root,
+    setup_utf8_output,
+)
+
+
+def file_status(enabled, entry):
+    """SKILL.md 文件状态与配置不一致时的说明（一致时为空字符串）"""
+    if entry is None:
+        return " [未部署]"
+    if entry["file"] is None:
+        return " [⚠ 缺少 SKILL.md]"
+    if enabled and entry["file"] != SKILL_MD:
+        return f" [⚠ 文件为 {DISABLED_SKILL_MD}]"
+    if not enabled and entry["file"] != DISABLED_SKILL_MD:
+        return f" [⚠ 文件为 {SKILL_MD}]"
+    return ""
+
+
+def format_text(config, index):
     """文本格式输出"""
     print("=" * 60)
     print(f"ElecSpecKit Skills 列表 (v{config.get('version', 'unknown')})")
@@ -100,6 +92,9 @@ def format_text(config):
                 else:
                     api_status = " [需要 API - 未配置]"
 
+            if index is not None:
+                api_status += file_status(enabled, index.get(skill_name))
+
             print(f"{status} **{skill_name}**{api_status}")
             print(f"   {description}")
             print()
@@ -107,13 +102,18 @@ def format_text(config):
         print()
 
     print("=" * 60)
-    print("图例: ✅ 已启用 | ❌ 已禁用")
+    print("图例: ✅ 已启用 | ❌ 已禁用 | [未部署] 启用时部署 | [⚠ ...] SKILL.md 文件与配置不一致")
     print()
 
 
-def format_json(config):
+def format_json(config, index):
     """JSON 格式输出"""
-    print(json.dumps(config, indent=2, ensure_ascii=False))
+    output = dict(config)
+    output["deployed"] = {
+        name: {"file": entry["file"], "enabled": entry["enabled"]}
+        for name, entry in (index or {}).items()
+    }
+    print(json.dumps(output, indent=2, ensure_ascii=False))
 
 
 def main():
@@ -129,20 +129,22 @@ def main():
 
     args = parser.parse_args()
 
-    config, config_file = load_skill_config()
+    try:
+        project_root = require_project_root()
+        config, config_file = load_config(project_root)
+    except SkillConfigError as e:
+        exit_with_error(e)
+
+    index = load_skills_index(project_root)
 
     if args.format == "text":
-        format_text(config)
+        format_text(config, index)
         print(f"配置文件: {config_file}")
     else:
-        format_json(config)
+        format_json(config, index)
 
 
 if __name__ == "__main__":
-    # 设置 UTF-8 输出（Windows 兼容性）
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
-    if hasattr(sys.stderr, 'reconfigure'):
-        sys.stderr.reconfigure(encoding='utf-8')
+    setup_utf8_output()
 
     main()
@@ -0,0 +1,211 @@
+"""
+三方合并
+
+升级时对用户修改过的模板文件做三方合并，而不是备份后整体覆盖:
+
+- base:   上次部署的模板内容 (按部署状态中的 SHA-256 从备份库对象中读取)
+- ours:   项目中的当前文件 (含用户修改)
+- theirs: 新版本模板
+
+部署命令模板和 skill_config.json 时，模板原始内容以 SHA-256 为名存入
+.elecspecify/backup/objects/ (与升级备份共用，相同内容只存一份)，作为下次升级的 base。
+gc_backups() 不会回收部署状态仍引用的对象。
+
+文本按行合并 (diff3)，两侧修改同一区域且内容不同时写入冲突标记；
+JSON 按键递归合并，冲突时保留用户的值。
+"""
+
+import difflib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .backup_store import BackupStore
+
+# 冲突标记
+CONFLICT_OURS = "<<<<<<< 当前文件\n"
+CONFLICT_BASE = "||||||| 上次部署的模板\n"
+CONFLICT_SEPARATOR = "=======\n"
+CONFLICT_THEIRS = ">>>>>>> 新模板\n"
+
+# 合并 JSON 时表示键不存在
+_MISSING = object()
+
+
+@dataclass
+class MergeResult:
+    """文本合并结果"""
+
+    content: str
+    conflicts: int = 0  # 冲突区域数
+
+
+def merge_text(base: str, ours: str, theirs: str) -> MergeResult:
+    """
+    按行三方合并文本 (diff3)
+
+    只有一侧修改的区域采用修改后的内容，两侧修改相同时采用任一侧；
+    两侧修改同一区域且内容不同时写入冲突标记 (当前文件 / 上次部署的模板 / 新模板)。
+
+    Args:
+        base: 上次部署的模板内容
+        ours: 当前文件内容
+        theirs: 新模板内容
+
+    Returns:
+        MergeResult 对象
+    """
+    base_lines = base.splitlines(keepends=True)
+    ours_lines = ours.splitlines(keepends=True)
+    theirs_lines = theirs.splitlines(keepends=True)
+
+    ours_map = _line_matches(base_lines, ours_lines)
+    theirs_map = _line_matches(base_lines, theirs_lines)
+
+    result: List[str] = []
+    conflicts = 0
+    b = o = t = 0
+
+    while True:
+        # 找到下一个在两侧都未改动的 base 行（稳定区域的起点）
+        k = b
+        while k < len(base_lines) and not (
+            ours_map.get(k, -1) >= o and theirs_map.get(k, -1) >= t
+        ):
+            k += 1
+
+        if k < len(base_lines):
+            ko, kt = ours_map[k], theirs_map[k]
+        else:
+            ko, kt = len(ours_lines), len(theirs_lines)
+
+        # 不稳定区域: base[b:k]、ours[o:ko]、theirs[t:kt]
+        if b < k or o < ko or t < kt:
+            conflicts += _merge_chunk(
+                base_lines[b:k], ours_lines[o:ko], theirs_lines[t:kt], result
+            )
+
+        if k == len(base_lines):
+            break
+
+        # 稳定区域: 两侧连续保留的 base 行
+        while k < len(base_lines) and ours_map.get(k) == ko and theirs_map.get(k) == kt:
+            result.append(base_lines[k])
+            k += 1
+            ko += 1
+            kt += 1
+        b, o, t = k, ko, kt
+
+    return MergeResult(content="".join(result), conflicts=conflicts)
+
+
+def merge_json(base: Any, ours: Any, theirs: Any) -> Tuple[Any, List[str]]:
+    """
+    三方合并 JSON 值
+
+    对象按键递归合并；只有一侧修改的值采用修改后的值，删除同样视为修改。
+    两侧修改同一个值且结果不同时保留用户的值 (ours) 并记录冲突。
+
+    Args:
+        base: 上次部署的模板内容
+        ours: 当前配置
+        theirs: 新模板内容
+
+    Returns:
+        (合并后的值, 冲突键路径列表) 元组，键路径如 "skills.information-retrieval.docs-seeker.enabled"
+    """
+    conflicts: List[str] = []
+    merged = _merge_value(base, ours, theirs, "", conflicts)
+    return merged, conflicts
+
+
+def store_merge_base(base_dir: Path, data: bytes) -> str:
+    """
+    将部署的模板原始内容存入备份库，作为下次升级的合并基准
+
+    Returns:
+        内容的 SHA-256
+    """
+    return BackupStore(base_dir).put_bytes(data)
+
+
+def load_merge_base(base_dir: Path, sha256: str) -> Optional[str]:
+    """
+    读取合并基准（换行符规范化为 \\n）
+
+    Returns:
+        上次部署的模板内容；对象不存在或无法解码时返回 None
+    """
+    try:
+        content = BackupStore(base_dir).read_bytes(sha256).decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+    return content.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _line_matches(base_lines: Sequence[str], other_lines: Sequence[str]) -> Dict[int, int]:
+    """计算 base 行号到另一版本中相同行行号的映射（单调递增）"""
+    matcher = difflib.SequenceMatcher(None, base_lines, other_lines, autojunk=False)
+    matches: Dict[int, int] = {}
+    for block in matcher.get_matching_blocks():
+        for offset in range(block.size):
+            matches[block.a + offset] = block.b + offset
+    return matches
+
+
+def _merge_chunk(
+    base_chunk: List[str], ours_chunk: List[str], theirs_chunk: List[str], result: List[str]
+) -> int:
+    """合并一个不稳定区域，返回冲突数 (0 或 1)"""
+    if ours_chunk == theirs_chunk or theirs_chunk == base_chunk:
+        result.extend(ours_chunk)
+        return 0
+    if ours_chunk == base_chunk:
+        result.extend(theirs_chunk)
+        return 0
+
+    result.append(CONFLICT_OURS)
+    result.extend(_terminated(ours_chunk))
+    result.append(CONFLICT_BASE)
+    result.extend(_terminated(base_chunk))
+    result.append(CONFLICT_SEPARATOR)
+    result.extend(_terminated(theirs_chunk))
+    result.append(CONFLICT_THEIRS)
+    return 1
+
+
+def _terminated(lines: List[str]) -> List[str]:
+    """确保最后一行以换行符结尾（冲突标记必须独占一行）"""
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+def _merge_value(base: Any, ours: Any, theirs: Any, path: str, conflicts: List[str]) -> Any:
+    """递归合并单个 JSON 值（_MISSING 表示键不存在）"""
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+
+    if isinstance(ours, dict) and isinstance(theirs, dict) and (
+        base is _MISSING or isinstance(base, dict)
+    ):
+        base_dict = base if isinstance(base, dict) else {}
+        merged = {}
+        # 键顺序以新模板为准，用户新增的键排在后面
+        keys = list(theirs) + [key for key in ours if key not in theirs]
+        for key in keys:
+            value = _merge_value(
+                base_dict.get(key, _MISSING),
+                ours.get(key, _MISSING),
+                theirs.get(key, _MISSING),
+                f"{path}.{key}" if path else str(key),
+                conflicts,
+            )
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+
+    conflicts.append(path)
+    return ours